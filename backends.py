@@ -0,0 +1,293 @@
+import ast
+import glob
+import os
+
+import cv2
+import numpy as np
+
+# Constants
+BACKEND_AUTO = "auto"
+NMS_IOU = 0.7
+MAX_DETECTIONS = 300
+LETTERBOX_COLOR = (114, 114, 114)
+MODEL_FILE_EXTENSIONS = (".engine", ".pt", ".onnx")
+MODEL_DIR_SUFFIXES = ("_ncnn_model", "_openvino_model")
+MAX_LETTERBOX_LAYOUTS = 8  # จำนวนขนาดเฟรมที่เก็บ buffer ของ letterbox ไว้ใช้ซ้ำ
+_INV_255 = np.float32(1 / 255)
+
+
+def list_model_files(model_dir):
+    """List the model files and exported model directories that a backend can load."""
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(
+        name for name in os.listdir(model_dir)
+        if name.endswith(MODEL_FILE_EXTENSIONS)
+        or (name.endswith(MODEL_DIR_SUFFIXES) and os.path.isdir(os.path.join(model_dir, name)))
+    )
+
+
+def detect_backend(model_path):
+    """Pick the backend name that fits a model file or exported model directory."""
+    if os.path.isdir(model_path):
+        if glob.glob(os.path.join(model_path, "*.ncnn.param")):
+            return "ncnn"
+        if glob.glob(os.path.join(model_path, "*.xml")):
+            return "openvino"
+    elif model_path.endswith(".onnx"):
+        return "onnxruntime"
+    return "ultralytics"
+
+
+def _load_metadata(model_dir):
+    """Read metadata.yaml written by ``yolo export`` next to NCNN/OpenVINO models."""
+    import yaml
+    path = os.path.join(model_dir, "metadata.yaml")
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r") as f:
+        return yaml.safe_load(f) or {}
+
+
+def _make_results(frame, names, detections):
+    from ultralytics.engine.results import Results
+    return Results(orig_img=frame, path="", names=names, boxes=detections)
+
+
+class Letterboxer:
+    """Letterbox frames straight into a preallocated model input blob.
+
+    The grey canvas and the 1x3xHxW float32 blob are allocated once per frame
+    shape and input size (a section with ROIs sends a few crop shapes, so the
+    last ``MAX_LETTERBOX_LAYOUTS`` are kept). Each call resizes the frame into
+    the canvas's image region (or copies it when no resize is needed) and
+    converts BGR HWC uint8 to RGB CHW float in [0, 1] channel by channel into
+    the blob, so no intermediate image or tensor is allocated per frame. The
+    returned blob is overwritten by the next call for the same shape.
+    """
+
+    def __init__(self):
+        self.layouts = {}  # (frame shape, size) -> (canvas, region, blob, ratio, pad)
+
+    def __call__(self, frame, size):
+        """Return the blob for ``frame`` letterboxed into ``size`` (h, w), the scale ratio and the (x, y) padding."""
+        key = (frame.shape, tuple(size))
+        layout = self.layouts.get(key)
+        if layout is None:
+            if len(self.layouts) >= MAX_LETTERBOX_LAYOUTS:
+                self.layouts.pop(next(iter(self.layouts)))
+            layout = self.layouts[key] = self._allocate(frame.shape, size)
+        canvas, region, blob, ratio, pad = layout
+        if region.shape[:2] == frame.shape[:2]:
+            np.copyto(region, frame)
+        else:
+            cv2.resize(frame, (region.shape[1], region.shape[0]), dst=region, interpolation=cv2.INTER_LINEAR)
+        for channel in range(3):
+            # BGR -> RGB และ HWC -> CHW ในขั้นตอนเดียวกับการ normalize
+            np.multiply(canvas[:, :, 2 - channel], _INV_255, out=blob[0, channel], casting="unsafe")
+        return blob, ratio, pad
+
+    @staticmethod
+    def _allocate(shape, size):
+        height, width = shape[:2]
+        ratio = min(size[0] / height, size[1] / width)
+        new_w, new_h = int(round(width * ratio)), int(round(height * ratio))
+        pad_x, pad_y = (size[1] - new_w) / 2, (size[0] - new_h) / 2
+        top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+        canvas = np.full((size[0], size[1], 3), LETTERBOX_COLOR, dtype=np.uint8)
+        region = canvas[top:top + new_h, left:left + new_w]
+        blob = np.empty((1, 3, size[0], size[1]), dtype=np.float32)
+        return canvas, region, blob, ratio, (left, top)
+
+
+def letterbox(frame, size):
+    """Resize ``frame`` into ``size`` (h, w) keeping aspect ratio, padded with grey.
+
+    Returns a new NCHW float32 RGB blob in [0, 1], the scale ratio and the (x, y) padding.
+    """
+    return Letterboxer()(frame, size)
+
+
+def postprocess(output, conf, ratio, pad, orig_shape, iou=NMS_IOU):
+    """Turn a raw YOLO detect output for one image into rows of ``x1, y1, x2, y2, conf, cls``.
+
+    The layout is told apart by shape, not by the model's class names, which
+    some exports do not carry: a raw head is ``(4 + nc, anchors)`` with far
+    more anchors than channels, an end-to-end head is ``(N, 6)``.
+    """
+    pred = np.asarray(output, dtype=np.float32)
+    if pred.ndim == 3:
+        pred = pred[0]
+    if pred.shape[0] > 4 and pred.shape[0] < pred.shape[1]:
+        # (4 + nc, N): กล่องแบบ cx, cy, w, h ตามด้วยคะแนนของแต่ละคลาส ยังไม่ผ่าน NMS
+        pred = pred.T
+        class_ids = pred[:, 4:].argmax(axis=1)
+        scores = pred[np.arange(len(pred)), 4 + class_ids]
+        keep = scores >= conf
+        pred, class_ids, scores = pred[keep], class_ids[keep], scores[keep]
+        boxes = np.empty((len(pred), 4), dtype=np.float32)
+        boxes[:, :2] = pred[:, :2] - pred[:, 2:4] / 2
+        boxes[:, 2:] = pred[:, :2] + pred[:, 2:4] / 2
+        if len(boxes):
+            tlwh = np.column_stack([boxes[:, :2], boxes[:, 2:] - boxes[:, :2]])
+            keep = cv2.dnn.NMSBoxesBatched(tlwh.tolist(), scores.tolist(), class_ids.tolist(), conf, iou)
+            keep = np.asarray(keep, dtype=int).reshape(-1)[:MAX_DETECTIONS]
+            boxes, scores, class_ids = boxes[keep], scores[keep], class_ids[keep]
+    else:
+        # (N, 6): โมเดลแบบ end-to-end ที่ให้ x1, y1, x2, y2, conf, cls มาแล้ว
+        pred = pred[pred[:, 4] >= conf]
+        boxes, scores, class_ids = pred[:, :4].copy(), pred[:, 4], pred[:, 5]
+
+    boxes[:, [0, 2]] = ((boxes[:, [0, 2]] - pad[0]) / ratio).clip(0, orig_shape[1])
+    boxes[:, [1, 3]] = ((boxes[:, [1, 3]] - pad[1]) / ratio).clip(0, orig_shape[0])
+    return np.column_stack([boxes, scores, class_ids]).astype(np.float32)
+
+
+class DetectorBackend:
+    """Common detect interface for every inference runtime.
+
+    ``detect`` takes a list of BGR frames and returns one ultralytics
+    ``Results`` per frame, so tracking and ``plot()`` work the same
+    whichever runtime produced the boxes.
+    """
+
+    name = None
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self.names = {}
+
+    def detect(self, frames, imgsz, conf):
+        raise NotImplementedError
+
+
+class UltralyticsBackend(DetectorBackend):
+    """PyTorch ``.pt`` and TensorRT ``.engine`` models through ``ultralytics.YOLO``."""
+
+    name = "ultralytics"
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        from ultralytics import YOLO
+        self.model = YOLO(model_path, task="detect")
+        self.names = self.model.names
+
+    def detect(self, frames, imgsz, conf):
+        import torch
+        with torch.no_grad():
+            return self.model.predict(source=frames, imgsz=imgsz, conf=conf, verbose=False)
+
+
+class RawOutputBackend(DetectorBackend):
+    """Base for runtimes that return the raw YOLO head output; pre/post-processing is done here in NumPy."""
+
+    fixed_size = None  # (h, w) when the exported model only accepts one input size
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        self.letterboxer = Letterboxer()
+
+    def input_size(self, imgsz):
+        if self.fixed_size:
+            return self.fixed_size
+        size = int(np.ceil(imgsz / 32) * 32)
+        return size, size
+
+    def run(self, blob):
+        """Run the network on a 1x3xHxW blob and return its first output."""
+        raise NotImplementedError
+
+    def detect(self, frames, imgsz, conf):
+        size = self.input_size(imgsz)
+        results = []
+        for frame in frames:
+            blob, ratio, pad = self.letterboxer(frame, size)
+            detections = postprocess(self.run(blob), conf, ratio, pad, frame.shape[:2])
+            for class_id in set(detections[:, 5].astype(int).tolist()) - self.names.keys():
+                # export ที่ไม่มี metadata names ใช้หมายเลขคลาสเป็นชื่อ
+                self.names[class_id] = str(class_id)
+            results.append(_make_results(frame, self.names, detections))
+        return results
+
+
+class OnnxRuntimeBackend(RawOutputBackend):
+    """ONNX models exported by ``yolo export format=onnx``, run on onnxruntime's CPU provider."""
+
+    name = "onnxruntime"
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        import onnxruntime as ort
+        self.session = ort.InferenceSession(model_path, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        metadata = self.session.get_modelmeta().custom_metadata_map
+        if "names" in metadata:
+            self.names = ast.literal_eval(metadata["names"])
+        shape = self.session.get_inputs()[0].shape
+        if isinstance(shape[2], int) and isinstance(shape[3], int):
+            self.fixed_size = (shape[2], shape[3])
+
+    def run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+
+class NcnnBackend(RawOutputBackend):
+    """NCNN ``model.ncnn.param``/``model.ncnn.bin`` pairs exported by ``yolo export format=ncnn``."""
+
+    name = "ncnn"
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        import ncnn
+        self.ncnn = ncnn
+        metadata = _load_metadata(model_path)
+        self.names = metadata.get("names", {})
+        if metadata.get("imgsz"):
+            self.fixed_size = tuple(metadata["imgsz"])
+        param_file = glob.glob(os.path.join(model_path, "*.ncnn.param"))[0]
+        self.net = ncnn.Net()
+        self.net.opt.num_threads = os.cpu_count() or 1
+        self.net.load_param(param_file)
+        self.net.load_model(param_file[: -len(".param")] + ".bin")
+
+    def run(self, blob):
+        with self.net.create_extractor() as ex:
+            ex.input("in0", self.ncnn.Mat(blob[0]).clone())
+            _, out0 = ex.extract("out0")
+        return np.array(out0)[None]
+
+
+class OpenVinoBackend(RawOutputBackend):
+    """OpenVINO IR directories exported by ``yolo export format=openvino``."""
+
+    name = "openvino"
+
+    def __init__(self, model_path):
+        super().__init__(model_path)
+        import openvino as ov
+        metadata = _load_metadata(model_path)
+        self.names = metadata.get("names", {})
+        core = ov.Core()
+        model = core.read_model(glob.glob(os.path.join(model_path, "*.xml"))[0])
+        if not model.inputs[0].get_partial_shape().is_dynamic:
+            shape = model.inputs[0].get_shape()
+            self.fixed_size = (shape[2], shape[3])
+        self.compiled = core.compile_model(model, "CPU")
+
+    def run(self, blob):
+        return self.compiled(blob)[self.compiled.output(0)]
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (UltralyticsBackend, OnnxRuntimeBackend, NcnnBackend, OpenVinoBackend)
+}
+
+
+def create_backend(model_path, backend=BACKEND_AUTO):
+    """Load ``model_path`` with the named backend, or the one matching its format for ``"auto"``."""
+    if not backend or backend == BACKEND_AUTO:
+        backend = detect_backend(model_path)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown inference backend: {backend}")
+    return BACKENDS[backend](model_path)
@@ -0,0 +1,199 @@
+"""Headless benchmark of the detection pipeline.
+
+Replays an image, a calibration ``.npy`` or a video through the same stages a
+``Countdown`` section runs (capture -> resize -> inference -> track -> summarize
+-> annotate -> encode) for every model/backend/size combination and prints
+per-stage latency percentiles, end-to-end FPS and peak RSS as JSON.
+
+Examples:
+    python benchmark.py --models model/yolo11n.pt model/yolo11n.onnx --sizes 320 480 640
+    python benchmark.py --source calibration_image_sample_data_20x128x128x3_float32.npy --backends onnxruntime
+    python benchmark.py --source runs/detect/predict2/0.avi --frames 300 --output bench.json
+"""
+import argparse
+import contextlib
+import itertools
+import json
+import multiprocessing as mp
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+# Constants
+DEFAULT_SOURCE = "bus.jpg"
+DEFAULT_SIZES = [320]
+DEFAULT_FRAMES = 100
+DEFAULT_WARMUP = 5
+PERCENTILES = (50, 90, 99)
+STAGES = ("capture", "resize", "inference", "track", "summarize", "annotate", "encode")
+
+
+class FrameSource:
+    """Endless frames from an image file, an N x H x W x 3 ``.npy`` array or a video (looped)."""
+
+    def __init__(self, path):
+        self.path = path
+        self.cap = None
+        self.frames = None
+        self.index = 0
+        if path.endswith(".npy"):
+            from convert import load_calibration_frames
+            self.frames = load_calibration_frames(path)
+        else:
+            image = cv2.imread(path)
+            if image is not None:
+                self.frames = [image]
+            else:
+                self.cap = cv2.VideoCapture(path)
+                if not self.cap.isOpened():
+                    raise ValueError(f"Cannot open benchmark source: {path}")
+
+    def read(self):
+        if self.frames is not None:
+            # คัดลอกเพื่อให้ต้นทุนใกล้เคียงกับการอ่านเฟรมใหม่จากกล้อง
+            frame = self.frames[self.index % len(self.frames)].copy()
+            self.index += 1
+            return frame
+        success, frame = self.cap.read()
+        if not success:
+            self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            success, frame = self.cap.read()
+            if not success:
+                raise ValueError(f"Cannot read frames from {self.path}")
+        return frame
+
+    def close(self):
+        if self.cap is not None:
+            self.cap.release()
+
+
+def peak_rss_mb():
+    """Peak resident set size of this process in MB, or ``None`` if it can't be measured."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    except ImportError:
+        try:
+            import psutil
+            return psutil.Process().memory_info().peak_wset / (1024 * 1024)
+        except (ImportError, AttributeError):
+            return None
+
+
+def summarize_timings(samples):
+    """Turn per-stage samples (seconds) into mean and percentile latencies in ms."""
+    summary = {}
+    for stage, values in samples.items():
+        values = np.asarray(values) * 1000
+        summary[stage] = {"mean_ms": round(float(values.mean()), 3)}
+        for p in PERCENTILES:
+            summary[stage][f"p{p}_ms"] = round(float(np.percentile(values, p)), 3)
+    return summary
+
+
+def run_benchmark(source, model_path, backend, imgsz, frames, warmup, codec, quality):
+    """Benchmark one model/backend/size combination and return its report."""
+    from inference_engine import InferenceEngine
+    from preview_encoder import PreviewEncoder
+    from detections import summarize_detections
+    from frame_buffer import fit_size
+
+    engine = InferenceEngine(model_path, backend)
+    encoder = PreviewEncoder(None, codec=codec, quality=quality)
+    frame_source = FrameSource(source)
+    samples = {stage: [] for stage in STAGES + ("total",)}
+    size = (imgsz, imgsz)
+    detections = 0
+
+    try:
+        for i in range(warmup + frames):
+            timings = {}
+            started = t = time.perf_counter()
+            frame = frame_source.read()
+            timings["capture"], t = time.perf_counter() - t, time.perf_counter()
+            frame = cv2.resize(frame, fit_size(frame.shape[1], frame.shape[0], size))
+            timings["resize"], t = time.perf_counter() - t, time.perf_counter()
+            result = engine.backend.detect([frame], imgsz, 0.25)[0]
+            timings["inference"], t = time.perf_counter() - t, time.perf_counter()
+            result = engine.track(0, result)
+            timings["track"], t = time.perf_counter() - t, time.perf_counter()
+            summarize_detections(result)
+            timings["summarize"], t = time.perf_counter() - t, time.perf_counter()
+            annotated = encoder.annotate(result)
+            timings["annotate"], t = time.perf_counter() - t, time.perf_counter()
+            encoder.encode(annotated)
+            timings["encode"] = time.perf_counter() - t
+            timings["total"] = time.perf_counter() - started
+            if i >= warmup:
+                for stage, value in timings.items():
+                    samples[stage].append(value)
+                detections += len(result.boxes)
+    finally:
+        frame_source.close()
+        engine.stop()
+
+    total = sum(samples["total"])
+    return {
+        "model": model_path,
+        "backend": engine.backend.name,
+        "imgsz": imgsz,
+        "source": source,
+        "frames": frames,
+        "fps": round(frames / total, 2) if total else None,
+        "mean_detections": round(detections / frames, 2) if frames else 0,
+        "stages": summarize_timings(samples),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+
+
+def _run_isolated(args):
+    with contextlib.redirect_stdout(sys.stderr):  # ให้ stdout มีแต่ JSON
+        return run_benchmark(*args)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the EleBull_VISION detection pipeline.")
+    parser.add_argument("--source", default=DEFAULT_SOURCE, help="Image, calibration .npy or video file to replay")
+    parser.add_argument("--models", nargs="+", required=True, help="Model files or exported model folders")
+    parser.add_argument("--backends", nargs="+", default=["auto"], help="Backends to try for every model")
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES, help="Detection resolutions (square)")
+    parser.add_argument("--frames", type=int, default=DEFAULT_FRAMES)
+    parser.add_argument("--warmup", type=int, default=DEFAULT_WARMUP)
+    parser.add_argument("--codec", default="jpeg", help="Preview codec used in the encode stage")
+    parser.add_argument("--quality", type=int, default=75)
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--no-isolate", action="store_true", help="Run every combination in this process (peak RSS is then cumulative)")
+    args = parser.parse_args()
+
+    runs = [
+        (args.source, model, backend, size, args.frames, args.warmup, args.codec, args.quality)
+        for model, backend, size in itertools.product(args.models, args.backends, args.sizes)
+    ]
+    reports = []
+    for run in runs:
+        try:
+            if args.no_isolate:
+                with contextlib.redirect_stdout(sys.stderr):  # ให้ stdout มีแต่ JSON
+                    report = run_benchmark(*run)
+            else:
+                # process ใหม่ต่อชุดการทดสอบ เพื่อให้ค่า peak RSS แยกกัน
+                with mp.get_context("spawn").Pool(1) as pool:
+                    report = pool.apply(_run_isolated, (run,))
+        except Exception as e:
+            report = {"model": run[1], "backend": run[2], "imgsz": run[3], "error": str(e)}
+        reports.append(report)
+        print(json.dumps(report), file=sys.stderr)
+
+    output = json.dumps({"host": {"cpu_count": os.cpu_count(), "platform": sys.platform}, "runs": reports}, indent=2)
+    print(output)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+
+
+if __name__ == "__main__":
+    main()
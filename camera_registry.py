@@ -0,0 +1,218 @@
+import glob
+import os
+import re
+import sys
+import threading
+import time
+
+import cv2
+
+from stream_source import is_stream_source
+
+HOTPLUG_POLL_INTERVAL = 2.0  # วินาทีระหว่างการตรวจสอบว่ามีการเสียบ/ถอดกล้อง
+MAX_PROBE_INDEX = 10
+SYSFS_VIDEO_DIR = "/sys/class/video4linux"
+
+
+def _read_sysfs(path):
+    try:
+        with open(path, "r") as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _list_windows_devices():
+    # import เมื่อใช้งานเท่านั้น เพื่อไม่ให้การเปิดโปรแกรมช้าลง
+    import pythoncom
+    from pygrabber.dshow_graph import FilterGraph
+
+    pythoncom.CoInitialize()
+    try:
+        devices = FilterGraph().get_input_devices()
+        return {device: index for index, device in enumerate(devices)}
+    finally:
+        pythoncom.CoUninitialize()
+
+
+def _list_sysfs_devices():
+    """List V4L2 capture nodes from sysfs without opening them.
+
+    Each USB camera usually exposes several ``/dev/video*`` nodes; only the
+    one with ``index`` 0 delivers frames.
+    """
+    devices = {}
+    nodes = sorted(glob.glob(os.path.join(SYSFS_VIDEO_DIR, "video*")), key=lambda p: int(re.sub(r"\D", "", os.path.basename(p)) or 0))
+    for node in nodes:
+        if _read_sysfs(os.path.join(node, "index")) not in (None, "0"):
+            continue
+        index = int(re.sub(r"\D", "", os.path.basename(node)))
+        name = _read_sysfs(os.path.join(node, "name")) or f"Camera {index}"
+        if name in devices:
+            name = f"{name} ({index})"
+        devices[name] = index
+    return devices
+
+
+def _probe_opencv_devices(skip_indices):
+    """Fallback: open each index with OpenCV, skipping devices already held by a feed."""
+    devices = {}
+    for index in range(MAX_PROBE_INDEX):
+        if index in skip_indices:
+            devices[f"Camera {index}"] = index
+            continue
+        cap = cv2.VideoCapture(index)
+        try:
+            if not cap.read()[0]:
+                break
+        finally:
+            cap.release()
+        devices[f"Camera {index}"] = index
+    return devices
+
+
+class CameraRegistry:
+    """Enumerate cameras once, cache the result and refresh it in the background.
+
+    On Linux the list comes from sysfs, so no device is opened; on Windows it
+    comes from DirectShow. Devices claimed by a running feed are never opened
+    by the OpenCV fallback probe. Network streams configured in the settings
+    are listed after the local devices and resolve to their URL. Listeners
+    are called whenever the list changes.
+    """
+
+    def __init__(self):
+        self.cached_devices = None
+        self.streams = {}  # name -> stream settings (url, max_fps, decode)
+        self.in_use = set()
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.Lock()
+        self.watcher = None
+        self.last_nodes = None
+
+    def devices(self, wait=True):
+        """Return the cached ``{name: index or URL}`` map, enumerating on first use.
+
+        With ``wait=False`` this never blocks: before the first enumeration
+        has finished it returns only the network streams and enumerates in the
+        background, notifying listeners when the devices are known.
+        """
+        if self.cached_devices is None:
+            if wait:
+                self.refresh(if_missing=True)
+            else:
+                self.refresh_async(if_missing=True)
+        self.start_watcher()
+        return self._with_streams(self.cached_devices or {})
+
+    def set_streams(self, streams):
+        """Replace the configured network streams (a list of settings dicts) and notify listeners."""
+        self.streams = {stream["name"]: dict(stream) for stream in streams if stream.get("name") and stream.get("url")}
+        if self.cached_devices is not None:
+            self._notify(self._with_streams(self.cached_devices))
+
+    def stream_options(self, name):
+        """Return the settings of a configured stream, or ``None`` for a local device."""
+        stream = self.streams.get(name)
+        return dict(stream) if stream is not None else None
+
+    def _with_streams(self, devices):
+        merged = dict(devices)
+        merged.update({name: stream["url"] for name, stream in self.streams.items()})
+        return merged
+
+    def _notify(self, devices):
+        for listener in list(self.listeners):
+            try:
+                listener(dict(devices))
+            except Exception as e:
+                print(f"Error in camera listener: {e}")
+
+    def refresh(self, if_missing=False):
+        """Enumerate cameras now and notify listeners if the list changed.
+
+        With ``if_missing`` an enumeration that finished while waiting for the
+        lock is reused instead of repeated.
+        """
+        with self.refresh_lock:
+            if if_missing and self.cached_devices is not None:
+                return self._with_streams(self.cached_devices)
+            try:
+                devices = self._enumerate()
+            except Exception as e:
+                print(f"Error enumerating cameras: {e}")
+                devices = self.cached_devices or {}
+            changed = devices != self.cached_devices
+            self.cached_devices = devices
+        if changed:
+            self._notify(self._with_streams(devices))
+        return self._with_streams(devices)
+
+    def resolve(self, name):
+        """Return the device index or stream URL for a camera name, accepting the older ``Camera N`` names and bare URLs."""
+        devices = self.devices()
+        if name in devices:
+            return devices[name]
+        if is_stream_source(name):
+            return name
+        match = re.fullmatch(r"Camera (\d+)", name or "")
+        if match and int(match.group(1)) in devices.values():
+            return int(match.group(1))
+        return None
+
+    def refresh_async(self, if_missing=False):
+        threading.Thread(target=self.refresh, kwargs={"if_missing": if_missing}, daemon=True).start()
+
+    def claim(self, index):
+        """Mark a device index (or stream URL) as held by a running feed."""
+        with self.lock:
+            self.in_use.add(index)
+
+    def release(self, index):
+        with self.lock:
+            self.in_use.discard(index)
+
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def start_watcher(self):
+        """Start the background thread that re-enumerates when devices are plugged or unplugged."""
+        if self.watcher is not None or sys.platform != "linux":
+            return
+        self.watcher = threading.Thread(target=self._watch, daemon=True)
+        self.watcher.start()
+
+    def _enumerate(self):
+        if sys.platform == "win32":
+            return _list_windows_devices()
+        if sys.platform == "linux":
+            if os.path.isdir(SYSFS_VIDEO_DIR):
+                return _list_sysfs_devices()
+            with self.lock:
+                in_use = set(self.in_use)
+            return _probe_opencv_devices(in_use)
+        print("Camera device retrieval is only supported on Windows and Linux.")
+        return {}
+
+    def _watch(self):
+        while True:
+            time.sleep(HOTPLUG_POLL_INTERVAL)
+            nodes = sorted(glob.glob("/dev/video*"))
+            if self.last_nodes is not None and nodes != self.last_nodes:
+                self.refresh()
+            self.last_nodes = nodes
+
+
+# Shared by every section and the settings screen
+camera_registry = CameraRegistry()
+
+
+def get_camera_devices():
+    """Return the cached camera list as ``{name: index or URL}``."""
+    return camera_registry.devices()
@@ -0,0 +1,201 @@
+import multiprocessing as mp
+import queue
+import threading
+import time
+
+# Constants
+WORKER_MODE_THREAD = "thread"
+WORKER_MODE_PROCESS = "process"
+WORKER_QUEUE_SIZE = 16
+WORKER_STOP_TIMEOUT = 3.0
+
+
+def _put_latest(messages, message):
+    """Send a message that may be dropped if the UI process is falling behind; return whether it was queued."""
+    try:
+        messages.put_nowait(message)
+    except queue.Full:
+        return False
+    return True
+
+
+def _worker_main(config, stop_event, messages, confidence_threshold, preview_visible):
+    """Entry point of a camera worker process: capture, detect, track, annotate and encode."""
+    from frame_buffer import LatestFrameBuffer
+    from inference_engine import InferenceEngine
+    from preview_encoder import PreviewEncoder
+    from detections import summarize_detections
+    from person_counter import UniqueIdCounter
+    from reid import AppearanceEmbedder, embed_tracks
+    from inference_scheduler import InferenceScheduler
+    from event_log import EventLog
+    from stream_source import open_capture
+    from roi import RoiCropper
+    from clip_recorder import ClipWriter, ClipRecorder
+
+    frame_size = tuple(config["frame_size"])
+    cap = None
+    preview = None
+    event_log = None
+    clip_writer = clip_recorder = None
+    try:
+        engine = InferenceEngine(config["model_path"], config["backend"])
+        engine.warmup(config["inference_size"])
+        engine.attach(0)
+
+        cap = open_capture(config["source"], frame_size, config["stream_options"])
+        if not cap.isOpened():
+            messages.put(("error", f"Cannot open camera {config['source']}"))
+            return
+
+        frame_buffer = LatestFrameBuffer()
+
+        def read_frames():
+            while not stop_event.is_set():
+                success, frame = cap.read()
+                if not success:
+                    break
+                captured_at = time.monotonic()
+                frame_buffer.put_fitted(frame, frame_size, captured_at)
+            stop_event.set()
+            frame_buffer.wake()
+
+        threading.Thread(target=read_frames, daemon=True).start()
+        roi_cropper = RoiCropper(config["rois"], config["inference_size"]) if config["rois"] else None
+        preview = PreviewEncoder(
+            lambda image_base64: _put_latest(messages, ("preview", image_base64)),
+            codec=config["preview_codec"], quality=config["preview_quality"], max_fps=config["preview_max_fps"],
+            overlay=roi_cropper,
+        )
+        preview.start()
+        # ใช้ตัดสินว่าข้อความใดมี ID ใหม่ที่ห้ามทิ้ง; การนับจริงทำที่ process UI
+        worker_person_ids = UniqueIdCounter(config["id_expiration_time"])
+        pending_person_ids = []  # ID จากข้อความที่ถูกทิ้ง ส่งไปพร้อมข้อความถัดไปเพื่อไม่ให้ ID หมดอายุที่ process UI
+        embedder = AppearanceEmbedder(config["reid_model"]) if config["reid_enabled"] else None
+        scheduler = InferenceScheduler(id_expiration_time=config["id_expiration_time"], **config["scheduler_options"])
+        if config["event_log_options"] is not None:
+            event_log = EventLog(**config["event_log_options"])
+        if config["clip_options"] is not None:
+            clip_writer = ClipWriter(**config["clip_options"]["writer"])
+            clip_recorder = ClipRecorder(config["name"], clip_writer, expiry=config["id_expiration_time"], **config["clip_options"]["recorder"])
+            clip_recorder.start()
+
+        while not stop_event.is_set():
+            item = frame_buffer.get(timeout=0.5)
+            if item is None:
+                continue
+            frame, _ = item
+            frame_time = time.time() - frame_buffer.last_frame_age
+            if clip_recorder is not None:
+                clip_recorder.submit(frame, frame_time)
+            if not scheduler.should_infer(frame):
+                engine.skip(0)
+                continue
+            started = time.perf_counter()
+            result = engine.infer(0, frame, confidence_threshold.value, config["inference_size"], roi_cropper)
+            scheduler.observe_inference(time.perf_counter() - started)
+            if event_log is not None:
+                event_log.append(config["name"], result, frame_time)
+            if clip_recorder is not None:
+                clip_recorder.observe(result, frame_time)
+            summary, class_counts, person_ids = summarize_detections(result)
+            summary += "\n" + scheduler.summary()
+            new_track_ids = worker_person_ids.observe_many(person_ids)
+            if pending_person_ids:
+                person_ids = list(dict.fromkeys(pending_person_ids + person_ids))
+                pending_person_ids = []
+            embeddings = embed_tracks(embedder, result, new_track_ids) if embedder is not None and new_track_ids else {}
+            # ข้อความที่มี track ID ใหม่ต้องไม่ถูกทิ้ง ไม่เช่นนั้นยอดรวมจะนับขาด
+            message = ("detections", summary, class_counts, person_ids, embeddings, frame_buffer.last_frame_age, frame_buffer.frames_dropped)
+            if new_track_ids:
+                messages.put(message)
+            elif not _put_latest(messages, message):
+                pending_person_ids = person_ids
+
+            preview.visible = bool(preview_visible.value)
+            if preview.due():
+                result.orig_img = result.orig_img.copy()
+                preview.submit(result)
+    except Exception as e:
+        messages.put(("error", str(e)))
+    finally:
+        if preview is not None:
+            preview.stop()
+        if event_log is not None:
+            event_log.stop()
+        if clip_recorder is not None:
+            clip_recorder.stop()
+            clip_writer.stop()
+        if cap is not None:
+            cap.release()
+
+
+class CameraWorker:
+    """Run one camera section in its own process so its Python work escapes the GIL.
+
+    Frames never leave the worker: it captures, detects, tracks, annotates
+    and encodes them itself, and the UI process receives only detection
+    summaries, person IDs and encoded previews through a queue.
+    """
+
+    def __init__(self, source, model_path, backend, confidence_threshold, frame_size,
+                 preview_codec, preview_quality, preview_max_fps, id_expiration_time,
+                 reid_enabled=False, reid_model=None, scheduler_options=None,
+                 event_log_options=None, name=None, stream_options=None, inference_size=None, rois=None,
+                 clip_options=None):
+        context = mp.get_context("spawn")
+        self.stop_event = context.Event()
+        self.messages = context.Queue(maxsize=WORKER_QUEUE_SIZE)
+        self.confidence_threshold = context.Value("d", confidence_threshold)
+        self.preview_visible = context.Value("b", True)
+        config = {
+            "source": source,
+            "model_path": model_path,
+            "backend": backend,
+            "frame_size": tuple(frame_size),
+            "preview_codec": preview_codec,
+            "preview_quality": preview_quality,
+            "preview_max_fps": preview_max_fps,
+            "id_expiration_time": id_expiration_time,
+            "reid_enabled": reid_enabled,
+            "reid_model": reid_model,
+            "scheduler_options": scheduler_options or {},
+            "event_log_options": event_log_options,
+            "name": name or f"Camera {source}",
+            "stream_options": stream_options,
+            "inference_size": inference_size or frame_size[0],
+            "rois": rois or [],
+            "clip_options": clip_options,
+        }
+        self.process = context.Process(
+            target=_worker_main,
+            args=(config, self.stop_event, self.messages, self.confidence_threshold, self.preview_visible),
+            daemon=True,
+        )
+
+    def start(self):
+        self.process.start()
+
+    def is_alive(self):
+        return self.process.is_alive()
+
+    def get_message(self, timeout=None):
+        """Return the next message from the worker, or ``None`` on timeout."""
+        try:
+            return self.messages.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def stop(self, wait=False):
+        """Ask the worker to exit; it is joined (and terminated if it hangs) on a background thread unless ``wait``."""
+        self.stop_event.set()
+        if wait:
+            self._reap()
+        else:
+            threading.Thread(target=self._reap, daemon=True).start()
+
+    def _reap(self):
+        self.process.join(WORKER_STOP_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join()
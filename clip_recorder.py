@@ -0,0 +1,250 @@
+"""Event-triggered clip recording from an in-memory pre-roll of JPEG frames.
+
+Each section's ``ClipRecorder`` keeps the last few seconds of frames,
+JPEG-compressed on its own thread. A new track of a class of interest
+triggers a clip of the pre-roll plus ``post_roll`` seconds, which the shared
+``ClipWriter`` thread encodes to ``{directory}/{section}/*.mp4`` and prunes
+to ``retention_mb``.
+"""
+import collections
+import datetime
+import glob
+import math
+import os
+import queue
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detections import detection_arrays, class_ids
+from event_log import section_directory_name
+from frame_buffer import LatestFrameBuffer
+from person_counter import UniqueIdCounter, ID_EXPIRATION_TIME
+
+# Constants
+CLIP_DIR = "clips"
+CLIP_PRE_ROLL = 5.0  # วินาทีก่อนเหตุการณ์ที่เก็บไว้ในหน่วยความจำ
+CLIP_POST_ROLL = 5.0  # วินาทีหลังเหตุการณ์ล่าสุดที่บันทึกต่อ
+CLIP_FPS = 10.0  # อัตราเฟรมสูงสุดที่บันทึก
+CLIP_QUALITY = 70  # คุณภาพ JPEG ของเฟรมใน pre-roll
+CLIP_RETENTION_MB = 2048  # ขนาดรวมสูงสุดของโฟลเดอร์ clip ก่อนลบไฟล์เก่าสุด
+MAX_CLIP_SECONDS = 60.0  # ตัด clip ที่ยาวเกินนี้ เหตุการณ์ต่อเนื่องจะเริ่ม clip ใหม่
+CLIP_QUEUE_SIZE = 4  # จำนวน clip ที่รอเขียนได้ เกินนี้จะทิ้ง clip แทนการบล็อก
+# คนและสัตว์ในชุดคลาส COCO; ว่างไว้เพื่อให้ทุกคลาสทริกเกอร์ได้
+CLIP_CLASSES = ("person", "bird", "cat", "dog", "horse", "sheep", "cow", "elephant", "bear", "zebra", "giraffe")
+RECORDER_OPTIONS = ("pre_roll", "post_roll", "fps", "quality", "classes")
+
+
+class ClipWriter:
+    """Encode finished clips to MP4 on one background thread and enforce size-based retention."""
+
+    def __init__(self, directory=CLIP_DIR, retention_mb=CLIP_RETENTION_MB):
+        self.directory = directory
+        self.retention_mb = retention_mb
+        self.queue = queue.Queue(maxsize=CLIP_QUEUE_SIZE)
+        self.files = collections.deque()  # (path, size) เรียงจากเก่าไปใหม่
+        self.total_bytes = 0
+        self.clips_written = 0
+        self.clips_dropped = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def options(self):
+        """Return the keyword arguments that recreate this writer, e.g. in a worker process."""
+        return {"directory": self.directory, "retention_mb": self.retention_mb}
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def write(self, section, frames, fps, reason):
+        """Queue ``frames`` (``[(timestamp, jpeg bytes)]``) as one clip; dropped and counted when the queue is full."""
+        try:
+            self.queue.put_nowait((section, frames, fps, reason))
+        except queue.Full:
+            self.clips_dropped += 1
+        if self.thread is None:
+            self.start()
+
+    def stop(self):
+        """Write every queued clip, then stop the thread."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        self._scan()
+        while True:
+            item = self.queue.get()
+            if item is None:
+                break
+            try:
+                self._write_clip(*item)
+                self._enforce_retention()
+            except (OSError, cv2.error) as e:
+                print(f"Error writing clip for {item[0]}: {e}")
+
+    def _scan(self):
+        paths = glob.glob(os.path.join(self.directory, "*", "*.mp4"))
+        self.files = collections.deque(sorted(((path, os.path.getsize(path)) for path in paths), key=lambda f: os.path.getmtime(f[0])))
+        self.total_bytes = sum(size for _, size in self.files)
+
+    def _write_clip(self, section, frames, fps, reason):
+        directory = os.path.join(self.directory, section_directory_name(section))
+        os.makedirs(directory, exist_ok=True)
+        started = datetime.datetime.fromtimestamp(frames[0][0]).strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"{started}-{section_directory_name(reason)}.mp4")
+        tmp_path = path[:-len(".mp4")] + ".part.mp4"
+        duration = frames[-1][0] - frames[0][0]
+        # pre-roll อาจมีเฟรมน้อยกว่า fps ที่ตั้งไว้ถ้ากล้องช้ากว่า ใช้อัตราจริงเพื่อให้ clip ยาวเท่าเหตุการณ์
+        fps = min(fps, (len(frames) - 1) / duration) if duration > 0 else fps
+        first = cv2.imdecode(np.frombuffer(frames[0][1], dtype=np.uint8), cv2.IMREAD_COLOR)
+        size = (first.shape[1], first.shape[0])
+        writer = cv2.VideoWriter(tmp_path, cv2.VideoWriter_fourcc(*"mp4v"), max(fps, 1.0), size)
+        if not writer.isOpened():
+            raise OSError(f"cannot open video writer for {tmp_path}")
+        try:
+            for _, jpeg in frames:
+                frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+                if (frame.shape[1], frame.shape[0]) != size:
+                    frame = cv2.resize(frame, size)
+                writer.write(frame)
+        finally:
+            writer.release()
+        os.replace(tmp_path, path)
+        file_size = os.path.getsize(path)
+        self.files.append((path, file_size))
+        self.total_bytes += file_size
+        self.clips_written += 1
+
+    def _enforce_retention(self):
+        limit = self.retention_mb * 1024 * 1024
+        while self.total_bytes > limit and len(self.files) > 1:
+            path, size = self.files.popleft()
+            self.total_bytes -= size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+
+class ClipRecorder:
+    """Keep a JPEG pre-roll for one section and cut a clip when a new track of interest appears.
+
+    ``submit`` (called with every frame the section reads) only copies the
+    frame into a preallocated triple buffer at up to ``fps``; ``observe``
+    (called with each tracked result) only compares track IDs. JPEG
+    compression runs on the recorder's thread and MP4 encoding on the
+    ``ClipWriter`` thread, so recording does not slow capture or inference.
+    Memory is bounded by the pre-roll and ``MAX_CLIP_SECONDS``.
+    """
+
+    def __init__(self, section, writer, pre_roll=CLIP_PRE_ROLL, post_roll=CLIP_POST_ROLL, fps=CLIP_FPS,
+                 quality=CLIP_QUALITY, classes=CLIP_CLASSES, expiry=ID_EXPIRATION_TIME, metrics=None):
+        self.section = section
+        self.writer = writer
+        self.pre_roll_seconds = pre_roll
+        self.post_roll = post_roll
+        self.fps = fps
+        self.quality = quality
+        self.classes = set(classes or ())
+        self.metrics = metrics
+        self.frames = LatestFrameBuffer()
+        self.pre_roll = collections.deque(maxlen=int(math.ceil(pre_roll * fps)) + 1)
+        self.clip = None  # [(timestamp, jpeg bytes)] ของ clip ที่กำลังบันทึก
+        self.reason = None
+        self.record_until = 0.0
+        self.seen_tracks = UniqueIdCounter(expiry)
+        self.last_submit = 0.0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        if self.thread is None or not self.thread.is_alive():
+            self.frames.reset()
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Stop recording; a clip in progress is handed to the writer as it is."""
+        self.running = False
+        self.frames.wake()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def submit(self, frame, timestamp=None):
+        """Offer a frame (wall-clock ``timestamp``) for the pre-roll; frames above ``fps`` are ignored."""
+        timestamp = time.time() if timestamp is None else timestamp
+        if timestamp - self.last_submit < 1.0 / self.fps:
+            return
+        self.last_submit = timestamp
+        self.frames.put(frame, timestamp)
+
+    def observe(self, result, timestamp=None):
+        """Trigger a clip if ``result`` contains a track of interest not seen within the expiry window."""
+        arrays = detection_arrays(result)
+        if not len(arrays.cls):
+            return
+        names = result.names
+        interesting = np.isin(arrays.cls, class_ids(names, self.classes)) if self.classes else np.ones(len(arrays.cls), dtype=bool)
+        if not interesting.any():
+            return
+        if arrays.ids is None:
+            # ไม่มี track ID ให้เทียบ ถือว่าการพบคลาสที่สนใจเป็นเหตุการณ์
+            reason = names[int(arrays.cls[interesting][0])]
+        else:
+            keys = zip(arrays.cls[interesting].tolist(), arrays.ids[interesting].tolist())
+            new_tracks = self.seen_tracks.observe_many(keys, timestamp)
+            if not new_tracks:
+                return
+            class_id, track_id = new_tracks[0]
+            reason = f"{names[class_id]}-{track_id}"
+        self.trigger(reason, timestamp)
+
+    def trigger(self, reason, timestamp=None):
+        timestamp = time.time() if timestamp is None else timestamp
+        if self.clip is None and timestamp > self.record_until:
+            self.reason = reason
+        self.record_until = max(self.record_until, timestamp + self.post_roll)
+
+    def _run(self):
+        params = [cv2.IMWRITE_JPEG_QUALITY, int(self.quality)]
+        while self.running:
+            item = self.frames.get(timeout=0.5)
+            if item is None:
+                if self.clip is not None and time.time() > self.record_until:
+                    self._finish()
+                continue
+            frame, timestamp = item
+            success, jpeg = cv2.imencode(".jpg", frame, params)
+            if not success:
+                continue
+            entry = (timestamp, jpeg.tobytes())
+            if self.clip is None and timestamp <= self.record_until:
+                # เริ่ม clip ใหม่จาก pre-roll ที่เก็บไว้
+                self.clip = list(self.pre_roll)
+                self.pre_roll.clear()
+            if self.clip is not None:
+                self.clip.append(entry)
+                if timestamp > self.record_until or timestamp - self.clip[0][0] >= MAX_CLIP_SECONDS:
+                    self._finish()
+            else:
+                self.pre_roll.append(entry)
+                while self.pre_roll and self.pre_roll[0][0] < timestamp - self.pre_roll_seconds:
+                    self.pre_roll.popleft()
+        if self.clip is not None:
+            self._finish()
+
+    def _finish(self):
+        clip, self.clip = self.clip, None
+        if len(clip) > 1:
+            self.writer.write(self.section, clip, self.fps, self.reason or "event")
+            if self.metrics is not None:
+                self.metrics.count("clips_recorded")
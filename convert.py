@@ -1,18 +1,227 @@
-import onnx
+"""Export a YOLO ``.pt`` model for the lighter CPU backends, optionally quantized to INT8.
 
-# Path to the input ONNX model
-input_model_path = r"C:\Users\hello\Desktop\Project_me\EleBull_Flet\model\yolov8n.onnx"
+Examples:
+    python convert.py model/yolo11n.pt --format onnx --int8
+    python convert.py model/yolo11n.pt --format ncnn --int8 --calibration captures/ --imgsz 320
+    python convert.py model/yolov8n.onnx --ir-version 9
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import time
 
-# Path to save the updated ONNX model
-output_model_path = r"C:\Users\hello\Desktop\Project_me\EleBull_Flet\model\yolov8n_ir9.onnx"
+import cv2
+import numpy as np
 
-# Load the ONNX model
-model = onnx.load(input_model_path)
+from backends import letterbox
 
-# Update the IR version
-model.ir_version = 9
+# Constants
+MODEL_DIR = "model"
+CALIBRATION_FILE = "calibration_image_sample_data_20x128x128x3_float32.npy"
+CALIBRATION_IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+DEFAULT_IMGSZ = 320
 
-# Save the modified model
-onnx.save(model, output_model_path)
 
-print(f"Model IR version changed to 9 and saved as {output_model_path}")
+def load_calibration_frames(source, limit=None):
+    """Load calibration frames as BGR uint8 images from a ``.npy`` array or a folder of captured frames.
+
+    The bundled ``.npy`` holds N x H x W x 3 RGB images as float32 in [0, 1].
+    """
+    if os.path.isdir(source):
+        paths = sorted(p for p in glob.glob(os.path.join(source, "*")) if p.lower().endswith(CALIBRATION_IMAGE_EXTENSIONS))
+        frames = [frame for frame in (cv2.imread(p) for p in paths[:limit]) if frame is not None]
+    else:
+        images = np.load(source)[:limit]
+        if images.dtype != np.uint8:
+            images = (images * 255 if images.max() <= 1.0 else images).clip(0, 255).astype(np.uint8)
+        frames = [cv2.cvtColor(image, cv2.COLOR_RGB2BGR) for image in images]
+    if not frames:
+        raise ValueError(f"No calibration frames found in {source}")
+    return frames
+
+
+def export_model(model_path, export_format, imgsz):
+    """Export ``model_path`` with ultralytics and return the path of the exported file or folder."""
+    from ultralytics import YOLO
+    return YOLO(model_path, task="detect").export(format=export_format, imgsz=imgsz, batch=1)
+
+
+def set_ir_version(model_path, output_path, ir_version):
+    """Rewrite an ONNX model's IR version so older onnxruntime releases can load it."""
+    import onnx
+    model = onnx.load(model_path)
+    model.ir_version = ir_version
+    onnx.save(model, output_path)
+    print(f"Model IR version changed to {ir_version} and saved as {output_path}")
+
+
+class _CalibrationReader:
+    """Feed letterboxed calibration frames to onnxruntime's static quantizer."""
+
+    def __init__(self, input_name, frames, size):
+        self.batches = iter([{input_name: letterbox(frame, size)[0]} for frame in frames])
+
+    def get_next(self):
+        return next(self.batches, None)
+
+    def rewind(self):
+        pass
+
+
+def quantize_onnx(model_path, output_path, frames, imgsz):
+    """Statically quantize an ONNX model to INT8 (QDQ) using ``frames`` for calibration."""
+    import onnx
+    from onnxruntime import InferenceSession
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    session = InferenceSession(model_path, providers=["CPUExecutionProvider"])
+    model_input = session.get_inputs()[0]
+    shape = model_input.shape
+    size = (shape[2], shape[3]) if isinstance(shape[2], int) and isinstance(shape[3], int) else (imgsz, imgsz)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        prepared_path = os.path.join(tmp, "prepared.onnx")
+        quant_pre_process(model_path, prepared_path)
+        quantize_static(
+            prepared_path,
+            output_path,
+            _CalibrationReader(model_input.name, frames, size),
+            quant_format=QuantFormat.QDQ,
+            activation_type=QuantType.QUInt8,
+            weight_type=QuantType.QInt8,
+            per_channel=True,
+        )
+
+    # quantize_static ไม่คัดลอก metadata (names, imgsz) ของ ultralytics มาด้วย
+    source = onnx.load(model_path)
+    quantized = onnx.load(output_path)
+    metadata = {prop.key: prop.value for prop in source.metadata_props}
+    metadata.update({"quantization": "int8", "calibration_frames": str(len(frames))})
+    del quantized.metadata_props[:]
+    for key, value in metadata.items():
+        quantized.metadata_props.add(key=key, value=value)
+    onnx.save(quantized, output_path)
+    return output_path
+
+
+def quantize_ncnn(model_dir, output_dir, frames, imgsz):
+    """Quantize an NCNN model folder to INT8 with ncnn's ``ncnn2table``/``ncnn2int8`` tools."""
+    ncnn2table, ncnn2int8 = shutil.which("ncnn2table"), shutil.which("ncnn2int8")
+    if not ncnn2table or not ncnn2int8:
+        raise RuntimeError("ncnn2table and ncnn2int8 must be on PATH for NCNN INT8 quantization")
+
+    param_file = glob.glob(os.path.join(model_dir, "*.ncnn.param"))[0]
+    bin_file = param_file[: -len(".param")] + ".bin"
+    os.makedirs(output_dir, exist_ok=True)
+    with tempfile.TemporaryDirectory() as tmp:
+        image_list = os.path.join(tmp, "images.txt")
+        with open(image_list, "w") as f:
+            for i, frame in enumerate(frames):
+                path = os.path.join(tmp, f"{i:04d}.png")
+                cv2.imwrite(path, frame)
+                f.write(path + "\n")
+        table = os.path.join(tmp, "model.table")
+        subprocess.run([
+            ncnn2table, param_file, bin_file, image_list, table,
+            "mean=[0,0,0]", "norm=[0.003921569,0.003921569,0.003921569]",
+            f"shape=[{imgsz},{imgsz},3]", "pixel=RGB", f"thread={os.cpu_count() or 1}", "method=kl",
+        ], check=True)
+        subprocess.run([
+            ncnn2int8, param_file, bin_file,
+            os.path.join(output_dir, "model.ncnn.param"), os.path.join(output_dir, "model.ncnn.bin"), table,
+        ], check=True)
+
+    import yaml
+    metadata_path = os.path.join(model_dir, "metadata.yaml")
+    metadata = {}
+    if os.path.exists(metadata_path):
+        with open(metadata_path, "r") as f:
+            metadata = yaml.safe_load(f) or {}
+    metadata.update({"quantization": "int8", "calibration_frames": len(frames)})
+    with open(os.path.join(output_dir, "metadata.yaml"), "w") as f:
+        yaml.safe_dump(metadata, f, sort_keys=False)
+    return output_dir
+
+
+def check_input(model_path, export_format):
+    """Raise ``ValueError`` if ``model_path`` cannot be turned into ``export_format``.
+
+    A ``.pt`` model exports to either format; an already exported ``.onnx``
+    file or NCNN folder can only be re-processed in its own format.
+    """
+    if not os.path.exists(model_path):
+        raise ValueError(f"{model_path} does not exist")
+    if model_path.endswith(".onnx") and export_format != "onnx":
+        raise ValueError(f"{model_path} is an ONNX model; export the .pt model to get {export_format}")
+    if os.path.isdir(model_path):
+        if not glob.glob(os.path.join(model_path, "*.ncnn.param")):
+            raise ValueError(f"{model_path} is not an NCNN model folder")
+        if export_format != "ncnn":
+            raise ValueError(f"{model_path} is an NCNN model; export the .pt model to get {export_format}")
+
+
+def convert(model_path, export_format="onnx", int8=False, calibration=CALIBRATION_FILE, imgsz=DEFAULT_IMGSZ, output_dir=MODEL_DIR, ir_version=None, calibration_limit=None):
+    """Export ``model_path`` into ``output_dir`` and return the path a backend should load."""
+    check_input(model_path, export_format)
+    started = time.time()
+    os.makedirs(output_dir, exist_ok=True)
+    name = os.path.splitext(os.path.basename(model_path))[0]
+
+    if model_path.endswith(".onnx") or os.path.isdir(model_path):
+        exported = model_path
+    else:
+        exported = export_model(model_path, export_format, imgsz)
+
+    if export_format == "onnx":
+        output = os.path.join(output_dir, f"{name}_int8.onnx" if int8 else f"{name}.onnx")
+        if int8:
+            quantize_onnx(exported, output, load_calibration_frames(calibration, calibration_limit), imgsz)
+        elif os.path.abspath(exported) != os.path.abspath(output):
+            shutil.copy(exported, output)
+        if ir_version is not None:
+            set_ir_version(output, output, ir_version)
+    elif export_format == "ncnn":
+        output = os.path.join(output_dir, f"{name}_int8_ncnn_model" if int8 else f"{name}_ncnn_model")
+        if int8:
+            quantize_ncnn(exported, output, load_calibration_frames(calibration, calibration_limit), imgsz)
+        elif os.path.abspath(exported) != os.path.abspath(output):
+            shutil.copytree(exported, output, dirs_exist_ok=True)
+    else:
+        raise ValueError(f"Unsupported export format: {export_format}")
+
+    print(json.dumps({
+        "source": model_path,
+        "output": output,
+        "format": export_format,
+        "int8": int8,
+        "imgsz": imgsz,
+        "seconds": round(time.time() - started, 1),
+    }))
+    return output
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export a YOLO model to ONNX/NCNN with optional INT8 quantization.")
+    parser.add_argument("model", help="Path to a .pt model (or an exported .onnx / NCNN folder to quantize)")
+    parser.add_argument("--format", choices=["onnx", "ncnn"], default="onnx")
+    parser.add_argument("--int8", action="store_true", help="Run INT8 post-training quantization")
+    parser.add_argument("--calibration", default=CALIBRATION_FILE, help="Calibration .npy file or folder of captured frames")
+    parser.add_argument("--calibration-limit", type=int, default=None, help="Use at most this many calibration frames")
+    parser.add_argument("--imgsz", type=int, default=DEFAULT_IMGSZ)
+    parser.add_argument("--output-dir", default=MODEL_DIR)
+    parser.add_argument("--ir-version", type=int, default=None, help="Rewrite the ONNX IR version (e.g. 9 for older onnxruntime)")
+    args = parser.parse_args()
+    try:
+        check_input(args.model, args.format)
+    except ValueError as e:
+        parser.error(str(e))
+    convert(args.model, args.format, args.int8, args.calibration, args.imgsz, args.output_dir, args.ir_version, args.calibration_limit)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+# Constants
+COUNT_HISTORY_FILE = "count_history.npz"
+COUNT_HISTORY_SAVE_INTERVAL = 60.0  # วินาทีระหว่างการบันทึก snapshot
+MAX_SERIES = 64  # จำนวนคู่ (section, class) สูงสุดที่เก็บได้
+# ความละเอียด -> (วินาทีต่อ bucket, จำนวน bucket ใน ring)
+RESOLUTIONS = {
+    "minute": (60, 24 * 60),  # 24 ชั่วโมงล่าสุด
+    "hour": (3600, 14 * 24),  # 14 วันล่าสุด
+}
+NEW_PERSONS = "new_persons"  # series ของจำนวนคนที่ถูกนับใหม่ (รวมใน bucket) แยกจากจำนวนสูงสุดต่อ class
+
+
+class _Ring:
+    """Fixed-size ring of time buckets for every series."""
+
+    def __init__(self, seconds, slots, rows):
+        self.seconds = seconds
+        self.slots = slots
+        self.values = np.zeros((rows, slots), dtype=np.float32)
+        self.buckets = np.full(slots, -1, dtype=np.int64)  # หมายเลข bucket ที่แต่ละช่องเก็บอยู่
+
+    def slot(self, now):
+        bucket = int(now // self.seconds)
+        slot = bucket % self.slots
+        if self.buckets[slot] != bucket:
+            # ช่องนี้ยังเก็บข้อมูลของรอบก่อน ล้างก่อนใช้ใหม่
+            self.values[:, slot] = 0
+            self.buckets[slot] = bucket
+        return slot
+
+    def window(self, count, now):
+        last = int(now // self.seconds)
+        buckets = np.arange(last - count + 1, last + 1)
+        slots = buckets % self.slots
+        values = np.where(self.buckets[slots] == buckets, self.values[:, slots], 0)
+        return buckets * self.seconds, values
+
+
+class CountHistory:
+    """Per-section, per-class counts binned into minute and hour buckets.
+
+    For each class the peak number seen in one frame is kept per bucket; the
+    ``new_persons`` series sums the unique persons counted in the bucket.
+    All buckets live in preallocated ring arrays, so memory does not grow
+    with uptime, and a small ``.npz`` snapshot restores them after a restart.
+    """
+
+    def __init__(self, max_series=MAX_SERIES):
+        self.max_series = max_series
+        self.keys = {}  # (section, name) -> row
+        self.rings = {name: _Ring(seconds, slots, max_series) for name, (seconds, slots) in RESOLUTIONS.items()}
+        self.lock = threading.Lock()
+        self.autosave_thread = None
+
+    def record(self, section, class_counts, now=None):
+        """Record the per-class counts of one frame."""
+        if not class_counts:
+            return
+        now = time.time() if now is None else now
+        with self.lock:
+            for ring in self.rings.values():
+                slot = ring.slot(now)
+                for class_name, count in class_counts.items():
+                    row = self._row(section, class_name)
+                    if row is not None and count > ring.values[row, slot]:
+                        ring.values[row, slot] = count
+
+    def record_new_persons(self, section, count, now=None):
+        if not count:
+            return
+        now = time.time() if now is None else now
+        with self.lock:
+            row = self._row(section, NEW_PERSONS)
+            if row is None:
+                return
+            for ring in self.rings.values():
+                ring.values[row, ring.slot(now)] += count
+
+    def series(self, resolution="minute", count=60, now=None):
+        """Return ``(bucket start times, {(section, name): values})`` for the last ``count`` buckets."""
+        now = time.time() if now is None else now
+        with self.lock:
+            times, values = self.rings[resolution].window(count, now)
+            return times, {key: values[row].copy() for key, row in self.keys.items()}
+
+    def _row(self, section, name):
+        key = (section, name)
+        row = self.keys.get(key)
+        if row is None:
+            if len(self.keys) >= self.max_series:
+                return None
+            row = self.keys[key] = len(self.keys)
+        return row
+
+    def save(self, path=COUNT_HISTORY_FILE):
+        with self.lock:
+            arrays = {f"{name}_values": ring.values.copy() for name, ring in self.rings.items()}
+            arrays.update({f"{name}_buckets": ring.buckets.copy() for name, ring in self.rings.items()})
+            keys = [[section, name, row] for (section, name), row in self.keys.items()]
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(f, keys=np.array(json.dumps(keys)), **arrays)
+        os.replace(tmp_path, path)
+
+    def load(self, path=COUNT_HISTORY_FILE):
+        """Restore a snapshot; a missing, unreadable or incompatible file leaves the history empty."""
+        if not os.path.exists(path):
+            return False
+        try:
+            with np.load(path) as data:
+                rings = {}
+                for name, ring in self.rings.items():
+                    values, buckets = data[f"{name}_values"], data[f"{name}_buckets"]
+                    if buckets.shape != ring.buckets.shape or values.shape[1] != ring.slots:
+                        raise ValueError(f"{name} ring size changed")
+                    rings[name] = (values, buckets)
+                keys = json.loads(str(data["keys"]))
+        except (OSError, KeyError, ValueError) as e:
+            print(f"Count history not restored from {path}: {e}")
+            return False
+        with self.lock:
+            self.keys = {(section, name): row for section, name, row in keys if row < self.max_series}
+            rows = len(self.keys)
+            for name, (values, buckets) in rings.items():
+                self.rings[name].values[:rows] = values[:rows]
+                self.rings[name].buckets[:] = buckets
+        return True
+
+    def start_autosave(self, path=COUNT_HISTORY_FILE, interval=COUNT_HISTORY_SAVE_INTERVAL):
+        if self.autosave_thread is not None:
+            return
+
+        def autosave():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.save(path)
+                except OSError as e:
+                    print(f"Error saving count history: {e}")
+
+        self.autosave_thread = threading.Thread(target=autosave, daemon=True)
+        self.autosave_thread.start()
+        atexit.register(self.save, path)
+
+
+# Shared by every section and the Home chart
+count_history = CountHistory()
@@ -0,0 +1,53 @@
+from collections import namedtuple
+
+import numpy as np
+
+MAX_LISTED_DETECTIONS = 10  # จำนวนกล่องที่แสดง track ID ในข้อความสรุป
+
+# กล่องทั้งหมดของหนึ่งเฟรมเป็น array: xyxy (N, 4), conf (N,), cls (N,) และ ids (N,) หรือ None ถ้ายังไม่ได้ track
+DetectionArrays = namedtuple("DetectionArrays", ["xyxy", "conf", "cls", "ids"])
+_EMPTY = DetectionArrays(np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.intp), None)
+
+
+def detection_arrays(result):
+    """Return every box of a result as NumPy arrays with one conversion, instead of per-box tensor access."""
+    boxes = result.boxes
+    if boxes is None or len(boxes) == 0:
+        return _EMPTY
+    data = boxes.cpu().numpy()
+    ids = data.id.astype(np.int64) if data.id is not None else None
+    return DetectionArrays(data.xyxy, data.conf, data.cls.astype(np.intp), ids)
+
+
+def class_ids(names, wanted):
+    """Return the class IDs in ``names`` whose name is in ``wanted``."""
+    return np.array([class_id for class_id, name in names.items() if name in wanted], dtype=np.intp)
+
+
+def summarize_detections(result):
+    """Summarize one tracked result for display.
+
+    Returns the detection summary text, the per-class counts and the track
+    IDs of every person in the frame. Counting and the person mask are array
+    operations, so the cost barely grows with the number of boxes.
+    """
+    names = result.names
+    arrays = detection_arrays(result)
+    if not len(arrays.cls):
+        return "Detections: \nTrack IDs: ", {}, []
+    classes, first_index, counts = np.unique(arrays.cls, return_index=True, return_counts=True)
+    # เรียงตามลำดับที่พบครั้งแรกในเฟรม เหมือนข้อความเดิม
+    order = np.argsort(first_index)
+    class_counts = {names[int(c)]: int(n) for c, n in zip(classes[order], counts[order])}
+
+    person_ids = []
+    if arrays.ids is not None:
+        person_ids = arrays.ids[np.isin(arrays.cls, class_ids(names, ("person",)))].tolist()
+
+    listed = arrays.cls[:MAX_LISTED_DETECTIONS].tolist()
+    listed_ids = arrays.ids[:MAX_LISTED_DETECTIONS].tolist() if arrays.ids is not None else [None] * len(listed)
+    detection_ids = [f"{names[c]} (ID: {track_id})" for c, track_id in zip(listed, listed_ids)]
+
+    summary = "Detections: " + ", ".join([f"{cls}: {count}" for cls, count in class_counts.items()])
+    summary += "\nTrack IDs: " + ", ".join(detection_ids)
+    return summary, class_counts, person_ids
@@ -0,0 +1,87 @@
+import threading
+
+import flet as ft
+
+from metrics import metrics_registry
+from model_registry import model_registry
+from ui_scheduler import ui_scheduler
+
+DIAGNOSTICS_REFRESH_INTERVAL = 1.0  # วินาทีระหว่างการรีเฟรชตาราง
+
+
+class DiagnosticsScreen(ft.UserControl):
+    """Live per-stage latency table for every section, refreshed while the screen is shown."""
+
+    def __init__(self, metrics_url=None):
+        super().__init__()
+        self.metrics_url = metrics_url
+        self.stop_event = threading.Event()
+        self.table = ft.DataTable(
+            columns=[
+                ft.DataColumn(ft.Text("Section")),
+                ft.DataColumn(ft.Text("Stage")),
+                ft.DataColumn(ft.Text("Count"), numeric=True),
+                ft.DataColumn(ft.Text("p50 (ms)"), numeric=True),
+                ft.DataColumn(ft.Text("p90 (ms)"), numeric=True),
+                ft.DataColumn(ft.Text("p99 (ms)"), numeric=True),
+            ],
+            rows=[],
+        )
+        self.summary_text = ft.Text("", color=ft.colors.WHITE)
+
+    def refresh(self):
+        rows = []
+        for section, stages in sorted(metrics_registry.snapshot().items()):
+            for stage, row in stages.items():
+                rows.append(ft.DataRow(cells=[
+                    ft.DataCell(ft.Text(section)),
+                    ft.DataCell(ft.Text(stage)),
+                    ft.DataCell(ft.Text(str(row["count"]))),
+                    ft.DataCell(ft.Text(f"{row.get('p50_ms', 0):.1f}")),
+                    ft.DataCell(ft.Text(f"{row.get('p90_ms', 0):.1f}")),
+                    ft.DataCell(ft.Text(f"{row.get('p99_ms', 0):.1f}")),
+                ]))
+        self.table.rows = rows
+        ui_stats = ui_scheduler.stats()
+        model_stats = model_registry.stats()
+        self.summary_text.value = (
+            f"UI updates requested: {ui_stats['requested']}, flushed: {ui_stats['flushed']}, page updates: {ui_stats['flushes']}\n"
+            f"Models loaded: {model_stats['loaded']} ({model_stats['size_mb']} / {model_stats['budget_mb']} MB), in use: {model_stats['in_use']}"
+        )
+        for section, counters in sorted(metrics_registry.counters().items()):
+            inferred = counters.get("frames_inferred", 0)
+            skipped = counters.get("frames_skipped_static", 0) + counters.get("frames_skipped_rate", 0)
+            if inferred + skipped:
+                self.summary_text.value += (
+                    f"\n{section}: skipped {skipped}/{inferred + skipped} frames "
+                    f"(~{counters.get('inference_seconds_saved', 0):.1f} s of inference saved)"
+                )
+        ui_scheduler.mark_dirty(self.table, self.summary_text)
+
+    def did_mount(self):
+        self.stop_event.clear()
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def will_unmount(self):
+        self.stop_event.set()
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing diagnostics: {e}")
+            self.stop_event.wait(DIAGNOSTICS_REFRESH_INTERVAL)
+
+    def build(self):
+        controls = [
+            ft.Container(
+                content=ft.Text("Diagnostics", size=24, weight="bold", color=ft.colors.WHITE),
+                margin=ft.margin.only(bottom=20)
+            ),
+            self.summary_text,
+        ]
+        if self.metrics_url:
+            controls.append(ft.Text(f"Prometheus metrics: {self.metrics_url}", color=ft.colors.WHITE70))
+        controls.append(ft.Column([self.table], scroll=ft.ScrollMode.AUTO))
+        return ft.Column(controls, alignment=ft.MainAxisAlignment.START)
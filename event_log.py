@@ -0,0 +1,262 @@
+"""Append-only per-section detection event log in fixed-size binary records.
+
+Each section writes to ``{directory}/{section}/{YYYYMMDD}-{NNNN}.bin``. A file
+is a 16-byte header followed by packed ``EVENT_DTYPE`` records in time order,
+so a day of events can be memory-mapped and sliced with ``searchsorted``
+without parsing. Class names are kept next to the files in ``classes.json``.
+"""
+import datetime
+import glob
+import json
+import os
+import queue
+import re
+import struct
+import threading
+import time
+
+import numpy as np
+
+from detections import detection_arrays
+
+# Constants
+EVENT_LOG_DIR = "events"
+EVENT_FLUSH_INTERVAL = 1.0  # วินาทีระหว่างการเขียน batch ลงไฟล์
+EVENT_ROTATE_MB = 64  # ขนาดไฟล์สูงสุดก่อนขึ้นไฟล์ใหม่ (ขึ้นไฟล์ใหม่ทุกวันด้วย)
+EVENT_QUEUE_SIZE = 1024  # จำนวน batch ที่รอเขียนได้ เกินนี้จะทิ้งแทนการบล็อก inference
+EVENT_MAGIC = b"EBEV"
+EVENT_VERSION = 1
+EVENT_DTYPE = np.dtype([
+    ("timestamp", "<f8"),
+    ("track_id", "<i4"),  # -1 ถ้าไม่มี track
+    ("class_id", "<i2"),
+    ("conf", "<f2"),
+    ("x1", "<f4"),
+    ("y1", "<f4"),
+    ("x2", "<f4"),
+    ("y2", "<f4"),
+])
+_HEADER = struct.Struct("<4sHHQ")  # magic, version, record size, reserved
+_FILE_PATTERN = re.compile(r"(\d{8})-(\d{4})\.bin$")
+
+
+def section_directory_name(section):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", section).strip("_") or "section"
+
+
+def result_to_events(result, timestamp):
+    """Convert the boxes of one tracked result into ``EVENT_DTYPE`` records."""
+    arrays = detection_arrays(result)
+    events = np.empty(len(arrays.cls), dtype=EVENT_DTYPE)
+    if not len(events):
+        return events
+    events["timestamp"] = timestamp
+    events["track_id"] = arrays.ids if arrays.ids is not None else -1
+    events["class_id"] = arrays.cls
+    events["conf"] = arrays.conf
+    xyxy = arrays.xyxy
+    events["x1"], events["y1"], events["x2"], events["y2"] = xyxy[:, 0], xyxy[:, 1], xyxy[:, 2], xyxy[:, 3]
+    return events
+
+
+class _SectionFile:
+    def __init__(self, directory, rotate_bytes):
+        self.directory = directory
+        self.rotate_bytes = rotate_bytes
+        self.file = None
+        self.day = None
+        self.size = 0
+        self.class_names = {}
+
+    def write(self, events):
+        day = datetime.date.fromtimestamp(float(events["timestamp"][0])).strftime("%Y%m%d")
+        if self.file is None or day != self.day or self.size >= self.rotate_bytes:
+            self._open(day)
+        self.file.write(events.tobytes())
+        self.file.flush()
+        self.size += events.nbytes
+
+    def update_class_names(self, names):
+        if any(self.class_names.get(k) != v for k, v in names.items()):
+            self.class_names.update(names)
+            path = os.path.join(self.directory, "classes.json")
+            with open(path + ".tmp", "w") as f:
+                json.dump({str(k): v for k, v in self.class_names.items()}, f)
+            os.replace(path + ".tmp", path)
+
+    def _open(self, day):
+        self.close()
+        existing = [int(m.group(2)) for m in map(_FILE_PATTERN.search, os.listdir(self.directory)) if m and m.group(1) == day]
+        path = os.path.join(self.directory, f"{day}-{max(existing, default=-1) + 1:04d}.bin")
+        self.file = open(path, "wb")
+        self.file.write(_HEADER.pack(EVENT_MAGIC, EVENT_VERSION, EVENT_DTYPE.itemsize, 0))
+        self.day = day
+        self.size = _HEADER.size
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+            self.file = None
+
+
+class EventLog:
+    """Write detection events of every section from one background thread.
+
+    ``append`` only converts the boxes to a small NumPy array and enqueues it;
+    when the queue is full the batch is dropped and counted rather than
+    blocking the inference thread.
+    """
+
+    def __init__(self, directory=EVENT_LOG_DIR, flush_interval=EVENT_FLUSH_INTERVAL, rotate_mb=EVENT_ROTATE_MB):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.rotate_mb = rotate_mb
+        self.rotate_bytes = int(rotate_mb * 1024 * 1024)
+        self.queue = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        self.files = {}
+        self.events_written = 0
+        self.batches_dropped = 0
+        self.thread = None
+        self.lock = threading.Lock()
+
+    def options(self):
+        """Return the keyword arguments that recreate this log, e.g. in a worker process."""
+        return {"directory": self.directory, "flush_interval": self.flush_interval, "rotate_mb": self.rotate_mb}
+
+    def start(self):
+        with self.lock:
+            if self.thread is None or not self.thread.is_alive():
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+
+    def append(self, section, result, timestamp=None):
+        events = result_to_events(result, time.time() if timestamp is None else timestamp)
+        if not len(events):
+            return
+        try:
+            self.queue.put_nowait((section, events, result.names))
+        except queue.Full:
+            self.batches_dropped += 1
+        if self.thread is None:
+            self.start()
+
+    def stop(self):
+        """Flush everything queued so far and close the files."""
+        if self.thread is not None:
+            self.queue.put(None)
+            self.thread.join()
+            self.thread = None
+
+    def _run(self):
+        running = True
+        while running:
+            batches = {}
+            deadline = time.monotonic() + self.flush_interval
+            while True:
+                try:
+                    item = self.queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                section, events, names = item
+                batches.setdefault(section, ([], names))[0].append(events)
+            for section, (chunks, names) in batches.items():
+                try:
+                    self._write(section, np.concatenate(chunks), names)
+                except OSError as e:
+                    print(f"Error writing events for {section}: {e}")
+        for section_file in self.files.values():
+            section_file.close()
+        self.files.clear()
+
+    def _write(self, section, events, names):
+        section_file = self.files.get(section)
+        if section_file is None:
+            directory = os.path.join(self.directory, section_directory_name(section))
+            os.makedirs(directory, exist_ok=True)
+            section_file = self.files[section] = _SectionFile(directory, self.rotate_bytes)
+        section_file.update_class_names(names)
+        section_file.write(events)
+        self.events_written += len(events)
+
+
+class EventLogReader:
+    """Memory-map and query the events one section logged on one day."""
+
+    def __init__(self, section, day=None, directory=EVENT_LOG_DIR):
+        self.directory = os.path.join(directory, section_directory_name(section))
+        day = day or datetime.date.today()
+        self.day = day.strftime("%Y%m%d") if isinstance(day, datetime.date) else str(day)
+        self.class_names = {}
+        names_path = os.path.join(self.directory, "classes.json")
+        if os.path.exists(names_path):
+            with open(names_path) as f:
+                self.class_names = {int(k): v for k, v in json.load(f).items()}
+        self.chunks = [chunk for chunk in map(self._map, sorted(glob.glob(os.path.join(self.directory, f"{self.day}-*.bin")))) if len(chunk)]
+
+    def _map(self, path):
+        with open(path, "rb") as f:
+            magic, version, record_size, _ = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != EVENT_MAGIC or version != EVENT_VERSION or record_size != EVENT_DTYPE.itemsize:
+            raise ValueError(f"Not an event log file: {path}")
+        count = (os.path.getsize(path) - _HEADER.size) // EVENT_DTYPE.itemsize
+        if count == 0:
+            return np.zeros(0, dtype=EVENT_DTYPE)
+        # นับเฉพาะ record ที่เขียนครบ ไฟล์ที่กำลังเขียนอยู่อาจมี record ค้างครึ่งหนึ่ง
+        return np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=_HEADER.size, shape=(count,))
+
+    def __len__(self):
+        return sum(len(chunk) for chunk in self.chunks)
+
+    def query(self, start=None, end=None, class_name=None, track_id=None):
+        """Return the events in ``[start, end)`` (Unix time), optionally filtered by class and track ID."""
+        class_id = None
+        if class_name is not None:
+            class_id = next((k for k, v in self.class_names.items() if v == class_name), None)
+            if class_id is None:
+                return np.zeros(0, dtype=EVENT_DTYPE)
+        selected = []
+        for chunk in self.chunks:
+            timestamps = chunk["timestamp"]
+            lo = 0 if start is None else np.searchsorted(timestamps, start, side="left")
+            hi = len(chunk) if end is None else np.searchsorted(timestamps, end, side="left")
+            events = chunk[lo:hi]
+            mask = None
+            if class_id is not None:
+                mask = events["class_id"] == class_id
+            if track_id is not None:
+                mask = (events["track_id"] == track_id) if mask is None else mask & (events["track_id"] == track_id)
+            selected.append(np.asarray(events if mask is None else events[mask]))
+        return np.concatenate(selected) if selected else np.zeros(0, dtype=EVENT_DTYPE)
+
+    def class_counts(self, start=None, end=None):
+        """Return ``{class_name: detections}`` for the events in ``[start, end)``."""
+        events = self.query(start, end)
+        ids, counts = np.unique(events["class_id"], return_counts=True)
+        return {self.class_names.get(int(i), str(int(i))): int(c) for i, c in zip(ids, counts)}
+
+
+def main(argv=None):
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Summarize one day of logged detection events.")
+    parser.add_argument("section", help="section name, e.g. 'EleBull_VISION - Cam 1'")
+    parser.add_argument("--day", help="YYYYMMDD (defaults to today)")
+    parser.add_argument("--directory", default=EVENT_LOG_DIR)
+    parser.add_argument("--class-name", help="only count this class")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    reader = EventLogReader(args.section, args.day, args.directory)
+    events = reader.query(class_name=args.class_name)
+    elapsed = time.perf_counter() - started
+    print(f"{len(events)} events ({len(reader)} in total) read in {elapsed * 1000:.1f} ms")
+    if len(events):
+        print(f"Unique track IDs: {len(np.unique(events['track_id'][events['track_id'] >= 0]))}")
+        print(json.dumps(reader.class_counts(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
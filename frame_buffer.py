@@ -0,0 +1,98 @@
+import threading
+import time
+
+import cv2
+import numpy as np
+
+
+def fit_size(width, height, max_size):
+    """Return the ``(width, height)`` that fits inside ``max_size`` (w, h) with the same aspect ratio, never upscaling."""
+    scale = min(max_size[0] / width, max_size[1] / height, 1.0)
+    return max(1, int(round(width * scale))), max(1, int(round(height * scale)))
+
+
+class LatestFrameBuffer:
+    """Keep only the newest camera frame for a single producer and a single consumer.
+
+    Three preallocated slots rotate between the writer, the newest ready frame
+    and the reader (triple buffering), so neither side ever waits on the other
+    and no frame is allocated per capture. A frame that is overwritten before
+    the consumer picks it up is dropped on purpose and counted.
+    """
+
+    def __init__(self):
+        self.slots = None
+        self.timestamps = [0.0, 0.0, 0.0]
+        self.write_index, self.ready_index, self.read_index = 0, 1, 2
+        self.has_ready = False
+        self.lock = threading.Lock()
+        self.ready_event = threading.Event()
+        self.frames_written = 0
+        self.frames_read = 0
+        self.frames_dropped = 0
+        self.last_frame_age = 0.0
+
+    def acquire_write(self, shape, dtype=np.uint8):
+        """Return the slot the producer should write the next frame into."""
+        if self.slots is None or self.slots[0].shape != tuple(shape) or self.slots[0].dtype != dtype:
+            with self.lock:
+                self.slots = [np.empty(shape, dtype=dtype) for _ in range(3)]
+                self.has_ready = False
+        return self.slots[self.write_index]
+
+    def commit(self, timestamp=None):
+        """Publish the slot returned by ``acquire_write`` as the newest frame."""
+        with self.lock:
+            self.timestamps[self.write_index] = timestamp if timestamp is not None else time.monotonic()
+            self.write_index, self.ready_index = self.ready_index, self.write_index
+            if self.has_ready:
+                self.frames_dropped += 1
+            self.has_ready = True
+            self.frames_written += 1
+        self.ready_event.set()
+
+    def put(self, frame, timestamp=None):
+        """Copy ``frame`` into the buffer as the newest frame."""
+        np.copyto(self.acquire_write(frame.shape, frame.dtype), frame)
+        self.commit(timestamp)
+
+    def put_fitted(self, frame, max_size, timestamp=None):
+        """Downscale ``frame`` to fit ``max_size`` (w, h), keeping its aspect ratio, directly into the buffer."""
+        width, height = fit_size(frame.shape[1], frame.shape[0], max_size)
+        slot = self.acquire_write((height, width) + frame.shape[2:], frame.dtype)
+        if (width, height) == (frame.shape[1], frame.shape[0]):
+            np.copyto(slot, frame)
+        else:
+            cv2.resize(frame, (width, height), dst=slot)
+        self.commit(timestamp)
+
+    def get(self, timeout=None):
+        """Wait for a new frame and return ``(frame, timestamp)``, or ``None`` on timeout.
+
+        The returned array stays valid until the next call to ``get``.
+        """
+        if not self.ready_event.wait(timeout):
+            return None
+        with self.lock:
+            self.ready_event.clear()
+            if not self.has_ready:
+                return None
+            self.read_index, self.ready_index = self.ready_index, self.read_index
+            self.has_ready = False
+            self.frames_read += 1
+            timestamp = self.timestamps[self.read_index]
+            self.last_frame_age = time.monotonic() - timestamp
+            return self.slots[self.read_index], timestamp
+
+    def wake(self):
+        """Wake a consumer blocked in ``get`` without publishing a frame."""
+        self.ready_event.set()
+
+    def reset(self):
+        with self.lock:
+            self.has_ready = False
+            self.ready_event.clear()
+            self.frames_written = 0
+            self.frames_read = 0
+            self.frames_dropped = 0
+            self.last_frame_age = 0.0
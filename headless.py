@@ -0,0 +1,221 @@
+"""Run the configured camera sections without the Flet UI, counting only.
+
+Reads cameras, models, thresholds, backends, inference sizes and ROIs from
+``settings.json`` and writes detections and person counts as JSON lines::
+
+    python headless.py --output counts.jsonl
+"""
+import argparse
+import json
+import os
+import signal
+import sys
+import threading
+import time
+
+from backends import BACKEND_AUTO
+from camera_registry import camera_registry
+from event_log import EventLog
+from inference_engine import new_section_id
+from metrics import metrics_registry, METRICS_HOST
+from model_registry import model_registry, MODEL_MEMORY_BUDGET_MB
+from person_counter import UniqueIdCounter, ID_EXPIRATION_TIME
+from stream_source import open_capture
+from reid import PersonGallery, REID_MATCH_THRESHOLD
+from roi import INFERENCE_SIZE
+from section_pipeline import SectionPipeline, MODEL_DIR, FRAME_WAIT_TIMEOUT
+from settings_store import SettingsStore, STATE_FILE
+
+# Constants
+COUNT_INTERVAL = 10.0  # วินาทีระหว่างการเขียนยอดรวม
+
+
+class JsonlSink:
+    """Append records as JSON lines to a local file, or stdout when ``path`` is ``-``."""
+
+    def __init__(self, path):
+        self.path = path
+        self.file = None
+        self.lock = threading.Lock()
+
+    def open(self):
+        if self.path == "-":
+            self.file = sys.stdout
+        else:
+            self.file = open(self.path, "a", encoding="utf-8")
+
+    def write(self, record):
+        line = json.dumps(record, separators=(",", ":"))
+        with self.lock:
+            self.file.write(line + "\n")
+            self.file.flush()
+
+    def close(self):
+        if self.file is not None and self.path != "-":
+            self.file.close()
+
+
+class HeadlessSection:
+    """Run one camera through the same ``SectionPipeline`` as ``Countdown``, without annotation or preview encoding."""
+
+    def __init__(self, name, camera_name, model_name, confidence_threshold, backend, counter, gallery, sink,
+                 write_detections=True, reid_enabled=False, reid_model=None, scheduler_options=None,
+                 event_log=None, inference_size=INFERENCE_SIZE, rois=None):
+        self.name = name
+        self.camera_name = camera_name
+        self.model_path = os.path.join(MODEL_DIR, model_name) if model_name else None
+        self.backend = backend or BACKEND_AUTO
+        self.counter = counter
+        self.gallery = gallery
+        self.sink = sink
+        self.write_detections = write_detections
+        self.section_id = new_section_id()
+        self.pipeline = SectionPipeline(
+            self.section_id, name, metrics_registry.section(name), self.on_result, confidence_threshold, counter.expiry,
+            reid_enabled=reid_enabled, reid_model=reid_model, scheduler_options=scheduler_options,
+            event_log=event_log, inference_size=inference_size, rois=rois,
+        )
+        self.scheduler = self.pipeline.scheduler
+        self.engine = None
+        self.camera_index = None
+
+    def start(self):
+        if not (self.model_path and os.path.exists(self.model_path)):
+            print(f"{self.name}: no model selected or model file missing.")
+            return False
+        camera_index = camera_registry.resolve(self.camera_name)
+        if camera_index is None:
+            print(f"{self.name}: camera {self.camera_name!r} not available.")
+            return False
+        # โหลดโมเดลก่อนเปิดกล้อง ถ้าโหลดไม่ได้จะได้ไม่มีกล้องค้างอยู่ และ section อื่นยังทำงานต่อได้
+        try:
+            self.engine = model_registry.acquire(self.model_path, self.backend)
+        except Exception as e:
+            print(f"{self.name}: cannot load model {os.path.basename(self.model_path)}: {e}")
+            return False
+        self.engine.attach(self.section_id)
+        cap = open_capture(camera_index, self.pipeline.frame_size, camera_registry.stream_options(self.camera_name))
+        if not cap.isOpened():
+            print(f"{self.name}: cannot open camera {self.camera_name!r}.")
+            cap.release()
+            model_registry.release(self.engine, self.section_id)
+            self.engine = None
+            return False
+        camera_registry.claim(camera_index)
+        self.camera_index = camera_index
+        self.pipeline.set_engine(self.engine)
+        self.pipeline.start(cap)
+        print(f"{self.name}: started on {self.camera_name!r} with {os.path.basename(self.model_path)} ({self.engine.backend.name})")
+        return True
+
+    def stop(self):
+        self.pipeline.stop(FRAME_WAIT_TIMEOUT * 2)
+        if self.camera_index is not None:
+            camera_registry.release(self.camera_index)
+            self.camera_index = None
+        if self.engine is not None:
+            self.pipeline.set_engine(None)
+            model_registry.release(self.engine, self.section_id)
+            self.engine = None
+
+    def on_result(self, result, summary, class_counts, person_ids, embeddings):
+        """Count the persons of one inferred frame and write its detections."""
+        new_ids = []
+        if person_ids:
+            new_ids = self.counter.observe_many(self.gallery.identify(self.name, person_ids, embeddings))
+        if self.write_detections and (class_counts or new_ids):
+            self.sink.write({
+                "type": "detections",
+                "time": time.time(),
+                "section": self.name,
+                "class_counts": class_counts,
+                "person_ids": person_ids,
+                "new_identities": new_ids,
+            })
+
+
+def load_settings(path=STATE_FILE):
+    """Load the UI's settings file, migrated and validated the same way as in the UI."""
+    if not os.path.exists(path):
+        raise SystemExit(f"Settings file not found: {path}")
+    return SettingsStore(path).load()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Count people on the configured cameras without the UI.")
+    parser.add_argument("--settings", default=STATE_FILE, help="settings file written by the UI")
+    parser.add_argument("--output", default="counts.jsonl", help="JSON lines file to append to, or - for stdout")
+    parser.add_argument("--count-interval", type=float, default=COUNT_INTERVAL, help="seconds between total count records")
+    parser.add_argument("--no-detections", action="store_true", help="write only the periodic count records")
+    parser.add_argument("--metrics-port", type=int, help="serve /metrics on this port (defaults to the settings value)")
+    args = parser.parse_args(argv)
+
+    settings = load_settings(args.settings)
+    camera_registry.set_streams(settings.get("streams", []))
+    model_registry.memory_budget_mb = settings.get("model_memory_budget_mb", MODEL_MEMORY_BUDGET_MB)
+    metrics_port = args.metrics_port if args.metrics_port is not None else settings.get("metrics_port")
+    if metrics_port:
+        metrics_registry.serve(METRICS_HOST, metrics_port)
+    reid_settings = settings.get("reid", {})
+    id_expiration_time = settings.get("id_expiration_time", ID_EXPIRATION_TIME)
+    counter = UniqueIdCounter(id_expiration_time)
+    gallery = PersonGallery(id_expiration_time, reid_settings.get("threshold", REID_MATCH_THRESHOLD))
+
+    event_log_settings = settings.get("event_log", {})
+    event_log = None
+    if event_log_settings.get("enabled"):
+        event_log = EventLog(**{k: v for k, v in event_log_settings.items() if k != "enabled"})
+    sink = JsonlSink(args.output)
+    sink.open()
+    cameras = settings.get("cameras", [])
+    models = settings.get("models", [])
+    thresholds = settings.get("thresholds", [])
+    backends = settings.get("backends", [])
+    inference_sizes = settings.get("inference_sizes", [])
+    rois = settings.get("rois", [])
+    sections = []
+    for i, camera_name in enumerate(cameras):
+        if not camera_name:
+            continue
+        section = HeadlessSection(
+            f"EleBull_VISION - Cam {i + 1}", camera_name,
+            models[i] if i < len(models) else None,
+            thresholds[i] if i < len(thresholds) else 0.5,
+            backends[i] if i < len(backends) else BACKEND_AUTO,
+            counter, gallery, sink,
+            write_detections=not args.no_detections,
+            reid_enabled=reid_settings.get("enabled", False),
+            reid_model=reid_settings.get("model"),
+            scheduler_options=settings.get("inference_scheduler", {}),
+            event_log=event_log,
+            inference_size=inference_sizes[i] if i < len(inference_sizes) else INFERENCE_SIZE,
+            rois=rois[i] if i < len(rois) else None,
+        )
+        if section.start():
+            sections.append(section)
+    if not sections:
+        sink.close()
+        raise SystemExit("No camera section could be started.")
+
+    stop_event = threading.Event()
+    signal.signal(signal.SIGINT, lambda *_: stop_event.set())
+    signal.signal(signal.SIGTERM, lambda *_: stop_event.set())
+    try:
+        while not stop_event.wait(args.count_interval):
+            sink.write({
+                "type": "count",
+                "time": time.time(),
+                "total": counter.total,
+                "active": counter.active_ids(),
+                "sections": {section.name: section.scheduler.summary() for section in sections},
+            })
+    finally:
+        for section in sections:
+            section.stop()
+        if event_log is not None:
+            event_log.stop()
+        sink.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import threading
+import time
+
+import flet as ft
+
+from count_history import count_history, NEW_PERSONS
+from ui_scheduler import ui_scheduler
+
+HISTORY_REFRESH_INTERVAL = 10.0  # วินาทีระหว่างการวาดกราฟใหม่
+# ช่วงเวลาที่เลือกได้ -> (ความละเอียด, จำนวน bucket, รูปแบบเวลาบนแกน x)
+HISTORY_RANGES = {
+    "Last hour": ("minute", 60, "%H:%M"),
+    "Last shift (8 h)": ("minute", 480, "%H:%M"),
+    "Last 24 hours": ("hour", 24, "%H:00"),
+    "Last 7 days": ("hour", 7 * 24, "%d/%m"),
+}
+LINE_COLORS = [ft.colors.AMBER, ft.colors.LIGHT_BLUE, ft.colors.LIGHT_GREEN, ft.colors.PINK_200, ft.colors.DEEP_ORANGE_200, ft.colors.PURPLE_200]
+
+
+class CountHistoryChart(ft.UserControl):
+    """Line chart of new persons and per-class peaks over time, summed over all sections."""
+
+    def __init__(self):
+        super().__init__()
+        self.range_name = next(iter(HISTORY_RANGES))
+        self.stop_event = threading.Event()
+        self.chart = ft.LineChart(
+            data_series=[],
+            min_y=0,
+            height=220,
+            expand=True,
+            tooltip_bgcolor=ft.colors.with_opacity(0.8, ft.colors.BLUE_GREY_900),
+            left_axis=ft.ChartAxis(labels_size=40),
+            bottom_axis=ft.ChartAxis(labels_size=30),
+            horizontal_grid_lines=ft.ChartGridLines(color=ft.colors.with_opacity(0.1, ft.colors.WHITE), width=1),
+        )
+        self.legend = ft.Row(wrap=True)
+
+    def refresh(self):
+        resolution, count, time_format = HISTORY_RANGES[self.range_name]
+        times, series = count_history.series(resolution, count)
+        totals = {}
+        for (_, name), values in series.items():
+            totals[name] = totals[name] + values if name in totals else values
+        names = sorted(totals, key=lambda name: (name != NEW_PERSONS, name))
+        data_series, legend = [], []
+        for i, name in enumerate(names):
+            color = LINE_COLORS[i % len(LINE_COLORS)]
+            label = "New persons" if name == NEW_PERSONS else f"Peak {name}"
+            data_series.append(ft.LineChartData(
+                data_points=[ft.LineChartDataPoint(x, float(y)) for x, y in enumerate(totals[name])],
+                color=color,
+                stroke_width=2,
+                curved=False,
+            ))
+            legend.append(ft.Row([ft.Container(width=12, height=12, bgcolor=color), ft.Text(label, size=12)], spacing=4))
+        step = max(1, count // 6)
+        self.chart.bottom_axis.labels = [
+            ft.ChartAxisLabel(value=x, label=ft.Text(time.strftime(time_format, time.localtime(times[x])), size=10))
+            for x in range(0, count, step)
+        ]
+        self.chart.min_x, self.chart.max_x = 0, count - 1
+        self.chart.max_y = max([float(values.max()) for values in totals.values()] + [1.0]) * 1.1
+        self.chart.data_series = data_series
+        self.legend.controls = legend
+        ui_scheduler.mark_dirty(self.chart, self.legend)
+
+    def on_range_change(self, e):
+        self.range_name = e.control.value
+        self.refresh()
+
+    def did_mount(self):
+        self.stop_event.clear()
+        threading.Thread(target=self._refresh_loop, daemon=True).start()
+
+    def will_unmount(self):
+        self.stop_event.set()
+
+    def _refresh_loop(self):
+        while not self.stop_event.is_set():
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Error refreshing count history: {e}")
+            self.stop_event.wait(HISTORY_REFRESH_INTERVAL)
+
+    def build(self):
+        range_selector = ft.Dropdown(
+            value=self.range_name,
+            options=[ft.dropdown.Option(name) for name in HISTORY_RANGES],
+            on_change=self.on_range_change,
+            width=200,
+        )
+        return ft.Container(
+            content=ft.Column([
+                ft.Row([ft.Text("Count History", size=18, weight="bold", color=ft.colors.WHITE), range_selector],
+                       alignment=ft.MainAxisAlignment.SPACE_BETWEEN),
+                self.chart,
+                self.legend,
+            ]),
+            width=1100,
+            padding=15,
+            bgcolor=ft.colors.BLUE_GREY_900,
+            border_radius=ft.border_radius.all(12),
+        )
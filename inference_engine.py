@@ -0,0 +1,198 @@
+import os
+import threading
+import itertools
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+from backends import create_backend, BACKEND_AUTO
+from metrics import metrics_registry
+
+# Constants
+TRACKER_CONFIG = "botsort.yaml"
+TRACKER_FRAME_RATE = 30
+MAX_BATCH_SIZE = 8
+WARMUP_IMGSZ = 320
+BATCH_WAIT = 0.01  # วินาทีที่รอให้ section อื่นส่งเฟรมเข้ามาร่วม batch เดียวกัน
+
+_section_ids = itertools.count()
+
+
+def new_section_id():
+    """Return a process-wide unique id for a camera section."""
+    return next(_section_ids)
+
+
+def _load_tracker_config(path):
+    from ultralytics.utils import IterableSimpleNamespace
+    from ultralytics.utils.checks import check_yaml
+    try:
+        from ultralytics.utils import YAML
+        cfg = YAML.load(check_yaml(path))
+    except ImportError:
+        from ultralytics.utils import yaml_load
+        cfg = yaml_load(check_yaml(path))
+    return IterableSimpleNamespace(**cfg)
+
+
+def _create_tracker():
+    """Create a BoT-SORT tracker, the same one model.track(tracker="botsort.yaml") uses."""
+    from ultralytics.trackers.bot_sort import BOTSORT
+    cfg = _load_tracker_config(TRACKER_CONFIG)
+    try:
+        return BOTSORT(args=cfg, frame_rate=TRACKER_FRAME_RATE)
+    except TypeError:  # ultralytics รุ่นใหม่รับเฉพาะ args
+        return BOTSORT(args=cfg)
+
+
+class InferenceEngine:
+    """Run one detection model for every section that uses it.
+
+    Each section calls ``infer`` from its own processing thread. The engine
+    thread collects the latest frame from every attached section, runs them
+    through the model as one batch and hands each section back its own
+    result, tracked with the section's own tracker.
+    """
+
+    def __init__(self, model_path, backend=BACKEND_AUTO):
+        self.model_path = model_path
+        self.backend = create_backend(model_path, backend)
+        self.key = (model_path, backend)
+        self.metrics = metrics_registry.section(f"engine:{os.path.basename(model_path)}:{self.backend.name}")
+        self.sections = set()
+        self.trackers = {}
+        self.pending = {}  # section_id -> (frame, conf, imgsz, rois, future)
+        self.condition = threading.Condition()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        print(f"Inference engine started for {model_path} ({self.backend.name})")
+
+    def warmup(self, imgsz=WARMUP_IMGSZ):
+        """Run one blank frame through the model so the first real frame isn't slowed by lazy setup."""
+        started = time.time()
+        self.backend.detect([np.zeros((imgsz, imgsz, 3), dtype=np.uint8)], imgsz, 0.5)
+        print(f"Warm-up for {self.model_path} took {time.time() - started:.2f}s")
+
+    def attach(self, section_id):
+        """Register a section so the engine waits for its frame when batching."""
+        with self.condition:
+            self.sections.add(section_id)
+
+    def detach(self, section_id):
+        """Unregister a section and drop its tracker state."""
+        with self.condition:
+            self.sections.discard(section_id)
+            self.trackers.pop(section_id, None)
+            self.condition.notify()
+
+    def reset_tracker(self, section_id):
+        """Start a fresh tracker for the section on its next frame."""
+        with self.condition:
+            self.trackers.pop(section_id, None)
+
+    def skip(self, section_id):
+        """Advance the section's tracker over a frame that was not inferred.
+
+        Kalman predictions move on by one frame, as ``tracker.update`` would
+        have done, so tracks still match moving objects when inference resumes.
+        """
+        with self.condition:
+            tracker = self.trackers.get(section_id)
+        if tracker is None:
+            return
+        tracker.frame_id += 1
+        tracker.multi_predict([track for track in tracker.tracked_stracks if track.is_activated] + tracker.lost_stracks)
+
+    def infer(self, section_id, frame, conf, imgsz, rois=None):
+        """Submit a frame and block until its tracked result is ready.
+
+        With a ``RoiCropper`` only its crops of the frame are detected; the
+        merged boxes are tracked in full-frame coordinates.
+        """
+        future = Future()
+        with self.condition:
+            if not self.running:
+                raise RuntimeError(f"Inference engine for {self.model_path} is stopped")
+            self.pending[section_id] = (frame, conf, imgsz, rois, future)
+            self.condition.notify()
+        return future.result()
+
+    def stop(self):
+        with self.condition:
+            self.running = False
+            for *_, future in self.pending.values():
+                future.set_exception(RuntimeError("Inference engine stopped"))
+            self.pending.clear()
+            self.condition.notify()
+
+    def _collect_batch(self):
+        """Wait for frames, giving the other attached sections a moment to join the batch."""
+        with self.condition:
+            while self.running and not self.pending:
+                self.condition.wait()
+            if not self.running:
+                return {}
+            self.condition.wait_for(
+                lambda: not self.running or len(self.pending) >= min(len(self.sections), MAX_BATCH_SIZE),
+                timeout=BATCH_WAIT,
+            )
+            batch = dict(itertools.islice(self.pending.items(), MAX_BATCH_SIZE))
+            for section_id in batch:
+                del self.pending[section_id]
+            return batch
+
+    def _run(self):
+        while self.running:
+            batch = self._collect_batch()
+            # เฟรมที่ใช้ imgsz เดียวกันเท่านั้นที่รวมเป็น batch เดียวกันได้
+            groups = {}
+            for section_id, request in batch.items():
+                groups.setdefault(request[2], []).append((section_id, request))
+            for imgsz, requests in groups.items():
+                self._run_group(imgsz, requests)
+        print(f"Inference engine stopped for {self.model_path}")
+
+    def _run_group(self, imgsz, requests):
+        # section ที่กำหนด ROI ส่งเฉพาะภาพที่ crop ไว้เข้า batch แทนทั้งเฟรม
+        frames, spans = [], []
+        for _, (frame, _, _, rois, _) in requests:
+            crops = rois.crops(frame) if rois is not None else [frame]
+            spans.append((len(frames), len(crops)))
+            frames.extend(crops)
+        try:
+            started = time.perf_counter()
+            results = self.backend.detect(frames, imgsz, min(conf for _, (_, conf, _, _, _) in requests))
+            self.metrics.observe("detect", time.perf_counter() - started)
+        except Exception as e:
+            for _, (*_, future) in requests:
+                future.set_exception(e)
+            return
+
+        for (section_id, (frame, conf, _, rois, future)), (start, count) in zip(requests, spans):
+            try:
+                result = rois.merge(frame, results[start:start + count]) if rois is not None else results[start]
+                result = result[result.boxes.conf >= conf]
+                future.set_result(self.track(section_id, result))
+            except Exception as e:
+                future.set_exception(e)
+
+    def track(self, section_id, result):
+        """Update the section's tracker with this frame's detections (mirrors ultralytics' track callback)."""
+        with self.condition:
+            tracker = self.trackers.get(section_id)
+            if tracker is None:
+                tracker = self.trackers[section_id] = _create_tracker()
+
+        # เรียก update ทุกเฟรมแม้ไม่มี detection เพื่อให้ track ที่หายไปถูกย้ายเป็น lost และหมดอายุตาม track_buffer
+        det = result.boxes.cpu().numpy()
+        started = time.perf_counter()
+        tracks = tracker.update(det, result.orig_img)
+        self.metrics.observe("track", time.perf_counter() - started)
+        if len(tracks) == 0:
+            return result[:0]  # box ที่ยังไม่ได้ยืนยันเป็น track ไม่มี ID จึงไม่ส่งต่อ
+        idx = tracks[:, -1].astype(int)
+        result = result[idx]
+        result.update(boxes=tracks[:, :-1])
+        return result
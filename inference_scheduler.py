@@ -0,0 +1,142 @@
+import threading
+import time
+
+import cv2
+
+# Constants
+MOTION_SIZE = (64, 64)  # ขนาดภาพขาวดำที่ใช้เทียบความเปลี่ยนแปลง
+MOTION_PIXEL_THRESHOLD = 15  # ค่าความต่างของ pixel (0-255) ที่ถือว่าเปลี่ยน
+MOTION_THRESHOLD = 0.005  # สัดส่วน pixel ที่เปลี่ยนขั้นต่ำที่ถือว่าฉากมีการเคลื่อนไหว
+STATIC_INTERVAL = 2.0  # วินาทีสูงสุดที่ข้าม inference ได้เมื่อฉากนิ่ง (ต้องน้อยกว่า id_expiration_time)
+MAX_INFERENCE_INTERVAL = 1.0  # ช่วงห่างสูงสุดระหว่าง inference เมื่อ CPU ทำงานหนัก
+CPU_HIGH = 85.0  # % CPU ที่เริ่มลดอัตรา inference
+CPU_LOW = 60.0  # % CPU ที่เริ่มเพิ่มอัตรา inference กลับ
+ADAPT_PERIOD = 1.0  # วินาทีระหว่างการปรับอัตรา inference
+
+_cpu_lock = threading.Lock()
+_cpu_sample = (0.0, None)  # (monotonic time, % CPU)
+
+
+def cpu_load():
+    """Return system CPU utilisation in percent, sampled at most once per ``ADAPT_PERIOD``, or ``None`` without psutil."""
+    global _cpu_sample
+    with _cpu_lock:
+        sampled_at, load = _cpu_sample
+        now = time.monotonic()
+        if now - sampled_at >= ADAPT_PERIOD:
+            try:
+                import psutil
+            except ImportError:
+                return None
+            load = psutil.cpu_percent(interval=None)
+            _cpu_sample = (now, load)
+        return load
+
+
+class MotionGate:
+    """Detect scene changes by differencing a downscaled gray frame against a reference."""
+
+    def __init__(self, threshold=MOTION_THRESHOLD):
+        self.threshold = threshold
+        self.reference = None
+        self.current = None
+
+    def changed(self, frame):
+        """Return True if ``frame`` differs from the reference by more than ``threshold``."""
+        small = cv2.resize(frame, MOTION_SIZE, interpolation=cv2.INTER_AREA)
+        self.current = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY) if small.ndim == 3 else small
+        if self.reference is None:
+            return True
+        diff = cv2.absdiff(self.current, self.reference)
+        changed_pixels = cv2.countNonZero(cv2.threshold(diff, MOTION_PIXEL_THRESHOLD, 255, cv2.THRESH_BINARY)[1])
+        return changed_pixels > self.threshold * diff.size
+
+    def accept(self):
+        """Use the last checked frame as the new reference."""
+        self.reference = self.current
+
+
+class InferenceScheduler:
+    """Decide per frame whether a section runs detection and tracking.
+
+    Frames are skipped while the scene is static (compared with the last
+    inferred frame), but at least every ``static_interval`` seconds so tracks
+    and the unique-person window stay alive. Under CPU pressure the minimum
+    interval between inferences grows, and shrinks again once the load
+    drops. Skipped frames are not detected; callers pass them to
+    ``InferenceEngine.skip`` so the tracker's motion prediction keeps pace
+    and track IDs carry over when inference resumes.
+
+    ``static_interval`` is kept below ``id_expiration_time`` so a person
+    standing still is seen again before their ID expires.
+    """
+
+    def __init__(self, metrics=None, motion_gate=True, motion_threshold=MOTION_THRESHOLD,
+                 static_interval=STATIC_INTERVAL, adaptive=True, max_interval=MAX_INFERENCE_INTERVAL,
+                 id_expiration_time=None):
+        self.metrics = metrics
+        self.gate = MotionGate(motion_threshold) if motion_gate else None
+        if id_expiration_time is not None and static_interval >= id_expiration_time:
+            print(f"static_interval {static_interval}s is not below id_expiration_time {id_expiration_time}s, using {id_expiration_time / 2}s")
+            static_interval = id_expiration_time / 2
+        self.static_interval = static_interval
+        self.adaptive = adaptive
+        self.max_interval = max_interval
+        self.interval = 0.0
+        self.last_inference = None
+        self.last_adapt = 0.0
+        self.inference_time = 0.0  # ค่าเฉลี่ยแบบ EMA ของเวลา inference ต่อเฟรม
+        self.frames_seen = 0
+        self.frames_inferred = 0
+        self.skipped_static = 0
+        self.skipped_rate = 0
+
+    def should_infer(self, frame, now=None):
+        now = time.monotonic() if now is None else now
+        self.frames_seen += 1
+        if self.adaptive and now - self.last_adapt >= ADAPT_PERIOD:
+            self._adapt(now)
+        since_last = None if self.last_inference is None else now - self.last_inference
+        if since_last is not None and since_last < self.interval:
+            self._skip("frames_skipped_rate")
+            self.skipped_rate += 1
+            return False
+        if self.gate is not None and not self.gate.changed(frame) and since_last is not None and since_last < self.static_interval:
+            self._skip("frames_skipped_static")
+            self.skipped_static += 1
+            return False
+        if self.gate is not None:
+            self.gate.accept()
+        self.last_inference = now
+        self.frames_inferred += 1
+        if self.metrics is not None:
+            self.metrics.count("frames_inferred")
+        return True
+
+    def observe_inference(self, seconds):
+        """Record how long an inference took, used to estimate the compute saved by skipping."""
+        self.inference_time = seconds if not self.inference_time else 0.9 * self.inference_time + 0.1 * seconds
+
+    def saved_fraction(self):
+        return 1.0 - self.frames_inferred / self.frames_seen if self.frames_seen else 0.0
+
+    def summary(self):
+        return (
+            f"Inference: {self.frames_inferred}/{self.frames_seen} frames, saved {self.saved_fraction():.0%} "
+            f"(static {self.skipped_static}, rate limited {self.skipped_rate}, interval {self.interval * 1000:.0f} ms)"
+        )
+
+    def _skip(self, counter):
+        if self.metrics is not None:
+            self.metrics.count(counter)
+            self.metrics.count("inference_seconds_saved", self.inference_time)
+
+    def _adapt(self, now):
+        self.last_adapt = now
+        load = cpu_load()
+        if load is None:
+            return
+        if load > CPU_HIGH:
+            self.interval = min(self.max_interval, max(self.interval * 1.5, 0.05))
+        elif load < CPU_LOW and self.interval:
+            self.interval = self.interval * 0.7 if self.interval > 0.02 else 0.0
@@ -0,0 +1,115 @@
+import threading
+
+import flet as ft
+
+from stream_source import StreamCapture, is_stream_source, DECODERS, DECODE_AUTO
+from ui_scheduler import ui_scheduler
+
+STREAM_TEST_TIMEOUT = 10.0  # วินาทีที่รอภาพแรกตอนทดสอบ stream
+
+
+class IpCameraScreen(ft.UserControl):
+    """Add, test and remove RTSP/HTTP/file streams; they appear in every camera dropdown."""
+
+    def __init__(self, streams, on_streams_changed):
+        super().__init__()
+        self.streams = streams  # รายการเดียวกับที่บันทึกใน settings.json
+        self.on_streams_changed = on_streams_changed
+        self.stream_list = ft.Column()
+        self.name_field = ft.TextField(label="Name", width=220)
+        self.url_field = ft.TextField(label="URL (rtsp://, http://, or a video file)", width=420)
+        self.max_fps_field = ft.TextField(label="Max FPS (blank = all)", width=160, keyboard_type=ft.KeyboardType.NUMBER)
+        self.decode_selector = ft.Dropdown(
+            label="Decoder",
+            options=[ft.dropdown.Option(name, text=name) for name in DECODERS],
+            value=DECODE_AUTO,
+            width=160,
+        )
+        self.status_text = ft.Text("", color=ft.colors.WHITE70)
+
+    def current_stream(self):
+        name = (self.name_field.value or "").strip()
+        url = (self.url_field.value or "").strip()
+        if not name or not is_stream_source(url):
+            self.status_text.value = "Enter a name and an rtsp://, http:// URL or an existing video file."
+            return None
+        stream = {"name": name, "url": url, "decode": self.decode_selector.value or DECODE_AUTO}
+        if (self.max_fps_field.value or "").strip():
+            try:
+                stream["max_fps"] = float(self.max_fps_field.value)
+            except ValueError:
+                self.status_text.value = "Max FPS must be a number."
+                return None
+        return stream
+
+    def on_add(self, e):
+        stream = self.current_stream()
+        if stream is not None:
+            self.streams[:] = [s for s in self.streams if s["name"] != stream["name"]] + [stream]
+            self.on_streams_changed(self.streams)
+            self.status_text.value = f"Saved {stream['name']}."
+            self.name_field.value = self.url_field.value = self.max_fps_field.value = ""
+            self.refresh_list()
+        self.update()
+
+    def on_remove(self, name):
+        self.streams[:] = [s for s in self.streams if s["name"] != name]
+        self.on_streams_changed(self.streams)
+        self.refresh_list()
+        self.update()
+
+    def on_test(self, e):
+        stream = self.current_stream()
+        if stream is not None:
+            self.status_text.value = f"Connecting to {stream['url']}..."
+            threading.Thread(target=self._test_stream, args=(stream,), daemon=True).start()
+        self.update()
+
+    def _test_stream(self, stream):
+        capture = StreamCapture(stream["url"], decode=stream["decode"], name=stream["name"])
+        result = {}
+
+        def read_one():
+            result["frame"] = capture.read()[1]
+
+        reader = threading.Thread(target=read_one, daemon=True)
+        reader.start()
+        reader.join(STREAM_TEST_TIMEOUT)
+        capture.release()
+        frame = result.get("frame")
+        if frame is not None:
+            self.status_text.value = f"OK: {frame.shape[1]}x{frame.shape[0]} via {capture.decoder}"
+        else:
+            self.status_text.value = f"No frame from {stream['url']} within {STREAM_TEST_TIMEOUT:.0f} s."
+        ui_scheduler.mark_dirty(self.status_text)
+
+    def refresh_list(self):
+        self.stream_list.controls = [
+            ft.Row([
+                ft.Icon(ft.icons.VIDEO_CAMERA_FRONT),
+                ft.Text(stream["name"], weight="bold", width=180),
+                ft.Text(stream["url"], width=420, no_wrap=True),
+                ft.Text(f"{stream.get('max_fps') or 'all'} fps, {stream.get('decode', DECODE_AUTO)}", width=140),
+                ft.IconButton(icon=ft.icons.DELETE, tooltip="Remove", on_click=lambda e, name=stream["name"]: self.on_remove(name)),
+            ])
+            for stream in self.streams
+        ] or [ft.Text("No network cameras configured.", color=ft.colors.WHITE70)]
+
+    def build(self):
+        self.refresh_list()
+        return ft.Column([
+            ft.Container(
+                content=ft.Text("IP Cameras", size=24, weight="bold", color=ft.colors.WHITE),
+                margin=ft.margin.only(bottom=20)
+            ),
+            self.stream_list,
+            ft.Divider(),
+            ft.Row([self.name_field, self.url_field], wrap=True),
+            ft.Row([
+                self.max_fps_field,
+                self.decode_selector,
+                ft.ElevatedButton(text="Test", icon=ft.icons.PLAY_ARROW, on_click=self.on_test),
+                ft.ElevatedButton(text="Save", icon=ft.icons.SAVE, on_click=self.on_add),
+            ], wrap=True),
+            self.status_text,
+        ], alignment=ft.MainAxisAlignment.START)
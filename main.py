@@ -1,19 +1,34 @@
+from startup import log_startup, STARTUP_TIMEOUT  # import ก่อนโมดูลอื่นเพื่อจับเวลาตั้งแต่เริ่มเปิดโปรแกรม
 import flet as ft
-from vision_app import Countdown
+from vision_app import Countdown, PREVIEW_CODEC, PREVIEW_QUALITY, PREVIEW_MAX_FPS
+from camera_worker import WORKER_MODE_THREAD
+from metrics import metrics_registry, METRICS_HOST, METRICS_PORT
+from diagnostics import DiagnosticsScreen
 from setting import SettingsScreen
-import json
+from ui_scheduler import ui_scheduler, UI_UPDATE_INTERVAL
+from backends import BACKEND_AUTO
+from model_registry import model_registry, MODEL_MEMORY_BUDGET_MB
+from person_counter import UniqueIdCounter, ID_EXPIRATION_TIME
+from reid import PersonGallery, REID_MATCH_THRESHOLD
+from event_log import EventLog
+from clip_recorder import ClipWriter, CLIP_DIR, CLIP_RETENTION_MB, RECORDER_OPTIONS
+from count_history import count_history, COUNT_HISTORY_FILE
+from history_chart import CountHistoryChart
+from ip_camera import IpCameraScreen
+from camera_registry import camera_registry
+from roi import INFERENCE_SIZE
+from settings_store import settings_store
 import os
-import time
 import asyncio
+import functools
 
 # Paths to icon files (ใช้ os.path.join เพื่อให้เข้ากันได้กับทุกระบบปฏิบัติการ)
 icon_bull = os.path.join("icon", "bull.png")
 icon_auto = os.path.join("icon", "automation.png")
 icon_elephant = os.path.join("icon", "elephant.png")
 
-STATE_FILE = "settings.json"
-
-# Function to convert image to base64
+# Function to convert image to base64 (อ่านไฟล์ครั้งแรกที่ใช้ แล้ว cache ไว้)
+@functools.lru_cache(maxsize=None)
 def get_base64_icon(path):
     import base64
     if not os.path.exists(path):
@@ -26,102 +41,116 @@ def get_base64_icon(path):
         base64_str = base64.b64encode(image_file.read()).decode("utf-8")
     return f"data:image/png;base64,{base64_str}"
 
-icon_bull_base64 = get_base64_icon(icon_bull)
-icon_auto_base64 = get_base64_icon(icon_auto)
-icon_elephant_base64 = get_base64_icon(icon_elephant)
-
-# Load settings from file
-def load_settings():
-    if os.path.exists(STATE_FILE):
-        with open(STATE_FILE, "r") as f:
-            settings = json.load(f)
-            # Set default thresholds if not in settings
-            if "thresholds" not in settings:
-                settings["thresholds"] = [0.5, 0.5, 0.5]
-            return settings
-    return {"cameras": [None, None, None], "models": [None, None, None], "thresholds": [0.5, 0.5, 0.5], "automatic_start": False}
-
-# Save settings to file
-def save_settings(settings):
-    with open(STATE_FILE, "w") as f:
-        json.dump(settings, f)
-
-# Load saved settings on startup
-settings = load_settings()
-section_default_cameras = settings["cameras"]
-section_default_models = settings["models"]
-section_default_thresholds = settings["thresholds"]
-automatic_start_enabled = settings.get("automatic_start", False)  # Load automatic start state
-
-# Global variables for tracking unique persons
-total_person_count = 0
-unique_person_ids = set()
-recently_detected_ids = {}
-ID_EXPIRATION_TIME = 5
-
-def update_total_person_count(track_id):
-    global total_person_count, unique_person_ids, recently_detected_ids
-
-    current_time = time.time()
-    print(f"Received track_id: {track_id}")
-
-    if track_id is not None:
-        if track_id not in unique_person_ids:
-            unique_person_ids.add(track_id)
-            total_person_count += 1
-            print(f"New person detected with ID {track_id}. Updated count: {total_person_count}")
-            total_person_count_label.value = f"Total Unique Person Count: {total_person_count}"
-            total_person_count_label.update()
-
-        recently_detected_ids[track_id] = current_time
-
-    expired_ids = [tid for tid, last_seen in recently_detected_ids.items() if current_time - last_seen > ID_EXPIRATION_TIME]
-    for tid in expired_ids:
-        recently_detected_ids.pop(tid, None)
-        unique_person_ids.discard(tid)
+# worker process แบบ spawn import main.py ใหม่ในชื่อ __mp_main__ จึงโหลด settings และสร้าง state เฉพาะตอนรันเป็นโปรแกรมหลัก
+if __name__ == "__main__":
+    # Load saved settings on startup (ตรวจสอบและแปลง schema เก่าแล้ว รายการต่อ section มีครบ section_count)
+    settings = settings_store.load()
+    section_count = settings["section_count"]
+    sections_per_page = settings["sections_per_page"]
+    # รายการเหล่านี้เป็น list เดียวกับใน settings_store จึงเห็นค่าที่เปลี่ยนจากหน้า Settings ทันที
+    section_default_cameras = settings["cameras"]
+    section_default_models = settings["models"]
+    section_default_thresholds = settings["thresholds"]
+    section_default_backends = settings["backends"]
+    section_default_inference_sizes = settings["inference_sizes"]
+    section_default_rois = settings["rois"]  # polygon ROI ของแต่ละ section พิกัด 0-1
+    automatic_start_enabled = settings.get("automatic_start", False)  # Load automatic start state
+    preview_settings = settings.get("preview", {})  # codec, quality และ max_fps ของภาพ preview
+    ui_scheduler.interval = settings.get("ui_update_interval", UI_UPDATE_INTERVAL)
+    model_registry.memory_budget_mb = settings.get("model_memory_budget_mb", MODEL_MEMORY_BUDGET_MB)
+    worker_mode = settings.get("worker_mode", WORKER_MODE_THREAD)  # "process" รันแต่ละกล้องใน process แยก
+    metrics_port = settings.get("metrics_port", METRICS_PORT)  # null เพื่อปิด endpoint /metrics
+    id_expiration_time = settings.get("id_expiration_time", ID_EXPIRATION_TIME)
+    scheduler_settings = settings.get("inference_scheduler", {})  # motion gate และการลดอัตรา inference เมื่อ CPU สูง
+    reid_settings = settings.get("reid", {})  # enabled, model (ไฟล์ ONNX ถ้าไม่ใช้ histogram สี) และ threshold
+    event_log_settings = settings.get("event_log", {})  # enabled, directory, flush_interval และ rotate_mb
+    stream_settings = settings.setdefault("streams", [])  # กล้อง RTSP/HTTP: name, url, max_fps และ decode
+    camera_registry.set_streams(stream_settings)
+    count_history_file = settings.get("count_history_file", COUNT_HISTORY_FILE)
+    count_history.load(count_history_file)
+    event_log = EventLog(**{k: v for k, v in event_log_settings.items() if k != "enabled"}) if event_log_settings.get("enabled") else None
+    clip_settings = settings.get("clips", {})  # enabled, directory, retention_mb, pre_roll, post_roll, fps, quality และ classes
+    clip_writer = ClipWriter(clip_settings.get("directory", CLIP_DIR), clip_settings.get("retention_mb", CLIP_RETENTION_MB)) if clip_settings.get("enabled") else None
+
+    # Unique person count shared by every section; IDs unseen for id_expiration_time seconds are counted again
+    person_counter = UniqueIdCounter(id_expiration_time)
+    # Track IDs are per section, so they are mapped to global identities (matched across cameras when re-ID is enabled)
+    person_gallery = PersonGallery(id_expiration_time, reid_settings.get("threshold", REID_MATCH_THRESHOLD))
+
+def update_total_person_count(section, track_ids, embeddings=None):
+    new_ids = person_counter.observe_many(person_gallery.identify(section, track_ids, embeddings))
+    if new_ids:
+        count_history.record_new_persons(section, len(new_ids))
+        print(f"New person detected in {section} (identity {', '.join(map(str, new_ids))}). Updated count: {person_counter.total}")
+        total_person_count_label.value = f"Total Unique Person Count: {person_counter.total}"
+        ui_scheduler.mark_dirty(total_person_count_label)
 
 def reset_total_person_count(e):
-    global total_person_count, unique_person_ids
-    total_person_count = 0
-    unique_person_ids.clear()
+    person_counter.reset()
     total_person_count_label.value = "Total Unique Person Count: 0"
     total_person_count_label.update()
 
-# Callbacks to set default camera, model, and threshold for each section and save the settings
+# Callbacks to set default camera, model, and threshold for each section; settings_store saves them in the background
 def set_section_camera(section_index, camera_name):
-    section_default_cameras[section_index] = camera_name
-    save_settings({"cameras": section_default_cameras, "models": section_default_models, "thresholds": section_default_thresholds, "automatic_start": automatic_start_enabled})
+    settings_store.set_section("cameras", section_index, camera_name)
 
 def set_section_model(section_index, model_name):
-    section_default_models[section_index] = model_name
-    save_settings({"cameras": section_default_cameras, "models": section_default_models, "thresholds": section_default_thresholds, "automatic_start": automatic_start_enabled})
+    settings_store.set_section("models", section_index, model_name)
+
+def set_section_backend(section_index, backend):
+    settings_store.set_section("backends", section_index, backend)
+
+def set_section_inference_size(section_index, inference_size):
+    settings_store.set_section("inference_sizes", section_index, inference_size)
+
+def set_section_rois(section_index, rois):
+    settings_store.set_section("rois", section_index, rois)
+
+def set_streams(streams):
+    camera_registry.set_streams(streams)
+    settings_store.set("streams", streams)
 
 def set_section_threshold(section_index, threshold):
-    section_default_thresholds[section_index] = threshold
-    save_settings({"cameras": section_default_cameras, "models": section_default_models, "thresholds": section_default_thresholds, "automatic_start": automatic_start_enabled})
+    settings_store.set_section("thresholds", section_index, threshold)
 
 # Initialize Countdown sections list for managing the video feed start/stop
 countdown_sections = []
 
-def create_countdown_section(title, default_camera=None, default_model=None, default_threshold=0.5):
+def create_countdown_section(title, default_camera=None, default_model=None, default_threshold=0.5, default_backend=BACKEND_AUTO, default_inference_size=INFERENCE_SIZE, default_rois=None):
     try:
         countdown_component = Countdown(
             update_person_count_callback=update_total_person_count,
             reset_person_count_callback=reset_total_person_count,
             default_camera=default_camera,
             default_model=default_model,
-            confidence_threshold=default_threshold  # Pass threshold to Countdown
+            confidence_threshold=default_threshold,  # Pass threshold to Countdown
+            backend=default_backend,
+            preview_codec=preview_settings.get("codec", PREVIEW_CODEC),
+            preview_quality=preview_settings.get("quality", PREVIEW_QUALITY),
+            preview_max_fps=preview_settings.get("max_fps", PREVIEW_MAX_FPS),
+            worker_mode=worker_mode,
+            name=title,
+            id_expiration_time=id_expiration_time,
+            reid_enabled=reid_settings.get("enabled", False),
+            reid_model=reid_settings.get("model"),
+            scheduler_options=scheduler_settings,
+            event_log=event_log,
+            clip_writer=clip_writer,
+            clip_options={k: v for k, v in clip_settings.items() if k in RECORDER_OPTIONS},
+            inference_size=default_inference_size,
+            rois=default_rois
         )
         countdown_component.automatic_start = automatic_start_enabled  # Set initial automatic start state
         countdown_sections.append(countdown_component)  # Add to list for control
 
         return ft.Container(
+            data=countdown_component,  # ใช้ตอนเปลี่ยนหน้าเพื่อแจ้งว่า section อยู่บนหน้าจอหรือไม่
             width=350,
             height=650,
             margin=ft.margin.all(10),
             content=ft.Column([
                 ft.Row([
-                    ft.Image(src=icon_bull_base64, width=36, height=36, fit=ft.ImageFit.CONTAIN,filter_quality=ft.FilterQuality.HIGH),
+                    ft.Image(src=get_base64_icon(icon_bull), width=36, height=36, fit=ft.ImageFit.CONTAIN,filter_quality=ft.FilterQuality.HIGH),
                     ft.Text(title, size=20, weight="bold", color=ft.colors.WHITE),
                 ], alignment=ft.MainAxisAlignment.START),
                 countdown_component,
@@ -135,23 +164,43 @@ def create_countdown_section(title, default_camera=None, default_model=None, def
         print(f"Error creating countdown section for {title}: {e}")
         return ft.Text("Error loading countdown")
 
-async def start_with_delay(page, loading_indicator):
+async def start_sections(page, loading_indicator):
+    """Bring the sections up after the shell is shown.
+
+    Camera enumeration and every section's model load run in parallel in
+    background threads; each section starts its feed (with automatic start)
+    as soon as its own model is ready, and the time of each step is logged.
+    """
     loading_indicator.visible = True
     page.update()
-    await asyncio.sleep(5)
 
-    # Start camera feeds if automatic start is enabled
+    async def find_cameras():
+        devices = await asyncio.to_thread(camera_registry.devices)
+        log_startup(f"{len(devices)} cameras found")
+
+    async def start_section(countdown):
+        if not await asyncio.to_thread(countdown.wait_until_ready, STARTUP_TIMEOUT):
+            log_startup(f"{countdown.name} has no model loaded")
+            return
+        log_startup(f"{countdown.name} model ready")
+        if automatic_start_enabled:
+            await asyncio.to_thread(countdown.start_video_feed, None)
+            if await asyncio.to_thread(countdown.first_frame.wait, STARTUP_TIMEOUT):
+                log_startup(f"{countdown.name} live")
+
+    await asyncio.gather(find_cameras(), *(start_section(countdown) for countdown in countdown_sections))
     if automatic_start_enabled:
-        for countdown in countdown_sections:
-            countdown.start_video_feed(None)
         print("Automatic Start enabled - Camera feed started for all sections")
-    
+    log_startup("all sections ready")
+
     loading_indicator.visible = False
     page.update()
 
 async def app(page: ft.Page):
+    log_startup("window opened")
     page.padding = 50
     page.theme_mode = ft.ThemeMode.DARK
+    page.scroll = ft.ScrollMode.AUTO
 
     # กำหนดตัวแปร global total_person_count_label เพื่อให้ฟังก์ชันอื่นสามารถเข้าถึงได้
     global total_person_count_label
@@ -160,21 +209,12 @@ async def app(page: ft.Page):
     loading_indicator = ft.ProgressRing(visible=False)
 
     # Callbacks list for each section camera, model, and threshold setting
-    set_section_camera_callbacks = [
-        lambda camera: set_section_camera(0, camera),
-        lambda camera: set_section_camera(1, camera),
-        lambda camera: set_section_camera(2, camera)
-    ]
-    set_section_model_callbacks = [
-        lambda model: set_section_model(0, model),
-        lambda model: set_section_model(1, model),
-        lambda model: set_section_model(2, model)
-    ]
-    set_section_threshold_callbacks = [
-        lambda threshold: set_section_threshold(0, threshold),
-        lambda threshold: set_section_threshold(1, threshold),
-        lambda threshold: set_section_threshold(2, threshold)
-    ]
+    set_section_camera_callbacks = [lambda camera, i=i: set_section_camera(i, camera) for i in range(section_count)]
+    set_section_model_callbacks = [lambda model, i=i: set_section_model(i, model) for i in range(section_count)]
+    set_section_backend_callbacks = [lambda backend, i=i: set_section_backend(i, backend) for i in range(section_count)]
+    set_section_inference_size_callbacks = [lambda inference_size, i=i: set_section_inference_size(i, inference_size) for i in range(section_count)]
+    set_section_roi_callbacks = [lambda rois, i=i: set_section_rois(i, rois) for i in range(section_count)]
+    set_section_threshold_callbacks = [lambda threshold, i=i: set_section_threshold(i, threshold) for i in range(section_count)]
 
     settings_screen = SettingsScreen(
         set_section_camera_callbacks=set_section_camera_callbacks,
@@ -182,38 +222,102 @@ async def app(page: ft.Page):
         set_section_threshold_callbacks=set_section_threshold_callbacks,
         default_cameras=section_default_cameras,
         default_models=section_default_models,
-        default_thresholds=section_default_thresholds
+        default_thresholds=section_default_thresholds,
+        set_section_backend_callbacks=set_section_backend_callbacks,
+        default_backends=section_default_backends,
+        set_section_inference_size_callbacks=set_section_inference_size_callbacks,
+        default_inference_sizes=section_default_inference_sizes,
+        set_section_roi_callbacks=set_section_roi_callbacks,
+        default_rois=section_default_rois
     )
 
-    def show_home(e):
-        section1 = create_countdown_section("EleBull_VISION - Cam 1", default_camera=section_default_cameras[0], default_model=section_default_models[0], default_threshold=section_default_thresholds[0])
-        section2 = create_countdown_section("EleBull_VISION - Cam 2", default_camera=section_default_cameras[1], default_model=section_default_models[1], default_threshold=section_default_thresholds[1])
-        section3 = create_countdown_section("EleBull_VISION - Cam 3", default_camera=section_default_cameras[2], default_model=section_default_models[2], default_threshold=section_default_thresholds[2])
+    metrics_url = None
+    if metrics_port:
+        metrics_registry.serve(METRICS_HOST, metrics_port)
+        metrics_url = f"http://{METRICS_HOST}:{metrics_port}/metrics"
+    diagnostics_screen = DiagnosticsScreen(metrics_url=metrics_url)
+    ip_camera_screen = IpCameraScreen(stream_settings, set_streams)
 
-        page.controls.clear()
-        main_row.controls = [section1, section2, section3]
-        page.controls.append(main_layout)
-        page.update()
+    def show_screen(screen):
+        # หน้า Home ถูกซ่อนแทนการถอดออก section จึงทำงานต่อและรับค่าที่เปลี่ยนจากหน้า Settings ได้ทันที
+        main_layout.visible = screen is main_layout
+        page.controls[:] = [main_layout] if screen is main_layout else [main_layout, screen]
+        show_section_page(current_page)
+
+    def show_home(e):
+        show_screen(main_layout)
 
     def show_settings(e):
-        page.controls.clear()
-        page.controls.append(settings_screen)
-        page.update()
+        show_screen(settings_screen)
 
-    section1 = create_countdown_section("EleBull_VISION - Cam 1", default_camera=section_default_cameras[0], default_model=section_default_models[0], default_threshold=section_default_thresholds[0])
-    section2 = create_countdown_section("EleBull_VISION - Cam 2", default_camera=section_default_cameras[1], default_model=section_default_models[1], default_threshold=section_default_thresholds[1])
-    section3 = create_countdown_section("EleBull_VISION - Cam 3", default_camera=section_default_cameras[2], default_model=section_default_models[2], default_threshold=section_default_thresholds[2])
+    def show_ip_cameras(e):
+        show_screen(ip_camera_screen)
+
+    def show_diagnostics(e):
+        show_screen(diagnostics_screen)
+
+    section_containers = [
+        create_countdown_section(
+            f"EleBull_VISION - Cam {i + 1}", default_camera=section_default_cameras[i], default_model=section_default_models[i],
+            default_threshold=section_default_thresholds[i], default_backend=section_default_backends[i],
+            default_inference_size=section_default_inference_sizes[i], default_rois=section_default_rois[i]
+        )
+        for i in range(section_count)
+    ]
 
     main_row = ft.Row(
-        controls=[section1, section2, section3],
+        controls=section_containers,
+        alignment=ft.MainAxisAlignment.CENTER,
+        vertical_alignment=ft.CrossAxisAlignment.START,
+        wrap=True
+    )
+
+    # แสดงทีละหน้า section ที่อยู่นอกหน้าปัจจุบันยังนับต่อ แต่ไม่สร้างภาพ preview และไม่อัปเดต UI
+    page_count = max(1, -(-section_count // sections_per_page))
+    current_page = 0
+    page_label = ft.Text("", color=ft.colors.WHITE)
+
+    def show_section_page(index):
+        nonlocal current_page
+        current_page = index % page_count
+        first = current_page * sections_per_page
+        for i, container in enumerate(section_containers):
+            on_page = first <= i < first + sections_per_page
+            container.visible = on_page
+            if container.data is not None:
+                container.data.set_on_screen(on_page and main_layout.visible)
+        page_label.value = f"Cameras {first + 1}-{min(first + sections_per_page, section_count)} of {section_count}"
+        if page.controls:
+            page.update()
+
+    page_row = ft.Row(
+        controls=[
+            ft.IconButton(icon=ft.icons.CHEVRON_LEFT, tooltip="Previous cameras", on_click=lambda e: show_section_page(current_page - 1)),
+            page_label,
+            ft.IconButton(icon=ft.icons.CHEVRON_RIGHT, tooltip="Next cameras", on_click=lambda e: show_section_page(current_page + 1)),
+        ],
         alignment=ft.MainAxisAlignment.CENTER,
-        vertical_alignment=ft.CrossAxisAlignment.CENTER
+        visible=page_count > 1
     )
 
+    def apply_section_setting(key, index, value):
+        # ค่าที่เปลี่ยนจากหน้า Settings มีผลกับ section ที่ทำงานอยู่ทันทีโดยไม่ต้องเริ่มใหม่
+        countdown = section_containers[index].data if index is not None else None
+        if countdown is None:
+            return
+        if key == "thresholds":
+            countdown.set_confidence_threshold(value)
+        elif key == "models":
+            countdown.set_model(value)
+        elif key == "cameras":
+            countdown.set_camera(value)
+
+    settings_store.add_listener(apply_section_setting)
+
     def toggle_automatic_start(e):
         global automatic_start_enabled
         automatic_start_enabled = e.control.value
-        save_settings({"cameras": section_default_cameras, "models": section_default_models, "thresholds": section_default_thresholds, "automatic_start": automatic_start_enabled})
+        settings_store.set("automatic_start", automatic_start_enabled)
         
         if automatic_start_enabled:
             for countdown in countdown_sections:
@@ -226,7 +330,7 @@ async def app(page: ft.Page):
 
     automatic_start_checkbox = ft.Row(
         controls=[
-            ft.Image(src=icon_auto_base64, width=48, height=48, fit=ft.ImageFit.CONTAIN),
+            ft.Image(src=get_base64_icon(icon_auto), width=48, height=48, fit=ft.ImageFit.CONTAIN),
             ft.Checkbox(
                 label="Automatic Start",
                 value=automatic_start_enabled,  # Set initial state based on loaded settings
@@ -242,11 +346,16 @@ async def app(page: ft.Page):
         on_click=reset_total_person_count
     )
 
+    # กราฟแนวโน้มจาก count_history ไม่หายเมื่อกด Reset Count
+    history_chart = CountHistoryChart()
+    count_history.start_autosave(count_history_file)
+
     main_layout = ft.Column(
-        controls=[total_person_count_label, automatic_start_checkbox, reset_button, main_row, loading_indicator],
+        controls=[total_person_count_label, automatic_start_checkbox, reset_button, page_row, main_row, history_chart, loading_indicator],
         alignment=ft.MainAxisAlignment.CENTER,
         horizontal_alignment=ft.CrossAxisAlignment.CENTER
     )
+    show_section_page(0)
 
     drawer = ft.NavigationDrawer(
     controls=[
@@ -258,7 +367,7 @@ async def app(page: ft.Page):
         ft.ListTile(
             leading=ft.Icon(ft.icons.VIDEO_CAMERA_FRONT),  # ไอคอนกล้องสำหรับ IP_CAMERA
             title=ft.Text("IP-CAMERA"),
-            on_click=lambda e: print("IP Camera selected")
+            on_click=show_ip_cameras
         ),
         ft.ListTile(
             leading=ft.Icon(ft.icons.SETTINGS),  # ไอคอนการตั้งค่าสำหรับ Settings
@@ -266,9 +375,9 @@ async def app(page: ft.Page):
             on_click=show_settings
         ),
         ft.ListTile(
-            leading=ft.Icon(ft.icons.INFO),  # ไอคอนข้อมูลสำหรับ About
-            title=ft.Text("About"),
-            on_click=lambda e: print("About selected")
+            leading=ft.Icon(ft.icons.INSIGHTS),  # ไอคอนสำหรับหน้า Diagnostics
+            title=ft.Text("Diagnostics"),
+            on_click=show_diagnostics
         ),
     ]
 )
@@ -281,7 +390,7 @@ async def app(page: ft.Page):
     page.appbar = ft.AppBar(
         title=ft.Row(
             controls=[
-                ft.Image(src=icon_elephant_base64, width=64, height=64, fit=ft.ImageFit.CONTAIN,filter_quality=ft.FilterQuality.HIGH),
+                ft.Image(src=get_base64_icon(icon_elephant), width=64, height=64, fit=ft.ImageFit.CONTAIN,filter_quality=ft.FilterQuality.HIGH),
                 ft.Text("EleBull_VISION")
             ],
             alignment=ft.MainAxisAlignment.CENTER  # Center the Row within AppBar
@@ -292,8 +401,9 @@ async def app(page: ft.Page):
 
     page.add(main_layout)
     page.update()  # Ensure the page is fully updated
+    log_startup("app shell shown")
 
-    await start_with_delay(page, loading_indicator)
+    await start_sections(page, loading_indicator)
 
 if __name__ == '__main__': 
     ft.app(target=app)
@@ -0,0 +1,161 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+# Constants
+METRICS_WINDOW = 512  # จำนวนค่าล่าสุดที่เก็บไว้คำนวณ percentile ต่อ stage
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = 9108
+# ขอบบนของ bucket (วินาที) สำหรับ histogram แบบ Prometheus
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+class LatencyHistogram:
+    """Latency samples for one stage: a rolling window for percentiles plus cumulative buckets."""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = np.zeros(window, dtype=np.float64)
+        self.bucket_counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        with self.lock:
+            self.window[self.count % len(self.window)] = seconds
+            self.bucket_counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+            self.count += 1
+            self.total += seconds
+
+    def percentiles(self, percentiles=(50, 90, 99)):
+        """Return ``{p: seconds}`` over the rolling window, or an empty dict with no samples."""
+        with self.lock:
+            samples = self.window[:min(self.count, len(self.window))].copy()
+        if not len(samples):
+            return {}
+        return dict(zip(percentiles, np.percentile(samples, percentiles)))
+
+
+class SectionMetrics:
+    """Per-stage latency histograms for one camera section (or shared component)."""
+
+    def __init__(self, name):
+        self.name = name
+        self.stages = {}
+        self.counters = {}
+        self.lock = threading.Lock()
+
+    def observe(self, stage, seconds):
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            with self.lock:
+                histogram = self.stages.setdefault(stage, LatencyHistogram())
+        histogram.observe(seconds)
+
+    def count(self, name, amount=1):
+        """Add ``amount`` to a monotonically increasing counter."""
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.sections = {}
+        self.lock = threading.Lock()
+        self.server = None
+
+    def section(self, name):
+        with self.lock:
+            metrics = self.sections.get(name)
+            if metrics is None:
+                metrics = self.sections[name] = SectionMetrics(name)
+            return metrics
+
+    def snapshot(self):
+        """Return ``{section: {stage: {"count", "p50_ms", "p90_ms", "p99_ms"}}}`` for display."""
+        snapshot = {}
+        for name, metrics in list(self.sections.items()):
+            stages = {}
+            for stage, histogram in list(metrics.stages.items()):
+                row = {"count": histogram.count}
+                for p, seconds in histogram.percentiles().items():
+                    row[f"p{p}_ms"] = float(seconds) * 1000
+                stages[stage] = row
+            snapshot[name] = stages
+        return snapshot
+
+    def counters(self):
+        """Return ``{section: {counter: value}}`` for sections that have counters."""
+        counters = {}
+        for name, metrics in list(self.sections.items()):
+            with metrics.lock:
+                if metrics.counters:
+                    counters[name] = dict(metrics.counters)
+        return counters
+
+    def to_prometheus(self):
+        """Render every histogram in the Prometheus text exposition format."""
+        lines = [
+            "# HELP elebull_stage_latency_seconds Latency of each pipeline stage.",
+            "# TYPE elebull_stage_latency_seconds histogram",
+        ]
+        for name, metrics in list(self.sections.items()):
+            for stage, histogram in list(metrics.stages.items()):
+                labels = f'section="{_escape(name)}",stage="{_escape(stage)}"'
+                with histogram.lock:
+                    bucket_counts = list(histogram.bucket_counts)
+                    count, total = histogram.count, histogram.total
+                cumulative = 0
+                for bound, bucket in zip(LATENCY_BUCKETS, bucket_counts):
+                    cumulative += bucket
+                    lines.append(f'elebull_stage_latency_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'elebull_stage_latency_seconds_bucket{{{labels},le="+Inf"}} {count}')
+                lines.append(f"elebull_stage_latency_seconds_sum{{{labels}}} {total}")
+                lines.append(f"elebull_stage_latency_seconds_count{{{labels}}} {count}")
+        lines += [
+            "# HELP elebull_events_total Pipeline event counters.",
+            "# TYPE elebull_events_total counter",
+        ]
+        for name, counters in self.counters().items():
+            for counter, value in counters.items():
+                lines.append(f'elebull_events_total{{section="{_escape(name)}",event="{_escape(counter)}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def serve(self, host=METRICS_HOST, port=METRICS_PORT):
+        """Serve ``/metrics`` over HTTP on a background thread."""
+        if self.server is not None:
+            return
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = registry.to_prometheus().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        try:
+            self.server = ThreadingHTTPServer((host, port), Handler)
+        except OSError as e:
+            print(f"Metrics endpoint not started on {host}:{port}: {e}")
+            return
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        print(f"Metrics available at http://{host}:{port}/metrics")
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"')
+
+
+# Shared by every section
+metrics_registry = MetricsRegistry()
@@ -0,0 +1,115 @@
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+
+from backends import BACKEND_AUTO
+from inference_engine import InferenceEngine
+
+MODEL_MEMORY_BUDGET_MB = 1024  # ขนาดรวมโดยประมาณของโมเดลที่ยังเก็บไว้ในหน่วยความจำ
+
+
+def _model_size_mb(model_path):
+    """Estimate a model's memory footprint from its size on disk."""
+    if os.path.isdir(model_path):
+        size = sum(
+            os.path.getsize(os.path.join(root, name))
+            for root, _, names in os.walk(model_path) for name in names
+        )
+    else:
+        size = os.path.getsize(model_path)
+    return size / (1024 * 1024)
+
+
+class ModelRegistry:
+    """Process-wide cache of inference engines keyed by model path and backend.
+
+    Sections ``acquire`` an engine and ``release`` it when they stop using it.
+    Released engines stay loaded (and warmed up) so switching back is instant;
+    the least recently used idle ones are unloaded once the estimated size of
+    all loaded models exceeds ``memory_budget_mb``.
+    """
+
+    def __init__(self, memory_budget_mb=MODEL_MEMORY_BUDGET_MB):
+        self.memory_budget_mb = memory_budget_mb
+        self.engines = OrderedDict()  # key -> engine, least recently used first
+        self.ref_counts = {}
+        self.sizes = {}
+        self.loading = {}  # key -> Future ของโมเดลที่กำลังโหลด
+        self.lock = threading.Lock()
+
+    def acquire(self, model_path, backend=BACKEND_AUTO):
+        """Return a warmed-up engine for the model, loading it if it is not cached."""
+        key = (model_path, backend or BACKEND_AUTO)
+        with self.lock:
+            engine = self.engines.get(key)
+            if engine is not None:
+                self.engines.move_to_end(key)
+                self.ref_counts[key] += 1
+                return engine
+            future = self.loading.get(key)
+            owner = future is None
+            if owner:
+                future = self.loading[key] = Future()
+
+        if not owner:
+            # อีก section กำลังโหลดโมเดลเดียวกันอยู่ รอใช้ผลลัพธ์เดียวกัน
+            future.result()
+            return self.acquire(model_path, backend)
+
+        try:
+            engine = InferenceEngine(model_path, key[1])
+            engine.warmup()
+        except Exception as e:
+            with self.lock:
+                del self.loading[key]
+            future.set_exception(e)
+            raise
+
+        with self.lock:
+            del self.loading[key]
+            self.engines[key] = engine
+            self.ref_counts[key] = 1
+            self.sizes[key] = _model_size_mb(model_path)
+            self._evict()
+        future.set_result(engine)
+        return engine
+
+    def release(self, engine, section_id=None):
+        """Drop a section's reference; the engine stays cached until it is evicted."""
+        if section_id is not None:
+            engine.detach(section_id)
+        with self.lock:
+            if self.engines.get(engine.key) is not engine:
+                return
+            self.ref_counts[engine.key] = max(0, self.ref_counts[engine.key] - 1)
+            self._evict()
+
+    def loaded_size_mb(self):
+        return sum(self.sizes.values())
+
+    def stats(self):
+        with self.lock:
+            return {
+                "loaded": len(self.engines),
+                "in_use": sum(1 for count in self.ref_counts.values() if count > 0),
+                "size_mb": round(self.loaded_size_mb(), 1),
+                "budget_mb": self.memory_budget_mb,
+            }
+
+    def _evict(self):
+        """Unload idle engines, least recently used first, until within the memory budget."""
+        for key in list(self.engines):
+            if self.loaded_size_mb() <= self.memory_budget_mb:
+                break
+            if self.ref_counts[key] > 0:
+                continue
+            engine = self.engines.pop(key)
+            del self.ref_counts[key]
+            del self.sizes[key]
+            engine.stop()
+            print(f"Model unloaded from cache: {engine.model_path} ({engine.backend.name})")
+
+
+# Shared by every section
+model_registry = ModelRegistry()
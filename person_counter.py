@@ -0,0 +1,68 @@
+import threading
+import time
+from collections import deque
+
+ID_EXPIRATION_TIME = 5  # วินาทีที่ ID ต้องหายไปก่อนจะถูกนับใหม่
+BUCKET_WIDTH = 1.0  # ความกว้างของแต่ละช่วงเวลาใน expiry queue (วินาที)
+
+
+class UniqueIdCounter:
+    """Count unique track IDs, forgetting IDs that have not been seen for ``expiry`` seconds.
+
+    Sightings are grouped into time buckets of ``BUCKET_WIDTH`` seconds, kept
+    in time order. An ID is stored at most once per bucket, so each detection
+    costs amortized constant work and memory is bounded by the IDs seen within
+    the expiry window, no matter how long the app runs. Expiry is accurate to
+    one bucket.
+    """
+
+    def __init__(self, expiry=ID_EXPIRATION_TIME):
+        self.expiry = expiry
+        self.last_seen = {}
+        self.buckets = deque()  # (bucket start, set of IDs seen in the bucket)
+        self.total = 0
+        self.lock = threading.Lock()
+
+    def observe_many(self, track_ids, now=None):
+        """Record sightings of ``track_ids`` and return the ones counted as new."""
+        now = time.time() if now is None else now
+        new_ids = []
+        with self.lock:
+            self._expire(now)
+            bucket_start = now - now % BUCKET_WIDTH
+            if not self.buckets or self.buckets[-1][0] != bucket_start:
+                self.buckets.append((bucket_start, set()))
+            bucket = self.buckets[-1][1]
+            for track_id in track_ids:
+                if track_id is None:
+                    continue
+                if track_id not in self.last_seen:
+                    new_ids.append(track_id)
+                self.last_seen[track_id] = now
+                bucket.add(track_id)
+            self.total += len(new_ids)
+        return new_ids
+
+    def observe(self, track_id, now=None):
+        """Record one sighting; return True if it was counted as a new ID."""
+        return bool(self.observe_many((track_id,), now))
+
+    def active_ids(self):
+        with self.lock:
+            return len(self.last_seen)
+
+    def reset(self):
+        with self.lock:
+            self.last_seen.clear()
+            self.buckets.clear()
+            self.total = 0
+
+    def _expire(self, now):
+        # ID ที่ถูกเห็นอีกครั้งภายหลังจะอยู่ใน bucket ที่ใหม่กว่า และจะถูกตรวจสอบเมื่อ bucket นั้นหมดอายุ
+        cutoff = now - self.expiry
+        while self.buckets and self.buckets[0][0] + BUCKET_WIDTH <= cutoff:
+            _, track_ids = self.buckets.popleft()
+            for track_id in track_ids:
+                last_seen = self.last_seen.get(track_id)
+                if last_seen is not None and last_seen <= cutoff:
+                    del self.last_seen[track_id]
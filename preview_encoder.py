@@ -0,0 +1,125 @@
+import base64
+import threading
+import time
+
+import cv2
+
+# codec -> (นามสกุลไฟล์สำหรับ cv2.imencode, flag สำหรับคุณภาพ)
+PREVIEW_CODECS = {
+    "jpeg": (".jpg", cv2.IMWRITE_JPEG_QUALITY),
+    "webp": (".webp", cv2.IMWRITE_WEBP_QUALITY),
+    "png": (".png", None),
+}
+
+
+class PreviewEncoder:
+    """Annotate and encode preview frames on a separate thread.
+
+    The processing thread hands over its latest result with ``submit``; the
+    encoder keeps only the newest one, limits itself to ``max_fps`` and calls
+    ``on_encoded`` with the base64 string. Nothing is encoded while the preview
+    is hidden, so inference throughput no longer depends on the UI.
+    """
+
+    def __init__(self, on_encoded, codec="jpeg", quality=75, max_fps=10, metrics=None, overlay=None):
+        if codec not in PREVIEW_CODECS:
+            raise ValueError(f"Unsupported preview codec: {codec}")
+        self.on_encoded = on_encoded
+        self.codec = codec
+        self.quality = quality
+        self.max_fps = max_fps
+        self.visible = True
+        self.metrics = metrics
+        self.overlay = overlay  # วัตถุที่มีเมธอด draw(image) เช่น RoiCropper วาดทับก่อนกล่อง
+        self.frames_encoded = 0
+        self.frames_skipped = 0
+        self.last_submit_time = 0.0
+        self.pending = None
+        self.lock = threading.Lock()
+        self.pending_event = threading.Event()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+        if self.thread is not None and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        self.pending_event.set()
+
+    def due(self):
+        """Return True if a frame submitted now would be shown (visible and not rate limited)."""
+        if not self.visible:
+            return False
+        return self.max_fps <= 0 or time.monotonic() - self.last_submit_time >= 1.0 / self.max_fps
+
+    def submit(self, result):
+        """Queue an ultralytics result for annotation; replaces any frame not yet encoded.
+
+        The result's ``orig_img`` is drawn on in place and must not be used by
+        the caller afterwards.
+        """
+        if not self.due():
+            self.frames_skipped += 1
+            return
+        self.last_submit_time = time.monotonic()
+        with self.lock:
+            if self.pending is not None:
+                self.frames_skipped += 1
+            self.pending = result
+        self.pending_event.set()
+
+    def annotate(self, result):
+        """Draw the result's boxes directly onto its ``orig_img`` and return it.
+
+        ``Results.plot()`` deep-copies the frame first; the frame submitted here
+        is already the caller's private copy, so drawing in place saves one
+        full-frame allocation and copy per preview.
+        """
+        from ultralytics.utils.plotting import Annotator, colors
+        from detections import detection_arrays
+        names = result.names
+        if self.overlay is not None:
+            self.overlay.draw(result.orig_img)
+        annotator = Annotator(result.orig_img, example=str(names))
+        arrays = detection_arrays(result)
+        track_ids = arrays.ids.tolist() if arrays.ids is not None else [None] * len(arrays.cls)
+        for box, conf, cls, track_id in zip(arrays.xyxy, arrays.conf.tolist(), arrays.cls.tolist(), track_ids):
+            name = names[cls]
+            label = f"{name} {conf:.2f}" if track_id is None else f"id:{track_id} {name} {conf:.2f}"
+            annotator.box_label(box, label, color=colors(cls, True))
+        return annotator.result()
+
+    def encode(self, image):
+        """Encode a BGR image to a base64 string with the configured codec."""
+        extension, quality_flag = PREVIEW_CODECS[self.codec]
+        params = [quality_flag, int(self.quality)] if quality_flag is not None else []
+        success, buffer = cv2.imencode(extension, image, params)
+        if not success:
+            raise RuntimeError(f"Failed to encode preview frame as {self.codec}")
+        return base64.b64encode(buffer).decode("utf-8")
+
+    def _run(self):
+        while self.running:
+            self.pending_event.wait()
+            with self.lock:
+                self.pending_event.clear()
+                result, self.pending = self.pending, None
+            if result is None or not self.visible:
+                continue
+            try:
+                started = time.perf_counter()
+                annotated = self.annotate(result)
+                encode_started = time.perf_counter()
+                image_base64 = self.encode(annotated)
+                if self.metrics is not None:
+                    self.metrics.observe("annotate", encode_started - started)
+                    self.metrics.observe("encode", time.perf_counter() - encode_started)
+                self.on_encoded(image_base64)
+                self.frames_encoded += 1
+            except Exception as e:
+                print(f"Error encoding preview frame: {e}")
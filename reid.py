@@ -0,0 +1,192 @@
+import itertools
+import threading
+import time
+
+import cv2
+import numpy as np
+
+from detections import detection_arrays
+from person_counter import ID_EXPIRATION_TIME
+
+# Constants
+REID_MATCH_THRESHOLD = 0.85  # cosine similarity ขั้นต่ำที่ถือว่าเป็นคนเดียวกันข้ามกล้อง
+REID_GALLERY_SIZE = 512  # จำนวน identity สูงสุดที่เก็บ vector ไว้ค้นหา
+REID_INPUT_SIZE = (128, 256)  # (width, height) ของภาพคนที่ส่งเข้าโมเดล re-ID
+HIST_BINS = (16, 4)  # จำนวน bin ของ hue และ saturation ต่อครึ่งตัว
+CONCURRENT_WINDOW = 1.0  # track ที่เห็นภายในกี่วินาทีถือว่ายังอยู่ในกล้องนั้น
+_IMAGENET_MEAN = np.array([0.485, 0.456, 0.406], dtype=np.float32)
+_IMAGENET_STD = np.array([0.229, 0.224, 0.225], dtype=np.float32)
+
+
+def _normalize(vector):
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm > 0 else vector
+
+
+class AppearanceEmbedder:
+    """Compute a unit-length appearance vector for each person box.
+
+    Without ``model_path`` the vector is an HSV colour histogram of the upper
+    and lower half of the crop, which costs well under a millisecond per
+    person. An ONNX re-ID model (e.g. OSNet) can be given instead for better
+    matching between cameras with a different colour response.
+    """
+
+    def __init__(self, model_path=None):
+        self.session = None
+        self.dim = 2 * HIST_BINS[0] * HIST_BINS[1]  # ความยาว vector ใช้กับ crop ว่างด้วย
+        if model_path:
+            try:
+                import onnxruntime as ort
+                self.session = ort.InferenceSession(model_path, providers=ort.get_available_providers())
+                self.input_name = self.session.get_inputs()[0].name
+                # output shape ของโมเดลอาจเป็น dimension แบบ symbolic จึงหาความยาวจากการรันภาพว่างหนึ่งครั้ง
+                self.dim = len(self._embed_crop(np.zeros((REID_INPUT_SIZE[1], REID_INPUT_SIZE[0], 3), dtype=np.uint8)))
+            except Exception as e:
+                self.session = None
+                print(f"Re-ID model {model_path} not loaded, using colour histograms: {e}")
+
+    def embed(self, image, boxes):
+        """Return one vector per ``xyxy`` box; empty crops get a zero vector that never matches."""
+        h, w = image.shape[:2]
+        boxes = np.clip(np.round(boxes), 0, [w, h, w, h]).astype(int)
+        vectors = []
+        for x1, y1, x2, y2 in boxes:
+            crop = image[y1:y2, x1:x2]
+            vectors.append(self._embed_crop(crop) if crop.shape[0] >= 2 and crop.shape[1] >= 1 else None)
+        return [v if v is not None else np.zeros(self.dim, dtype=np.float32) for v in vectors]
+
+    def _embed_crop(self, crop):
+        if self.session is not None:
+            rgb = cv2.cvtColor(cv2.resize(crop, REID_INPUT_SIZE), cv2.COLOR_BGR2RGB)
+            blob = ((rgb.astype(np.float32) / 255 - _IMAGENET_MEAN) / _IMAGENET_STD).transpose(2, 0, 1)[None]
+            output = self.session.run(None, {self.input_name: blob})[0]
+            return _normalize(output.reshape(-1).astype(np.float32))
+        hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
+        half = hsv.shape[0] // 2
+        histograms = [
+            cv2.calcHist([part], [0, 1], None, list(HIST_BINS), [0, 180, 0, 256]).ravel()
+            for part in (hsv[:half], hsv[half:])
+        ]
+        # sqrt ก่อน normalize ทำให้ cosine similarity เทียบเท่า Hellinger distance ของ histogram
+        return _normalize(np.sqrt(np.concatenate(histograms)).astype(np.float32))
+
+
+def embed_tracks(embedder, result, track_ids):
+    """Return ``{track_id: vector}`` for the given track IDs of a tracked result."""
+    if not track_ids:
+        return {}
+    arrays = detection_arrays(result)
+    if arrays.ids is None:
+        return {}
+    mask = np.isin(arrays.ids, list(track_ids))
+    if not mask.any():
+        return {}
+    vectors = embedder.embed(result.orig_img, arrays.xyxy[mask])
+    return dict(zip(arrays.ids[mask].tolist(), vectors))
+
+
+class PersonGallery:
+    """Map per-section track IDs to global person identities.
+
+    Track IDs are only unique within one section's tracker, so each
+    ``(section, track_id)`` pair gets its own identity. When a new track comes
+    with an appearance vector, it is matched against the identities seen
+    recently that are not currently visible in the same section; a close
+    enough match reuses that identity, so one person walking between cameras
+    is counted once. Vectors live in one preallocated matrix, so a lookup is a
+    single matrix-vector product over at most ``capacity`` rows.
+    """
+
+    def __init__(self, expiry=ID_EXPIRATION_TIME, threshold=REID_MATCH_THRESHOLD, capacity=REID_GALLERY_SIZE):
+        self.expiry = expiry
+        self.threshold = threshold
+        self.capacity = capacity
+        self.vectors = None  # (capacity, dim) สร้างเมื่อได้ vector แรก
+        self.slot_identity = np.full(capacity, -1, dtype=np.int64)
+        self.free_slots = list(range(capacity - 1, -1, -1))
+        self.identity_slot = {}
+        self.identity_last_seen = {}
+        self.identity_tracks = {}  # identity -> set of (section, track_id)
+        self.tracks = {}  # (section, track_id) -> identity
+        self.track_last_seen = {}
+        self.next_identity = itertools.count()
+        self.last_sweep = 0.0
+        self.lock = threading.Lock()
+
+    def identify(self, section, track_ids, embeddings=None, now=None):
+        """Return the global identity of each of ``track_ids`` seen by ``section``."""
+        now = time.time() if now is None else now
+        embeddings = embeddings or {}
+        identities = []
+        with self.lock:
+            if now - self.last_sweep >= CONCURRENT_WINDOW:
+                self._expire(now)
+                self.last_sweep = now
+            for track_id in track_ids:
+                key = (section, track_id)
+                identity = self.tracks.get(key)
+                if identity is None:
+                    identity = self._assign(section, embeddings.get(track_id), now)
+                    self.tracks[key] = identity
+                    self.identity_tracks.setdefault(identity, set()).add(key)
+                self.track_last_seen[key] = now
+                self.identity_last_seen[identity] = now
+                identities.append(identity)
+        return identities
+
+    def stats(self):
+        with self.lock:
+            return {"identities": len(self.identity_tracks), "tracks": len(self.tracks), "vectors": len(self.identity_slot)}
+
+    def _assign(self, section, vector, now):
+        if vector is not None and self.identity_slot:
+            scores = self.vectors @ vector
+            scores[self.slot_identity < 0] = -1.0
+            for slot in np.argsort(scores)[::-1]:
+                if scores[slot] < self.threshold:
+                    break
+                identity = int(self.slot_identity[slot])
+                if not self._visible_in(identity, section, now):
+                    return identity
+        identity = next(self.next_identity)
+        if vector is not None:
+            self._store(identity, vector)
+        return identity
+
+    def _visible_in(self, identity, section, now):
+        # คนเดียวกันไม่อยู่ในกล้องเดียวกันสองตำแหน่งพร้อมกัน
+        return any(
+            key[0] == section and now - self.track_last_seen[key] < CONCURRENT_WINDOW
+            for key in self.identity_tracks.get(identity, ())
+        )
+
+    def _store(self, identity, vector):
+        if self.vectors is None:
+            self.vectors = np.zeros((self.capacity, len(vector)), dtype=np.float32)
+        if not self.free_slots:
+            # เต็มแล้ว: ลบ vector ของ identity ที่เห็นล่าสุดนานที่สุด (ยังนับต่อได้ แค่ match ไม่ได้)
+            oldest = min(self.identity_slot, key=self.identity_last_seen.get)
+            self._free_vector(oldest)
+        slot = self.free_slots.pop()
+        self.vectors[slot] = vector
+        self.slot_identity[slot] = identity
+        self.identity_slot[identity] = slot
+
+    def _free_vector(self, identity):
+        slot = self.identity_slot.pop(identity, None)
+        if slot is not None:
+            self.slot_identity[slot] = -1
+            self.free_slots.append(slot)
+
+    def _expire(self, now):
+        cutoff = now - self.expiry
+        for key in [key for key, last_seen in self.track_last_seen.items() if last_seen <= cutoff]:
+            del self.track_last_seen[key]
+            identity = self.tracks.pop(key)
+            keys = self.identity_tracks[identity]
+            keys.discard(key)
+            if not keys:
+                del self.identity_tracks[identity]
+                del self.identity_last_seen[identity]
+                self._free_vector(identity)
@@ -0,0 +1,149 @@
+import math
+
+import cv2
+import numpy as np
+
+# Constants
+INFERENCE_SIZE = 320  # imgsz เริ่มต้นของแต่ละ section
+INFERENCE_SIZES = (160, 224, 256, 320, 416, 480, 640, 960, 1280)
+MAX_CAPTURE_SIZE = 1920  # ด้านยาวสูงสุดของเฟรมเมื่อต้องขยายภาพเพื่อให้ ROI มีความละเอียดพอ
+ROI_MARGIN = 0.05  # สัดส่วนของขนาด ROI ที่เพิ่มรอบกรอบสี่เหลี่ยมเพื่อให้เห็นวัตถุที่อยู่ตรงขอบ
+MAX_TILE_ASPECT = 1.5  # ROI ที่ยาวกว่าขนาด tile เกินเท่านี้จะถูกแบ่งเป็นหลาย tile แทนการย่อทั้งแถบ
+TILE_OVERLAP = 0.2  # สัดส่วนที่ tile ติดกันซ้อนทับกัน วัตถุตรงรอยต่อจึงอยู่ครบใน tile ใด tile หนึ่ง
+MERGE_IOU = 0.5  # IoU ที่ถือว่ากล่องจาก tile ต่างกันเป็นวัตถุเดียวกัน
+ROI_COLOR = (0, 200, 255)
+
+
+def parse_rois(text):
+    """Parse ``"x,y x,y x,y; x,y ..."`` (normalized 0-1, one polygon per ``;``) into a list of polygons.
+
+    Raises ``ValueError`` for malformed points or a polygon with fewer than three points.
+    """
+    polygons = []
+    for part in (text or "").split(";"):
+        if not part.strip():
+            continue
+        points = []
+        for point in part.split():
+            try:
+                x, y = (float(value) for value in point.split(","))
+            except ValueError:
+                raise ValueError(f"ROI point {point} is not x,y") from None
+            if not (0.0 <= x <= 1.0 and 0.0 <= y <= 1.0):
+                raise ValueError(f"ROI point {point} is outside 0-1")
+            points.append([x, y])
+        if len(points) < 3:
+            raise ValueError("An ROI polygon needs at least three points")
+        polygons.append(points)
+    return polygons
+
+
+def format_rois(polygons):
+    return "; ".join(" ".join(f"{x:g},{y:g}" for x, y in polygon) for polygon in polygons or [])
+
+
+def capture_size(inference_size, polygons=None):
+    """Return the ``(w, h)`` box camera frames are fitted into.
+
+    Without ROIs the whole frame is detected at ``inference_size``. With ROIs
+    the frame is kept large enough that the biggest ROI still fills
+    ``inference_size``, so a small doorway is detected at full model
+    resolution instead of being downscaled with the rest of the view.
+    """
+    if not polygons:
+        return inference_size, inference_size
+    extent = max(
+        max(np.ptp(np.asarray(polygon, dtype=np.float32), axis=0).max() * (1 + 2 * ROI_MARGIN), 1e-3)
+        for polygon in polygons
+    )
+    size = min(MAX_CAPTURE_SIZE, max(inference_size, int(math.ceil(inference_size / min(extent, 1.0)))))
+    return size, size
+
+
+def _tiles(x1, y1, x2, y2, inference_size):
+    """Split a long rectangle into overlapping tiles along its long side.
+
+    A tile is as long as the short side, but never shorter than
+    ``inference_size``, so a thin strip is not cut into many tiles that would
+    each be upscaled.
+    """
+    width, height = x2 - x1, y2 - y1
+    long_side = max(width, height)
+    tile = max(min(width, height), inference_size)
+    if long_side <= tile * MAX_TILE_ASPECT:
+        return [(x1, y1, x2, y2)]
+    count = int(math.ceil((long_side / tile - TILE_OVERLAP) / (1 - TILE_OVERLAP)))
+    step = (long_side - tile) / (count - 1)
+    starts = [int(round(i * step)) for i in range(count)]
+    if width >= height:
+        return [(x1 + s, y1, x1 + s + tile, y2) for s in starts]
+    return [(x1, y1 + s, x2, y1 + s + tile) for s in starts]
+
+
+class RoiCropper:
+    """Detect only inside polygon regions of interest.
+
+    ``crops`` returns views of the frame around each ROI (long ROIs are tiled),
+    which the inference engine runs through the model instead of the whole
+    frame. ``merge`` shifts the crop detections back into frame coordinates,
+    drops boxes whose bottom-centre point lies outside every polygon and
+    removes duplicates found in overlapping crops. Rectangles and the polygon
+    mask are computed once per frame size.
+    """
+
+    def __init__(self, polygons, inference_size=INFERENCE_SIZE):
+        self.inference_size = inference_size
+        self.polygons = [np.asarray(polygon, dtype=np.float32) for polygon in polygons]
+        self.shape = None
+        self.rects = []
+        self.mask = None
+        self.points = []
+
+    def _prepare(self, shape):
+        height, width = shape[:2]
+        self.shape = shape[:2]
+        self.points = [np.round(polygon * (width - 1, height - 1)).astype(np.int32) for polygon in self.polygons]
+        self.mask = np.zeros((height, width), dtype=np.uint8)
+        cv2.fillPoly(self.mask, self.points, 1)
+        self.rects = []
+        for points in self.points:
+            x, y, w, h = cv2.boundingRect(points)
+            margin_x, margin_y = int(w * ROI_MARGIN), int(h * ROI_MARGIN)
+            x1, y1 = max(0, x - margin_x), max(0, y - margin_y)
+            x2, y2 = min(width, x + w + margin_x), min(height, y + h + margin_y)
+            self.rects.extend(_tiles(x1, y1, x2, y2, self.inference_size))
+
+    def crops(self, frame):
+        if frame.shape[:2] != self.shape:
+            self._prepare(frame.shape)
+        return [frame[y1:y2, x1:x2] for x1, y1, x2, y2 in self.rects]
+
+    def merge(self, frame, results):
+        """Combine the ``Results`` of ``crops(frame)`` into one ``Results`` for the whole frame."""
+        chunks = []
+        for (x1, y1, _, _), result in zip(self.rects, results):
+            data = result.boxes.data
+            data = (data.cpu().numpy() if hasattr(data, "cpu") else np.asarray(data)).astype(np.float32)
+            if len(data):
+                data[:, [0, 2]] += x1
+                data[:, [1, 3]] += y1
+                chunks.append(data)
+        merged = np.concatenate(chunks) if chunks else np.zeros((0, 6), dtype=np.float32)
+        if len(merged):
+            height, width = self.shape
+            # ใช้จุดกึ่งกลางขอบล่างของกล่อง (ตำแหน่งเท้า) ตัดสินว่าอยู่ใน ROI หรือไม่
+            anchor_x = ((merged[:, 0] + merged[:, 2]) / 2).clip(0, width - 1).astype(np.intp)
+            anchor_y = merged[:, 3].clip(0, height - 1).astype(np.intp)
+            merged = merged[self.mask[anchor_y, anchor_x].astype(bool)]
+        if len(self.rects) > 1 and len(merged) > 1:
+            tlwh = np.column_stack([merged[:, :2], merged[:, 2:4] - merged[:, :2]])
+            keep = cv2.dnn.NMSBoxesBatched(tlwh.tolist(), merged[:, 4].tolist(), merged[:, 5].astype(int).tolist(), 0.0, MERGE_IOU)
+            merged = merged[np.asarray(keep, dtype=int).reshape(-1)]
+        from ultralytics.engine.results import Results
+        return Results(orig_img=frame, path="", names=results[0].names, boxes=merged)
+
+    def draw(self, image):
+        """Outline the ROIs on a BGR image of the frame size the cropper last saw."""
+        if self.points and image.shape[:2] == self.shape:
+            cv2.polylines(image, self.points, True, ROI_COLOR, 2)
+        return image
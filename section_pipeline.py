@@ -0,0 +1,232 @@
+"""Capture, detection, tracking and summary loop of one camera section, without any UI.
+
+``Countdown`` (the Flet section) and ``HeadlessSection`` both run their camera
+through a ``SectionPipeline`` and only differ in what they do with each
+result. The process worker in ``camera_worker`` keeps its own loop because it
+reports through a queue and shared memory.
+"""
+import threading
+import time
+
+from detections import summarize_detections
+from frame_buffer import LatestFrameBuffer
+from inference_scheduler import InferenceScheduler
+from person_counter import UniqueIdCounter, ID_EXPIRATION_TIME
+from reid import AppearanceEmbedder, embed_tracks
+from roi import RoiCropper, capture_size, INFERENCE_SIZE
+
+# Constants
+MODEL_DIR = "model"
+FRAME_WAIT_TIMEOUT = 0.5  # วินาทีที่ process_frames รอเฟรมใหม่ก่อนตรวจสอบ running อีกครั้ง
+
+
+class SectionPipeline:
+    """Read one camera and run its newest frame through a shared inference engine.
+
+    ``read_frames`` publishes frames to a ``LatestFrameBuffer``;
+    ``process_frames`` lets the ``InferenceScheduler`` decide whether to detect
+    the newest one and calls ``on_result(result, summary, class_counts,
+    person_ids, embeddings)`` for every inferred frame. Embeddings are only
+    computed for person tracks new to this section. The engine can be swapped
+    with ``set_engine`` at any time; frames wait while there is none. The
+    camera is swapped with ``switch_capture``, which the reading thread
+    applies between two reads.
+    """
+
+    def __init__(self, section_id, name, metrics, on_result, confidence_threshold=0.5,
+                 id_expiration_time=ID_EXPIRATION_TIME, reid_enabled=False, reid_model=None,
+                 scheduler_options=None, event_log=None, inference_size=INFERENCE_SIZE, rois=None,
+                 clip_recorder=None):
+        self.section_id = section_id
+        self.name = name
+        self.metrics = metrics
+        self.on_result = on_result
+        self.confidence_threshold = confidence_threshold
+        # motion_gate, motion_threshold, static_interval, adaptive และ max_interval ของ InferenceScheduler
+        self.scheduler = InferenceScheduler(metrics, id_expiration_time=id_expiration_time, **(scheduler_options or {}))
+        # คำนวณ embedding เฉพาะ track ที่เพิ่งปรากฏในกล้องนี้
+        self.new_tracks = UniqueIdCounter(id_expiration_time)
+        self.embedder = AppearanceEmbedder(reid_model) if reid_enabled else None
+        self.event_log = event_log
+        # imgsz ของ section นี้ และ polygon ROI (พิกัด 0-1) ที่ตรวจจับเฉพาะภายใน
+        self.inference_size = inference_size or INFERENCE_SIZE
+        self.rois = rois or []
+        self.roi_cropper = RoiCropper(self.rois, self.inference_size) if self.rois else None
+        self.frame_size = capture_size(self.inference_size, self.rois)
+        self.clip_recorder = clip_recorder
+        self.frame_buffer = LatestFrameBuffer()
+        self.engine = None
+        self.model_ready = threading.Event()
+        self.cap = None
+        self.pending_cap = None  # กล้องใหม่ที่รอให้ read_frames สลับเข้ามา
+        self.switch_callbacks = []
+        self.switch_lock = threading.Lock()
+        self.capture_changed = threading.Event()
+        self.capture_generation = 0  # เพิ่มทุกครั้งที่สลับกล้อง ใช้ทิ้งผลของเฟรมจากกล้องเดิม
+        self.running = False
+        self.threads = []
+
+    def set_engine(self, engine):
+        """Detect with ``engine`` from the next frame on (``None`` pauses detection); return the previous engine."""
+        previous, self.engine = self.engine, engine
+        if engine is None:
+            self.model_ready.clear()
+        else:
+            self.model_ready.set()
+        return previous
+
+    def start(self, cap):
+        """Start reading frames from an opened capture and processing them."""
+        self.cap = cap
+        self.frame_buffer.reset()
+        self.running = True
+        self.threads = [
+            threading.Thread(target=self.read_frames, daemon=True),
+            threading.Thread(target=self.process_frames, daemon=True),
+        ]
+        for thread in self.threads:
+            thread.start()
+
+    def switch_capture(self, cap, on_switched=None):
+        """Replace the running capture with an opened one without stopping detection.
+
+        ``read_frames`` swaps it in between two reads and releases the
+        previous capture itself, so a ``read`` blocked in the reading thread
+        never has its capture released under it. Buffered frames and the
+        section's tracks are dropped, then ``on_switched()`` is called.
+        """
+        with self.switch_lock:
+            skipped, self.pending_cap = self.pending_cap, cap
+            if on_switched is not None:
+                self.switch_callbacks.append(on_switched)
+        if skipped is not None:
+            # สลับซ้ำก่อนที่ read_frames จะรับกล้องก่อนหน้าไป กล้องนั้นไม่เคยถูกอ่าน
+            skipped.release()
+        self.capture_changed.set()
+
+    def stop(self, timeout=None):
+        """Stop both threads, release the capture and forget the section's tracks.
+
+        With ``timeout`` each thread is given that long to finish first.
+        """
+        self.running = False
+        self.frame_buffer.wake()
+        self.capture_changed.set()
+        if timeout is not None:
+            for thread in self.threads:
+                thread.join(timeout)
+        self.threads = []
+        with self.switch_lock:
+            cap, self.cap = self.cap, None
+            pending, self.pending_cap = self.pending_cap, None
+            callbacks, self.switch_callbacks = self.switch_callbacks, []
+        for capture in (cap, pending):
+            if capture is not None:
+                capture.release()
+        for callback in callbacks:
+            callback()
+        if self.engine is not None:
+            self.engine.reset_tracker(self.section_id)
+
+    def _apply_pending_capture(self):
+        self.capture_changed.clear()
+        with self.switch_lock:
+            cap, self.pending_cap = self.pending_cap, None
+            if cap is None or not self.running:
+                if cap is not None:
+                    self.pending_cap = cap  # stop() ปล่อยกล้องนี้เอง
+                return
+            previous, self.cap = self.cap, cap
+            callbacks, self.switch_callbacks = self.switch_callbacks, []
+        if previous is not None:
+            previous.release()
+        self.frame_buffer.reset()
+        self.capture_generation += 1
+        engine = self.engine
+        if engine is not None:
+            # track ID ของกล้องเดิมไม่เกี่ยวกับภาพใหม่
+            engine.reset_tracker(self.section_id)
+        for callback in callbacks:
+            callback()
+
+    def read_frames(self):
+        """Read frames from the camera and publish the newest one to the frame buffer."""
+        metrics = self.metrics
+        while self.running:
+            self._apply_pending_capture()
+            cap = self.cap
+            if cap is None:
+                break
+            started = time.perf_counter()
+            success, frame = cap.read()
+            if not success:
+                if self.running and self.pending_cap is None:
+                    print(f"{self.name}: camera stopped delivering frames.")
+                    # รอจนกว่าจะสลับไปกล้องอื่นหรือหยุด feed
+                    self.capture_changed.wait()
+                continue
+            captured_at = time.monotonic()
+            resize_started = time.perf_counter()
+            metrics.observe("capture", resize_started - started)
+            # ย่อโดยคงสัดส่วนภาพ ไม่บีบเป็นสี่เหลี่ยมจัตุรัส ส่วน letterbox ทำครั้งเดียวใน backend
+            self.frame_buffer.put_fitted(frame, self.frame_size, captured_at)
+            metrics.observe("resize", time.perf_counter() - resize_started)
+        self.frame_buffer.wake()
+
+    def process_frames(self):
+        """Process the newest buffered frame using the shared inference engine."""
+        while self.running:
+            engine = self.engine
+            if engine is None:
+                # รอให้โมเดลโหลดเสร็จในเบื้องหลัง
+                self.model_ready.wait(FRAME_WAIT_TIMEOUT)
+                continue
+            generation = self.capture_generation
+            item = self.frame_buffer.get(timeout=FRAME_WAIT_TIMEOUT)
+            if item is None:
+                continue
+            frame, _ = item
+            self.metrics.observe("frame_age", self.frame_buffer.last_frame_age)
+            frame_time = time.time() - self.frame_buffer.last_frame_age
+            if self.clip_recorder is not None:
+                # คัดลอกเฟรมลง buffer ของ recorder เท่านั้น การบีบอัดทำใน thread ของ recorder
+                self.clip_recorder.submit(frame, frame_time)
+            if not self.scheduler.should_infer(frame):
+                engine.skip(self.section_id)
+                continue
+            try:
+                self.process(engine, frame, frame_time, generation)
+            except Exception as e:
+                print(f"{self.name}: error processing frame: {e}")
+
+    def process(self, engine, frame, frame_time, generation=None):
+        """Detect, track and summarize one frame, then hand the result to ``on_result``.
+
+        A frame whose camera was switched away while it was being detected
+        is dropped, along with the tracks it created.
+        """
+        metrics = self.metrics
+        started = time.perf_counter()
+        result = engine.infer(self.section_id, frame, self.confidence_threshold, self.inference_size, self.roi_cropper)
+        if generation is not None and generation != self.capture_generation:
+            engine.reset_tracker(self.section_id)
+            return
+        summarize_started = time.perf_counter()
+        metrics.observe("inference", summarize_started - started)
+        self.scheduler.observe_inference(summarize_started - started)
+        if self.event_log is not None:
+            self.event_log.append(self.name, result, frame_time)
+        if self.clip_recorder is not None:
+            self.clip_recorder.observe(result, frame_time)
+        summary, class_counts, person_ids = summarize_detections(result)
+        metrics.observe("summarize", time.perf_counter() - summarize_started)
+        embeddings = {}
+        if person_ids and self.embedder is not None:
+            new_track_ids = self.new_tracks.observe_many(person_ids)
+            if new_track_ids:
+                reid_started = time.perf_counter()
+                embeddings = embed_tracks(self.embedder, result, new_track_ids)
+                metrics.observe("reid", time.perf_counter() - reid_started)
+        summary += f"\nFrame age: {self.frame_buffer.last_frame_age * 1000:.0f} ms, Dropped frames: {self.frame_buffer.frames_dropped}"
+        summary += "\n" + self.scheduler.summary()
+        self.on_result(result, summary, class_counts, person_ids, embeddings)
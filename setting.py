@@ -1,47 +1,28 @@
-import sys
 import flet as ft
-import os
-import cv2  # สำหรับการดึงกล้องบน Linux
-
-# ตรวจสอบระบบปฏิบัติการและนำเข้า pythoncom และ pygrabber เฉพาะบน Windows
-if sys.platform == "win32":
-    import pythoncom
-    from pygrabber.dshow_graph import FilterGraph
-
-# ฟังก์ชันสำหรับดึงข้อมูลอุปกรณ์กล้อง
-def get_camera_devices():
-    if sys.platform == "win32":  # ใช้ pythoncom และ pygrabber สำหรับ Windows
-        pythoncom.CoInitialize()
-        graph = FilterGraph()
-        devices = graph.get_input_devices()
-        return {device: index for index, device in enumerate(devices)}
-    elif sys.platform == "linux":
-        # ใช้ OpenCV สำหรับ Linux
-        devices = {}
-        index = 0
-        while True:
-            cap = cv2.VideoCapture(index)
-            if not cap.read()[0]:  # ตรวจสอบว่ากล้องที่ index นี้ใช้ได้หรือไม่
-                break
-            devices[f"Camera {index}"] = index
-            cap.release()
-            index += 1
-        return devices
-    else:
-        print("Camera device retrieval is only supported on Windows and Linux.")
-        return {}  # ส่งคืนค่าว่างในกรณีที่ไม่ใช่ Windows หรือ Linux
+from backends import list_model_files, BACKENDS, BACKEND_AUTO
+from camera_registry import camera_registry
+from roi import parse_rois, format_rois, INFERENCE_SIZE, INFERENCE_SIZES
 
 class SettingsScreen(ft.UserControl):
-    def __init__(self, set_section_camera_callbacks, set_section_model_callbacks, set_section_threshold_callbacks, default_cameras, default_models, default_thresholds):
+    def __init__(self, set_section_camera_callbacks, set_section_model_callbacks, set_section_threshold_callbacks, default_cameras, default_models, default_thresholds,
+                 set_section_backend_callbacks=None, default_backends=None,
+                 set_section_inference_size_callbacks=None, default_inference_sizes=None,
+                 set_section_roi_callbacks=None, default_rois=None):
         super().__init__()
         self.set_section_camera_callbacks = set_section_camera_callbacks
         self.set_section_model_callbacks = set_section_model_callbacks
         self.set_section_threshold_callbacks = set_section_threshold_callbacks
-        self.camera_devices = get_camera_devices()
+        self.set_section_backend_callbacks = set_section_backend_callbacks or []
+        self.camera_devices = camera_registry.devices(wait=False)
         self.default_cameras = default_cameras
         self.default_models = default_models
         self.default_thresholds = default_thresholds
-        self.model_files = [f for f in os.listdir("model") if f.endswith((".engine", ".pt"))]  # List available models
+        self.default_backends = default_backends or [BACKEND_AUTO] * len(default_models)
+        self.set_section_inference_size_callbacks = set_section_inference_size_callbacks or []
+        self.set_section_roi_callbacks = set_section_roi_callbacks or []
+        self.default_inference_sizes = default_inference_sizes or [INFERENCE_SIZE] * len(default_models)
+        self.default_rois = default_rois or [[] for _ in default_models]
+        self.model_files = list_model_files("model")  # List available models
 
         # สร้างรายการเก็บค่า threshold สำหรับแต่ละ section
         self.threshold_texts = [ft.Text(f"{default_thresholds[i]:.2f}") for i in range(len(default_thresholds))]
@@ -56,6 +37,28 @@ class SettingsScreen(ft.UserControl):
         self.set_section_model_callbacks[section_index](selected_model)
         print(f"Default model for section {section_index + 1} set to: {selected_model}")
 
+    def on_backend_change(self, section_index, e):
+        selected_backend = e.control.value
+        self.set_section_backend_callbacks[section_index](selected_backend)
+        print(f"Inference backend for section {section_index + 1} set to: {selected_backend}")
+
+    def on_inference_size_change(self, section_index, e):
+        inference_size = int(e.control.value)
+        self.set_section_inference_size_callbacks[section_index](inference_size)
+        print(f"Inference size for section {section_index + 1} set to: {inference_size}")
+
+    def on_roi_submit(self, section_index, e):
+        # รูปแบบ "x,y x,y x,y; ..." พิกัด 0-1 คั่นแต่ละ polygon ด้วย ;
+        try:
+            rois = parse_rois(e.control.value)
+        except ValueError as error:
+            e.control.error_text = str(error)
+        else:
+            e.control.error_text = None
+            self.set_section_roi_callbacks[section_index](rois)
+            print(f"ROIs for section {section_index + 1} set to: {rois}")
+        e.control.update()
+
     def on_threshold_change(self, section_index, e):
         selected_threshold = e.control.value
         self.set_section_threshold_callbacks[section_index](selected_threshold)
@@ -64,6 +67,8 @@ class SettingsScreen(ft.UserControl):
         print(f"Confidence threshold for section {section_index + 1} set to: {selected_threshold}")
 
     def build(self):
+        # สร้างตอนเปิดหน้า Settings ซึ่งการค้นหากล้องตอนเปิดโปรแกรมมักเสร็จแล้ว
+        self.camera_devices = camera_registry.devices(wait=False)
         # สร้าง dropdown, model selector, และ threshold slider สำหรับแต่ละ section
         camera_model_sections = [
             ft.Container(
@@ -88,7 +93,35 @@ class SettingsScreen(ft.UserControl):
                         on_change=lambda e, idx=i: self.on_model_change(idx, e),
                         width=220  # ปรับความกว้างให้เหมาะสม
                     ),
+
+                    # ตัวเลือก backend สำหรับรันโมเดล
+                    ft.Dropdown(
+                        options=[ft.dropdown.Option(name, text=name) for name in [BACKEND_AUTO, *BACKENDS]],
+                        label="Inference Backend",
+                        value=self.default_backends[i] or BACKEND_AUTO,
+                        on_change=lambda e, idx=i: self.on_backend_change(idx, e),
+                        width=220
+                    ),
                     
+                    # ขนาดภาพที่ส่งเข้าโมเดล (imgsz)
+                    ft.Dropdown(
+                        options=[ft.dropdown.Option(str(size), text=str(size)) for size in INFERENCE_SIZES],
+                        label="Inference Size",
+                        value=str(self.default_inference_sizes[i] or INFERENCE_SIZE),
+                        on_change=lambda e, idx=i: self.on_inference_size_change(idx, e),
+                        width=220
+                    ),
+
+                    # polygon ROI ที่ตรวจจับเฉพาะภายใน ว่างไว้เพื่อตรวจจับทั้งเฟรม
+                    ft.TextField(
+                        label="ROIs (x,y x,y x,y; ...)",
+                        hint_text="blank = whole frame",
+                        value=format_rois(self.default_rois[i]),
+                        on_submit=lambda e, idx=i: self.on_roi_submit(idx, e),
+                        on_blur=lambda e, idx=i: self.on_roi_submit(idx, e),
+                        width=220
+                    ),
+
                     # Slider สำหรับ confidence threshold
                     ft.Row(
                         controls=[
@@ -125,5 +158,5 @@ class SettingsScreen(ft.UserControl):
         # Return the layout with title and settings sections aligned separately 
         return ft.Column([ 
             title_section,  # หัวเรื่องด้านบน
-            ft.Column(camera_model_sections, spacing=20)  # ส่วนการตั้งค่ากล้องด้านล่าง
+            ft.Row(camera_model_sections, spacing=20, wrap=True, vertical_alignment=ft.CrossAxisAlignment.START)  # ส่วนการตั้งค่ากล้องด้านล่าง เรียงเป็น grid เมื่อมีหลาย section
         ], alignment=ft.MainAxisAlignment.START)  # จัดเรียง layout ไปทางซ้าย
@@ -0,0 +1,224 @@
+"""In-memory settings with validation, schema migration and debounced atomic saves.
+
+Changes update the in-memory copy and notify listeners at once; the file is
+written by a background thread ``save_delay`` seconds after the last change
+(so dragging a slider writes it once), to a temporary file that is fsynced
+and renamed over ``settings.json``. A crash mid-write therefore leaves the
+previous file intact.
+"""
+import atexit
+import json
+import os
+import threading
+import time
+
+from backends import BACKENDS, BACKEND_AUTO
+from roi import parse_rois, format_rois, INFERENCE_SIZE, INFERENCE_SIZES
+
+# Constants
+STATE_FILE = "settings.json"
+SETTINGS_VERSION = 2  # เวอร์ชัน schema ปัจจุบัน ไฟล์ที่ไม่มี "version" คือเวอร์ชัน 1
+SAVE_DELAY = 1.0  # วินาทีหลังการเปลี่ยนแปลงล่าสุดก่อนเขียนไฟล์
+SECTION_COUNT = 3  # จำนวน section เริ่มต้นถ้า settings.json ไม่ได้กำหนด section_count
+SECTIONS_PER_PAGE = 3  # จำนวน section ที่แสดงพร้อมกันในหน้า Home
+DEFAULT_THRESHOLD = 0.5
+
+
+def _positive_int(value):
+    return isinstance(value, int) and not isinstance(value, bool) and value >= 1
+
+
+def _valid_threshold(value):
+    return isinstance(value, (int, float)) and not isinstance(value, bool) and 0.0 <= value <= 1.0
+
+
+def _valid_rois(value):
+    try:
+        parse_rois(format_rois(value))
+    except (TypeError, ValueError):
+        return False
+    return isinstance(value, list)
+
+
+# ค่าเริ่มต้นและตัวตรวจสอบของรายการต่อ section
+SECTION_KEYS = {
+    "cameras": (None, lambda value: value is None or isinstance(value, str)),
+    "models": (None, lambda value: value is None or isinstance(value, str)),
+    "thresholds": (DEFAULT_THRESHOLD, _valid_threshold),
+    "backends": (BACKEND_AUTO, lambda value: value == BACKEND_AUTO or value in BACKENDS),
+    "inference_sizes": (INFERENCE_SIZE, lambda value: value in INFERENCE_SIZES),
+    "rois": (list, _valid_rois),
+}
+
+
+def _default_section_count(settings):
+    cameras = settings.get("cameras")
+    return max(SECTION_COUNT, len(cameras) if isinstance(cameras, list) else 0)
+
+
+def _migrate_v1(settings):
+    """Version 1 files had no ``version`` and their section count was the length of ``cameras``; record it explicitly."""
+    settings.setdefault("section_count", _default_section_count(settings))
+    return settings
+
+
+# migration จากเวอร์ชัน n ไปเวอร์ชัน n + 1
+MIGRATIONS = {1: _migrate_v1}
+
+
+def migrate(settings):
+    """Upgrade a settings dict from any older schema version to ``SETTINGS_VERSION`` in place."""
+    version = settings.get("version", 1)
+    while version < SETTINGS_VERSION:
+        settings = MIGRATIONS[version](settings)
+        version += 1
+        print(f"Settings migrated to version {version}")
+    settings["version"] = SETTINGS_VERSION
+    return settings
+
+
+def validate(settings):
+    """Replace invalid values with defaults and pad every per-section list to ``section_count`` entries.
+
+    ``section_count`` and ``sections_per_page`` must be positive integers.
+    """
+    section_count = settings.setdefault("section_count", _default_section_count(settings))
+    if not _positive_int(section_count):
+        print(f"Invalid section_count {section_count!r}, using {SECTION_COUNT}")
+        section_count = settings["section_count"] = SECTION_COUNT
+    sections_per_page = settings.setdefault("sections_per_page", SECTIONS_PER_PAGE)
+    if not _positive_int(sections_per_page):
+        print(f"Invalid sections_per_page {sections_per_page!r}, using {SECTIONS_PER_PAGE}")
+        settings["sections_per_page"] = SECTIONS_PER_PAGE
+    if not isinstance(settings.get("automatic_start", False), bool):
+        settings["automatic_start"] = False
+    for key, (default, is_valid) in SECTION_KEYS.items():
+        values = settings.get(key)
+        values = list(values) if isinstance(values, list) else []
+        for i, value in enumerate(values):
+            if not is_valid(value):
+                print(f"Invalid {key} value for section {i + 1}: {value!r}, using the default")
+                values[i] = default() if callable(default) else default
+        settings[key] = values + [default() if callable(default) else default for _ in range(section_count - len(values))]
+    return settings
+
+
+class SettingsStore:
+    """Process-wide settings held in memory and saved to ``path`` in the background.
+
+    ``set`` and ``set_section`` change a value, call the listeners with
+    ``(key, index, value)`` (``index`` is ``None`` for top-level keys) and
+    schedule a save. ``flush`` writes pending changes immediately and runs
+    at exit.
+    """
+
+    def __init__(self, path=STATE_FILE, save_delay=SAVE_DELAY):
+        self.path = path
+        self.save_delay = save_delay
+        self.data = {}
+        self.listeners = []
+        self.dirty = False
+        self.save_at = None  # เวลา monotonic ที่จะเขียนไฟล์ หรือ None ถ้าไม่มีอะไรค้าง
+        self.condition = threading.Condition()
+        self.write_lock = threading.Lock()
+        self.thread = None
+
+    def load(self):
+        """Read, migrate and validate the file; a missing or unreadable file starts from defaults."""
+        settings = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r") as f:
+                    settings = json.load(f)
+                if not isinstance(settings, dict):
+                    raise ValueError("top level is not an object")
+            except (OSError, ValueError) as e:
+                # เก็บไฟล์ที่เสียไว้ดู แทนที่จะถูกเขียนทับด้วยค่าเริ่มต้น
+                print(f"Settings file {self.path} is unreadable ({e}); moved to {self.path}.corrupt and using defaults")
+                try:
+                    os.replace(self.path, self.path + ".corrupt")
+                except OSError:
+                    pass
+                settings = {}
+        version = settings.get("version", 1)
+        if not isinstance(version, int) or version > SETTINGS_VERSION:
+            print(f"Settings version {version!r} is not supported by this version of the app; unknown keys are kept as they are")
+            settings["version"] = SETTINGS_VERSION
+        self.data = validate(migrate(settings))
+        return self.data
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def set(self, key, value):
+        with self.condition:
+            self.data[key] = value
+        self._changed(key, None, value)
+
+    def set_section(self, key, index, value):
+        with self.condition:
+            self.data[key][index] = value
+        self._changed(key, index, value)
+
+    def add_listener(self, callback):
+        if callback not in self.listeners:
+            self.listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self.listeners:
+            self.listeners.remove(callback)
+
+    def _changed(self, key, index, value):
+        for listener in list(self.listeners):
+            try:
+                listener(key, index, value)
+            except Exception as e:
+                print(f"Error in settings listener: {e}")
+        self.schedule_save()
+
+    def schedule_save(self):
+        """Save ``save_delay`` seconds from now; each further change pushes the save back."""
+        with self.condition:
+            self.dirty = True
+            self.save_at = time.monotonic() + self.save_delay
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+                atexit.register(self.flush)
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.save_at is None:
+                    self.condition.wait()
+                delay = self.save_at - time.monotonic()
+                if delay > 0:
+                    self.condition.wait(delay)
+                    continue
+                self.save_at = None
+            self.flush()
+
+    def flush(self):
+        """Write pending changes now with an atomic write-and-rename."""
+        with self.write_lock:
+            with self.condition:
+                if not self.dirty:
+                    return
+                text = json.dumps(self.data)
+                self.dirty = False
+            tmp_path = self.path + ".tmp"
+            try:
+                with open(tmp_path, "w") as f:
+                    f.write(text)
+                    f.flush()
+                    os.fsync(f.fileno())
+                os.replace(tmp_path, self.path)
+            except OSError as e:
+                print(f"Error saving settings to {self.path}: {e}")
+                with self.condition:
+                    self.dirty = True
+
+
+# Shared by the Home page, the settings screen and every section
+settings_store = SettingsStore()
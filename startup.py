@@ -0,0 +1,9 @@
+import time
+
+STARTED_AT = time.perf_counter()  # เวลาที่เริ่ม import main.py ใช้วัดเวลาเปิดโปรแกรม
+STARTUP_TIMEOUT = 120.0  # วินาทีสูงสุดที่รอให้แต่ละ section โหลดโมเดลหรือได้ภาพแรก
+
+
+def log_startup(event):
+    """Print how long after launch ``event`` happened."""
+    print(f"Startup: {event} after {time.perf_counter() - STARTED_AT:.2f} s")
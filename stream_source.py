@@ -0,0 +1,189 @@
+import os
+import pathlib
+import threading
+import time
+
+import cv2
+
+# Constants
+STREAM_PREFIXES = ("rtsp://", "rtsps://", "rtmp://", "http://", "https://", "udp://", "file://")
+DECODE_AUTO = "auto"
+DECODE_FFMPEG = "ffmpeg"
+DECODE_GSTREAMER = "gstreamer"
+DECODERS = (DECODE_AUTO, DECODE_FFMPEG, DECODE_GSTREAMER)
+RECONNECT_MIN_DELAY = 1.0  # วินาทีก่อนเชื่อมต่อใหม่ครั้งแรก
+RECONNECT_MAX_DELAY = 30.0  # backoff สูงสุดระหว่างการเชื่อมต่อใหม่
+STREAM_TIMEOUT_MS = 5000  # timeout ตอนเปิดและอ่าน stream ผ่าน FFmpeg
+
+# FFmpeg ใช้ UDP เป็นค่าเริ่มต้นสำหรับ RTSP ซึ่งทำให้ภาพแตกเมื่อเครือข่ายไม่ดี
+os.environ.setdefault("OPENCV_FFMPEG_CAPTURE_OPTIONS", "rtsp_transport;tcp")
+
+_gstreamer_available = None
+
+
+def is_stream_source(source):
+    """Return True for network URLs and video file paths, False for local device indices."""
+    if not isinstance(source, str):
+        return False
+    return source.lower().startswith(STREAM_PREFIXES) or os.path.isfile(source)
+
+
+def gstreamer_available():
+    global _gstreamer_available
+    if _gstreamer_available is None:
+        info = cv2.getBuildInformation()
+        line = next((line for line in info.splitlines() if "GStreamer:" in line), "")
+        _gstreamer_available = "YES" in line
+    return _gstreamer_available
+
+
+def gstreamer_pipeline(url, frame_size=None, max_fps=None):
+    """Build a pipeline that decodes (with a hardware decoder if decodebin finds one), then drops frames and scales them to the width of ``frame_size`` before BGR conversion."""
+    if url.lower().startswith(("rtsp://", "rtsps://")):
+        source = f'rtspsrc location="{url}" latency=0 ! decodebin'
+    elif url.lower().startswith(("http://", "https://")):
+        source = f'souphttpsrc location="{url}" is-live=true ! decodebin'
+    else:
+        uri = url if "://" in url else pathlib.Path(url).resolve().as_uri()
+        source = f'uridecodebin uri="{uri}"'
+    stages = [source]
+    if max_fps:
+        stages.append(f"videorate drop-only=true ! video/x-raw,framerate={int(max_fps)}/1")
+    if frame_size:
+        # กำหนดเฉพาะความกว้าง videoscale จะคำนวณความสูงให้คงสัดส่วนภาพ
+        stages.append(f"videoscale ! video/x-raw,width={frame_size[0]}")
+    stages.append("videoconvert ! video/x-raw,format=BGR ! appsink drop=true max-buffers=1 sync=false")
+    return " ! ".join(stages)
+
+
+class StreamCapture:
+    """``cv2.VideoCapture``-compatible reader for RTSP/HTTP/file streams that reconnects with backoff.
+
+    With GStreamer the pipeline itself drops frames above ``max_fps`` and
+    scales to the width of ``frame_size`` (keeping the aspect ratio) before
+    colour conversion. With FFmpeg every packet is still decoded, but frames
+    above ``max_fps`` are only grabbed, never converted to BGR. ``read``
+    blocks while reconnecting and returns ``(False, None)`` only after
+    ``release``; a file source is reopened at its end, which makes a local
+    file a stand-in for a camera. ``isOpened`` opens the stream on its first
+    call and stays False if that fails, so an unreachable URL is reported.
+    ``release`` never waits for a blocked open or grab: the reading thread
+    releases the capture once that call returns.
+    """
+
+    def __init__(self, url, frame_size=None, max_fps=None, decode=DECODE_AUTO, name=None):
+        self.url = url
+        self.name = name or url
+        self.frame_size = tuple(frame_size) if frame_size else None
+        self.max_fps = max_fps
+        self.decode = decode or DECODE_AUTO
+        self.cap = None
+        self.decoder = None
+        self.lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.last_retrieve = 0.0
+        self.reconnects = 0
+        self.opened_once = False  # เคยเปิด stream สำเร็จแล้วอย่างน้อยหนึ่งครั้ง
+
+    def isOpened(self):
+        if self.stop_event.is_set():
+            return False
+        if not self.opened_once:
+            with self.lock:
+                if self.cap is None and not self.stop_event.is_set():
+                    self._open()
+        return self.opened_once and not self.stop_event.is_set()
+
+    def set(self, prop, value):
+        # ขนาด buffer ถูกควบคุมโดย pipeline อยู่แล้ว รับไว้เพื่อให้ใช้แทน cv2.VideoCapture ได้
+        return False
+
+    def read(self):
+        delay = RECONNECT_MIN_DELAY
+        while not self.stop_event.is_set():
+            with self.lock:
+                try:
+                    if self.cap is None and not self.stop_event.is_set():
+                        self._open()
+                    cap = self.cap
+                    if cap is not None:
+                        if not cap.grab():
+                            cap.release()
+                            self.cap = None
+                            print(f"Stream {self.name} ended or stalled, reconnecting.")
+                        else:
+                            delay = RECONNECT_MIN_DELAY
+                            now = time.monotonic()
+                            if self.decoder != DECODE_GSTREAMER and self.max_fps and now - self.last_retrieve < 1.0 / self.max_fps:
+                                continue
+                            success, frame = cap.retrieve()
+                            if success:
+                                self.last_retrieve = now
+                                return True, frame
+                            continue
+                finally:
+                    if self.stop_event.is_set():
+                        # release ถูกเรียกระหว่างที่ open หรือ grab ค้างอยู่ thread ที่อ่านจึงปิดเอง
+                        self._close()
+            self.reconnects += 1
+            if self.stop_event.wait(delay):
+                break
+            delay = min(delay * 2, RECONNECT_MAX_DELAY)
+        return False, None
+
+    def release(self):
+        self.stop_event.set()
+        # ถ้า read กำลังถือ lock อยู่ (open หรือ grab อาจค้างหลายวินาที) ไม่รอ ให้ read ปิดเองเมื่อคืนค่า
+        if self.lock.acquire(blocking=False):
+            try:
+                self._close()
+            finally:
+                self.lock.release()
+
+    def _close(self):
+        if self.cap is not None:
+            self.cap.release()
+            self.cap = None
+
+    def _open(self):
+        decoders = [self.decode] if self.decode != DECODE_AUTO else [DECODE_GSTREAMER, DECODE_FFMPEG]
+        for decoder in decoders:
+            if decoder == DECODE_GSTREAMER:
+                if not gstreamer_available():
+                    continue
+                cap = cv2.VideoCapture(gstreamer_pipeline(self.url, self.frame_size, self.max_fps), cv2.CAP_GSTREAMER)
+            else:
+                cap = self._open_ffmpeg()
+            if cap.isOpened():
+                self.cap = cap
+                self.decoder = decoder
+                self.opened_once = True
+                return
+            cap.release()
+        print(f"Cannot open stream {self.name}.")
+
+    def _open_ffmpeg(self):
+        url = self.url[len("file://"):] if self.url.startswith("file://") else self.url
+        params = []
+        if hasattr(cv2, "CAP_PROP_HW_ACCELERATION"):
+            params += [cv2.CAP_PROP_HW_ACCELERATION, cv2.VIDEO_ACCELERATION_ANY]
+        if hasattr(cv2, "CAP_PROP_OPEN_TIMEOUT_MSEC"):
+            params += [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, STREAM_TIMEOUT_MS, cv2.CAP_PROP_READ_TIMEOUT_MSEC, STREAM_TIMEOUT_MS]
+        try:
+            return cv2.VideoCapture(url, cv2.CAP_FFMPEG, params)
+        except (cv2.error, TypeError):
+            # OpenCV รุ่นเก่ารับ params ไม่ได้
+            return cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+
+
+def open_capture(source, frame_size=None, options=None):
+    """Open a local device index with ``cv2.VideoCapture`` or a URL/file with ``StreamCapture``.
+
+    ``options`` are the stream settings (``max_fps``, ``decode``, ``name``).
+    """
+    if is_stream_source(source):
+        options = options or {}
+        return StreamCapture(source, frame_size, options.get("max_fps"), options.get("decode", DECODE_AUTO), options.get("name"))
+    cap = cv2.VideoCapture(source)
+    cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    return cap
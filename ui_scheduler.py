@@ -0,0 +1,78 @@
+import threading
+import time
+
+from metrics import metrics_registry
+
+UI_UPDATE_INTERVAL = 0.1  # วินาทีระหว่างการส่งอัปเดต UI แต่ละรอบ
+
+
+class UIUpdateScheduler:
+    """Coalesce control updates from worker threads into one page update per tick.
+
+    Workers call ``mark_dirty`` after changing a control instead of calling
+    ``update()`` themselves. Every ``interval`` seconds the scheduler sends all
+    dirty controls of a page in a single ``page.update(*controls)``, so a
+    control changed several times within a tick is sent only once.
+    """
+
+    def __init__(self, interval=UI_UPDATE_INTERVAL):
+        self.interval = interval
+        self.dirty = {}  # id(control) -> control, keeps insertion order
+        self.lock = threading.Lock()
+        self.requested = 0
+        self.flushed = 0
+        self.flushes = 0
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        with self.lock:
+            if self.running:
+                return
+            self.running = True
+            self.thread = threading.Thread(target=self._run, daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        self.running = False
+
+    def mark_dirty(self, *controls):
+        """Schedule ``controls`` to be sent to the page on the next tick."""
+        with self.lock:
+            for control in controls:
+                self.dirty[id(control)] = control
+            self.requested += len(controls)
+        if not self.running:
+            self.start()
+
+    def stats(self):
+        """Return update counters: controls requested, controls flushed and page updates sent."""
+        return {"requested": self.requested, "flushed": self.flushed, "flushes": self.flushes}
+
+    def flush(self):
+        """Send every dirty control now, one ``page.update`` call per page."""
+        with self.lock:
+            controls, self.dirty = list(self.dirty.values()), {}
+        pages = {}
+        for control in controls:
+            page = control.page
+            if page is not None:  # ยังไม่ได้แสดงบนหน้าจอ ไม่ต้องอัปเดต
+                pages.setdefault(id(page), (page, []))[1].append(control)
+        for page, page_controls in pages.values():
+            try:
+                started = time.perf_counter()
+                page.update(*page_controls)
+                metrics_registry.section("ui").observe("page_update", time.perf_counter() - started)
+                self.flushed += len(page_controls)
+                self.flushes += 1
+            except Exception as e:
+                print(f"Error updating UI: {e}")
+
+    def _run(self):
+        while self.running:
+            time.sleep(self.interval)
+            self.flush()
+
+
+# Shared by every section and the main page
+ui_scheduler = UIUpdateScheduler()
@@ -1,52 +1,31 @@
-import sys
 import os
 import flet as ft
-import base64
-import cv2
 import threading
-import time
-import queue
-import torch
-from ultralytics import YOLO
-
-# ตรวจสอบระบบปฏิบัติการ
-if sys.platform == "win32":
-    import pythoncom
-    from pygrabber.dshow_graph import FilterGraph
+from inference_engine import new_section_id
+from model_registry import model_registry
+from backends import list_model_files, BACKEND_AUTO
+from preview_encoder import PreviewEncoder
+from ui_scheduler import ui_scheduler
+from camera_registry import camera_registry
+from stream_source import open_capture
+from camera_worker import CameraWorker, WORKER_MODE_THREAD, WORKER_MODE_PROCESS
+from metrics import metrics_registry
+from person_counter import ID_EXPIRATION_TIME
+from count_history import count_history
+from roi import INFERENCE_SIZE
+from clip_recorder import ClipRecorder
+from section_pipeline import SectionPipeline, MODEL_DIR, FRAME_WAIT_TIMEOUT
 
 # Constants
-MODEL_DIR = "model"
-FRAME_SIZE = (320, 320)
-FRAME_QUEUE_SIZE = 5
-
-# ฟังก์ชันสำหรับดึงข้อมูลกล้อง
-def get_camera_devices():
-    if sys.platform == "win32":  # ใช้ pythoncom และ pygrabber สำหรับ Windows
-        pythoncom.CoInitialize()
-        try:
-            graph = FilterGraph()
-            devices = graph.get_input_devices()
-            return {device: index for index, device in enumerate(devices)}
-        finally:
-            pythoncom.CoUninitialize()
-    elif sys.platform == "linux":
-        # ใช้ OpenCV สำหรับ Linux
-        devices = {}
-        index = 0
-        while True:
-            cap = cv2.VideoCapture(index)
-            if not cap.read()[0]:  # ตรวจสอบว่ากล้องที่ index นี้ใช้ได้หรือไม่
-                break
-            devices[f"Camera {index}"] = index
-            cap.release()
-            index += 1
-        return devices
-    else:
-        print("Camera device retrieval is only supported on Windows and Linux.")
-        return {}  # ส่งคืนค่าว่างในกรณีที่ไม่ใช่ Windows หรือ Linux
+PREVIEW_CODEC = "jpeg"
+PREVIEW_QUALITY = 75
+PREVIEW_MAX_FPS = 10  # จำกัดอัตราการส่งภาพไปยัง UI แยกจากอัตราการ inference
 
 class Countdown(ft.UserControl): 
-    def __init__(self, update_person_count_callback, reset_person_count_callback, default_camera=None, default_model=None, confidence_threshold=0.5): 
+    def __init__(self, update_person_count_callback, reset_person_count_callback, default_camera=None, default_model=None, confidence_threshold=0.5, backend=BACKEND_AUTO,
+                 preview_codec=PREVIEW_CODEC, preview_quality=PREVIEW_QUALITY, preview_max_fps=PREVIEW_MAX_FPS, worker_mode=WORKER_MODE_THREAD, name=None,
+                 id_expiration_time=ID_EXPIRATION_TIME, reid_enabled=False, reid_model=None, scheduler_options=None,
+                 event_log=None, inference_size=INFERENCE_SIZE, rois=None, clip_writer=None, clip_options=None): 
         super().__init__()
         self.running = False
         self.automatic_start = False  
@@ -54,147 +33,366 @@ class Countdown(ft.UserControl):
         self.reset_person_count_callback = reset_person_count_callback
         self.selected_camera_name = default_camera
         self.selected_model_path = os.path.join(MODEL_DIR, default_model) if default_model else None
-        self.confidence_threshold = confidence_threshold  
-        self.frame_queue = queue.Queue(maxsize=FRAME_QUEUE_SIZE)
-        self.camera_devices = get_camera_devices()  # ดึงข้อมูลกล้องจากฟังก์ชันที่ปรับแล้ว
-        self.model = None
+        self.backend = backend or BACKEND_AUTO
+        self.worker_mode = worker_mode
+        self.id_expiration_time = id_expiration_time
+        self.reid_enabled = reid_enabled
+        self.reid_model = reid_model
+        self.worker = None
+        # รายการกล้องที่ cache ไว้ ถ้ายังค้นหากล้องไม่เสร็จจะได้รายการจาก listener ภายหลัง ไม่บล็อกการเปิดหน้าจอ
+        self.camera_devices = camera_registry.devices(wait=False)
+        self.camera_index = None
+        self.section_id = new_section_id()
+        self.name = name or f"Section {self.section_id + 1}"
+        self.metrics = metrics_registry.section(self.name)
+        self.scheduler_options = scheduler_options or {}
+        # pre_roll, post_roll, fps, quality และ classes ของ ClipRecorder
+        self.clip_writer = clip_writer
+        self.clip_options = clip_options or {}
+        self.clip_recorder = None
+        if clip_writer is not None and worker_mode != WORKER_MODE_PROCESS:
+            self.clip_recorder = ClipRecorder(self.name, clip_writer, expiry=id_expiration_time, metrics=self.metrics, **self.clip_options)
+        # โหมด thread: capture, inference และสรุปผลทำใน pipeline ส่วนโหมด process ใช้เฉพาะค่าตั้งของมันส่งให้ worker
+        self.pipeline = SectionPipeline(
+            self.section_id, self.name, self.metrics, self.on_result, confidence_threshold, id_expiration_time,
+            reid_enabled=reid_enabled and worker_mode != WORKER_MODE_PROCESS, reid_model=reid_model,
+            scheduler_options=self.scheduler_options, event_log=event_log, inference_size=inference_size, rois=rois,
+            clip_recorder=self.clip_recorder,
+        )
+        self.model_thread = None
+        self.start_lock = threading.Lock()  # กันการเริ่ม feed ซ้อนกันจาก auto start และ UI
+        self.first_frame = threading.Event()  # ตั้งเมื่อได้ผลการตรวจจับแรกหลังเริ่ม feed
         self.status_text = ft.Text(f"Selected Camera: {default_camera if default_camera else 'None'}, Selected Model: {default_model if default_model else 'None'}")
         self.detection_info = ft.Text("Detections: None", color=ft.colors.WHITE)
-        self.unique_person_ids = set()
+        self.preview_enabled = True  # สวิตช์ Preview ของผู้ใช้
+        self.on_screen = True  # False เมื่อ section อยู่นอกหน้าที่แสดงอยู่ ยังนับต่อแต่ไม่อัปเดต UI
 
         transparent_pixel = "iVBORw0KGgoAAAANSUhEUgAAAAEAAAABCAQAAAC1HAwCAAAAC0lEQVR42mP8/wcAAgAB/Onk7AAA"
         self.img = ft.Image(border_radius=ft.border_radius.all(20), src_base64=transparent_pixel)
+        self.preview = PreviewEncoder(self.on_preview_encoded, codec=preview_codec, quality=preview_quality, max_fps=preview_max_fps, metrics=self.metrics, overlay=self.pipeline.roi_cropper)
 
         self.loading_indicator = ft.ProgressRing(visible=False)
+        self.camera_selector = None  # สร้างใน build
+        self.model_selector = None
 
         self.load_model()
 
     def load_model(self):
-        """Load the YOLO model based on the selected model path."""
+        """Acquire the selected model from the model registry in the background.
+
+        A running section keeps detecting with its current engine until the
+        new one is ready, then switches to it.
+        """
+        if self.worker_mode == WORKER_MODE_PROCESS:
+            return  # โหมด process: worker โหลดโมเดลเองตอนเริ่ม feed
         if self.selected_model_path and os.path.exists(self.selected_model_path):
-            try:
-                self.model = YOLO(self.selected_model_path, task="detect")
-                print(f"Model loaded: {self.selected_model_path}")
-                if self.automatic_start:
-                    self.start_video_feed(None)  
-            except Exception as e:
-                print(f"Error loading YOLO model: {e}")
-                self.model = None
+            self.loading_indicator.visible = True
+            ui_scheduler.mark_dirty(self.loading_indicator)
+            self.model_thread = threading.Thread(target=self._acquire_model, args=(self.selected_model_path, self.backend), daemon=True)
+            self.model_thread.start()
         else:
             print("No model selected or model file missing.")
 
+    def _acquire_model(self, model_path, backend):
+        try:
+            engine = model_registry.acquire(model_path, backend)
+        except Exception as e:
+            print(f"Error loading model with {backend} backend: {e}")
+            return
+        finally:
+            self.loading_indicator.visible = False
+            ui_scheduler.mark_dirty(self.loading_indicator)
+
+        if (model_path, backend) != (self.selected_model_path, self.backend) or engine is self.pipeline.engine:
+            # ผู้ใช้เปลี่ยนโมเดลระหว่างที่กำลังโหลด หรือใช้ engine นี้อยู่แล้ว
+            model_registry.release(engine)
+            return
+        engine.attach(self.section_id)
+        previous = self.pipeline.set_engine(engine)
+        if previous is not None:
+            model_registry.release(previous, self.section_id)
+        print(f"Model loaded: {model_path}")
+        if self.automatic_start and self.page is not None:
+            self.start_video_feed(None)
+
+    def wait_until_ready(self, timeout=None):
+        """Block until the background model load finishes; return True if the section can start.
+
+        In process mode the worker loads the model itself, so there is nothing
+        to wait for.
+        """
+        if self.worker_mode == WORKER_MODE_PROCESS:
+            return True
+        thread = self.model_thread
+        if thread is not None:
+            thread.join(timeout)
+        return self.pipeline.model_ready.is_set()
+
+    def release_model(self):
+        """Return the engine to the model registry, which keeps it cached for reuse."""
+        engine = self.pipeline.set_engine(None)
+        if engine is not None:
+            model_registry.release(engine, self.section_id)
+
     def start_video_feed(self, e):
         """Start capturing video and processing frames."""
+        with self.start_lock:
+            self._start_video_feed()
+
+    def _start_video_feed(self):
         if not self.running:
-            if self.selected_camera_name in self.camera_devices:
+            camera_index = camera_registry.resolve(self.selected_camera_name)
+            if camera_index is not None:
                 self.loading_indicator.visible = True
                 self.update()
                 
-                self.cap = cv2.VideoCapture(self.camera_devices[self.selected_camera_name])
-                self.cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-                if not self.cap.isOpened():
+                camera_registry.claim(camera_index)
+                self.camera_index = camera_index
+                stream_options = camera_registry.stream_options(self.selected_camera_name)
+                if self.worker_mode == WORKER_MODE_PROCESS:
+                    self.start_worker(camera_index, stream_options)
+                    return
+
+                # กล้อง local เปิดด้วย cv2.VideoCapture ส่วน RTSP/HTTP/ไฟล์ใช้ StreamCapture ที่เชื่อมต่อใหม่เองเมื่อหลุด
+                cap = open_capture(camera_index, self.pipeline.frame_size, stream_options)
+                if not cap.isOpened():
                     print("Error: Cannot open camera.")
+                    cap.release()
+                    self.release_camera()
                     self.loading_indicator.visible = False
                     self.update()
                     return
 
                 self.running = True
-                threading.Thread(target=self.read_frames, daemon=True).start()
-                threading.Thread(target=self.process_frames, daemon=True).start()
+                self.first_frame.clear()
+                self.preview.start()
+                if self.clip_recorder is not None:
+                    self.clip_recorder.start()
+                self.pipeline.start(cap)
                 
                 self.loading_indicator.visible = False
                 self.update()
             else:
                 print("Selected camera not available.")
     
+    def start_worker(self, camera_index, stream_options=None):
+        """Run capture, detection and preview encoding for this section in a worker process."""
+        if not (self.selected_model_path and os.path.exists(self.selected_model_path)):
+            print("No model selected or model file missing.")
+            self.release_camera()
+        else:
+            pipeline = self.pipeline
+            self.worker = CameraWorker(
+                camera_index, self.selected_model_path, self.backend, pipeline.confidence_threshold, pipeline.frame_size,
+                self.preview.codec, self.preview.quality, self.preview.max_fps, self.id_expiration_time,
+                reid_enabled=self.reid_enabled, reid_model=self.reid_model, scheduler_options=self.scheduler_options,
+                event_log_options=pipeline.event_log.options() if pipeline.event_log is not None else None, name=self.name,
+                stream_options=stream_options, inference_size=pipeline.inference_size, rois=pipeline.rois,
+                clip_options={"writer": self.clip_writer.options(), "recorder": self.clip_options} if self.clip_writer is not None else None,
+            )
+            self.worker.preview_visible.value = self.preview.visible
+            self.worker.start()
+            self.first_frame.clear()
+            self.running = True
+            threading.Thread(target=self.poll_worker, args=(self.worker,), daemon=True).start()
+        self.loading_indicator.visible = False
+        self.update()
+
+    def poll_worker(self, worker):
+        """Apply detection summaries and previews sent back by the worker process."""
+        while self.running and self.worker is worker:
+            message = worker.get_message(timeout=FRAME_WAIT_TIMEOUT)
+            if message is None:
+                if not worker.is_alive():
+                    print("Camera worker process exited.")
+                    break
+                continue
+            kind = message[0]
+            if kind == "detections":
+                _, summary, class_counts, person_ids, embeddings, frame_age, frames_dropped = message
+                count_history.record(self.name, class_counts)
+                if person_ids:
+                    self.update_person_count_callback(self.name, person_ids, embeddings)
+                self.detection_info.value = summary + f"\nFrame age: {frame_age * 1000:.0f} ms, Dropped frames: {frames_dropped}"
+                self.first_frame.set()
+                if self.on_screen:
+                    ui_scheduler.mark_dirty(self.detection_info)
+            elif kind == "preview":
+                self.on_preview_encoded(message[1])
+            elif kind == "error":
+                print(f"Camera worker error: {message[1]}")
+
     def stop_video_feed(self, e):
         """Stop video capture and release resources."""
         self.running = False
-        if self.cap:
-            self.cap.release()
-            self.cap = None
+        if self.worker is not None:
+            self.worker.stop()
+            self.worker = None
+        self.pipeline.stop()
+        self.preview.stop()
+        if self.clip_recorder is not None:
+            self.clip_recorder.stop()
+        self.release_camera()
         self.loading_indicator.visible = False  
         self.update()
 
+    def release_camera(self):
+        if self.camera_index is not None:
+            camera_registry.release(self.camera_index)
+            self.camera_index = None
+
+    def on_cameras_changed(self, devices):
+        """Refresh the camera dropdown when the camera registry sees a device added or removed."""
+        self.camera_devices = devices
+        self.camera_selector.options = [ft.dropdown.Option(name, text=name) for name in devices.keys()] or [ft.dropdown.Option("No cameras available")]
+        ui_scheduler.mark_dirty(self.camera_selector)
+
     def reset_person_count(self, e):
         """Reset person count."""
         self.reset_person_count_callback()
 
+    def did_mount(self):
+        """Re-acquire the model after the section is shown again (cached models load instantly)."""
+        camera_registry.add_listener(self.on_cameras_changed)
+        devices = camera_registry.devices(wait=False)
+        if devices != self.camera_devices:
+            # การค้นหากล้องเสร็จก่อน section ถูกแสดง จึงไม่ได้รับแจ้งผ่าน listener
+            self.on_cameras_changed(devices)
+        if self.pipeline.engine is None and not (self.model_thread is not None and self.model_thread.is_alive()):
+            self.load_model()
+
     def will_unmount(self):
         """Ensure proper cleanup on component unmount."""
+        camera_registry.remove_listener(self.on_cameras_changed)
         self.stop_video_feed(None)
+        self.release_model()
+
+    def on_result(self, result, summary, class_counts, person_ids, embeddings):
+        """Count and show one inferred frame from the pipeline and queue it for the preview."""
+        count_history.record(self.name, class_counts)
+        if person_ids:
+            self.update_person_count_callback(self.name, person_ids, embeddings)
+        self.detection_info.value = summary
+        self.first_frame.set()
+        if self.on_screen:
+            ui_scheduler.mark_dirty(self.detection_info)
+
+        if self.preview.due():
+            # สำเนาเฟรม เพราะช่องของ frame_buffer จะถูกเขียนทับเมื่ออ่านเฟรมถัดไป
+            result.orig_img = result.orig_img.copy()
+            self.preview.submit(result)
+
+    def on_preview_encoded(self, image_base64):
+        """Show a preview frame produced by the encoder thread."""
+        self.img.src_base64 = image_base64
+        if self.on_screen:
+            ui_scheduler.mark_dirty(self.img)
+
+    def set_preview_visible(self, visible):
+        """Show or hide the preview; hidden sections keep detecting but skip annotation and encoding."""
+        self.preview_enabled = visible
+        self.img.visible = visible
+        self.apply_preview_visibility()
+        self.update()
+
+    def set_on_screen(self, on_screen):
+        """Mark the section as shown or paged out; paged-out sections keep counting without previews or UI updates."""
+        self.on_screen = on_screen
+        self.apply_preview_visibility()
+        if on_screen:
+            # ข้อความล่าสุดถูกเก็บไว้ระหว่างที่ซ่อน ส่งครั้งเดียวเมื่อกลับมาแสดง
+            ui_scheduler.mark_dirty(self.detection_info)
+
+    def apply_preview_visibility(self):
+        visible = self.preview_enabled and self.on_screen
+        self.preview.visible = visible
+        if self.worker is not None:
+            self.worker.preview_visible.value = visible
+
+    def on_preview_toggle(self, e):
+        self.set_preview_visible(e.control.value)
+
+    def set_confidence_threshold(self, threshold):
+        """Apply a new confidence threshold from the next inference on; a worker process reads it from shared memory."""
+        self.pipeline.confidence_threshold = threshold
+        if self.worker is not None:
+            self.worker.confidence_threshold.value = threshold
 
-    def read_frames(self):
-        """Read frames from the camera and add them to the queue."""
-        while self.running:
-            success, frame = self.cap.read()
-            if not success:
-                break
-            frame = cv2.resize(frame, FRAME_SIZE)
-            if not self.frame_queue.full():
-                self.frame_queue.put(frame)
-            time.sleep(0.03)
-
-    def process_frames(self):
-        """Process frames in the queue using the YOLO model."""
-        if self.model is None:
-            print("YOLO model not loaded. Skipping frame processing.")
+    def set_camera(self, camera_name):
+        """Select a camera; a running feed moves to it in the background without stopping detection."""
+        if camera_name == self.selected_camera_name:
             return
+        self.selected_camera_name = camera_name
+        self.status_text.value = f"Selected Camera: {camera_name}"
+        ui_scheduler.mark_dirty(self.status_text)
+        if self.camera_selector is not None and self.camera_selector.value != camera_name:
+            self.camera_selector.value = camera_name
+            ui_scheduler.mark_dirty(self.camera_selector)
+        if self.running:
+            threading.Thread(target=self.switch_camera, daemon=True).start()
+        elif self.automatic_start:
+            self.start_video_feed(None)
+
+    def switch_camera(self):
+        """Replace the capture of a running feed with the selected camera."""
+        with self.start_lock:
+            camera_index = camera_registry.resolve(self.selected_camera_name)
+            if not self.running or camera_index is None or camera_index == self.camera_index:
+                return
+            stream_options = camera_registry.stream_options(self.selected_camera_name)
+            if self.worker is not None:
+                # worker process เปิดกล้องเอง จึงต้องเริ่ม worker ใหม่ หลังตัวเก่าปล่อยกล้องแล้ว
+                self.worker.stop(wait=True)
+                self.worker = None
+                camera_registry.release(self.camera_index)
+                camera_registry.claim(camera_index)
+                self.camera_index = camera_index
+                self.start_worker(camera_index, stream_options)
+                self.running = self.worker is not None
+                return
+            cap = open_capture(camera_index, self.pipeline.frame_size, stream_options)
+            if not cap.isOpened():
+                print("Error: Cannot open camera.")
+                cap.release()
+                return
+            camera_registry.claim(camera_index)
+            previous_index, self.camera_index = self.camera_index, camera_index
+            # thread อ่านภาพปิดกล้องเดิมเองหลังสลับ แล้วจึงคืนกล้องเดิมให้ registry
+            self.pipeline.switch_capture(cap, lambda: camera_registry.release(previous_index))
+
+    def set_model(self, model_name):
+        """Select a model; a running section keeps detecting with the current one until it has loaded."""
+        model_path = os.path.join(MODEL_DIR, model_name) if model_name else None
+        if model_path == self.selected_model_path:
+            return
+        self.selected_model_path = model_path
+        self.status_text.value = f"Selected Model: {model_name}"
+        ui_scheduler.mark_dirty(self.status_text)
+        if self.model_selector is not None and self.model_selector.value != model_name:
+            self.model_selector.value = model_name
+            ui_scheduler.mark_dirty(self.model_selector)
+        if self.worker is not None:
+            # worker process โหลดโมเดลเองตอนเริ่ม จึงต้องเริ่ม worker ใหม่
+            threading.Thread(target=self.restart_worker, daemon=True).start()
+        else:
+            self.load_model()
 
-        while self.running:
-            if not self.frame_queue.empty():
-                frame = self.frame_queue.get()
-                try:
-                    with torch.no_grad():
-                        results = self.model.track(
-                            source=frame,
-                            imgsz=FRAME_SIZE[0],
-                            tracker="botsort.yaml",
-                            conf=self.confidence_threshold
-                        )
-                    if results:
-                        detections = results[0].names
-                        class_counts = {}
-                        detection_ids = []
-
-                        for box in results[0].boxes:
-                            class_name = detections[int(box.cls)]
-                            track_id_tensor = box.id
-                            track_id = int(track_id_tensor.item()) if track_id_tensor is not None else None
-
-                            if class_name == "person" and track_id is not None and track_id not in self.unique_person_ids:
-                                self.unique_person_ids.add(track_id)
-                                self.update_person_count_callback(track_id)
-                            detection_ids.append(f"{class_name} (ID: {track_id})")
-                            class_counts[class_name] = class_counts.get(class_name, 0) + 1
-
-                        detection_summary = "Detections: " + ", ".join([f"{cls}: {count}" for cls, count in class_counts.items()])
-                        detection_summary += "\nTrack IDs: " + ", ".join(detection_ids[:10])
-                        self.detection_info.value = detection_summary
-                        self.update()
-
-                        annotated_frame = results[0].plot() if results else frame
-                        _, buffer = cv2.imencode('.png', annotated_frame)
-                        self.img.src_base64 = base64.b64encode(buffer).decode("utf-8")
-                        self.update()
-                except Exception as e:
-                    print(f"Error processing frame: {e}")
-                time.sleep(0.02)
+    def restart_worker(self):
+        with self.start_lock:
+            if self.worker is None:
+                return
+            self.worker.stop(wait=True)
+            self.worker = None
+            self.start_worker(self.camera_index, camera_registry.stream_options(self.selected_camera_name))
+            self.running = self.worker is not None
 
     def on_camera_change(self, e):
         """Handle camera selection change."""
-        self.selected_camera_name = e.control.value
-        self.status_text.value = f"Selected Camera: {self.selected_camera_name}"
-        if self.automatic_start:
-            self.start_video_feed(None)
-        self.update()
+        self.set_camera(e.control.value)
 
     def on_model_change(self, e):
         """Handle model selection change."""
-        self.selected_model_path = os.path.join(MODEL_DIR, e.control.value)
-        self.status_text.value = f"Selected Model: {os.path.basename(self.selected_model_path)}"
-        self.load_model()
-        self.update()
+        self.set_model(e.control.value)
 
     def toggle_automatic_start(self, e):
         """Toggle automatic start functionality."""
@@ -203,17 +401,23 @@ class Countdown(ft.UserControl):
 
     def build(self):
         """Build the UI components for the countdown system."""
-        camera_selector = ft.Dropdown(
+        self.camera_selector = ft.Dropdown(
             options=[ft.dropdown.Option(name, text=name) for name in self.camera_devices.keys()] or [ft.dropdown.Option("No cameras available")],
             label="Select Camera",
             value=self.selected_camera_name,
             on_change=self.on_camera_change,
             width=200
         )
+        camera_row = ft.Row(
+            controls=[
+                self.camera_selector,
+                ft.IconButton(icon=ft.icons.REFRESH, tooltip="Refresh cameras", on_click=lambda e: camera_registry.refresh_async()),
+            ]
+        )
 
-        model_files = [f for f in os.listdir(MODEL_DIR) if f.endswith((".engine", ".pt"))]
+        model_files = list_model_files(MODEL_DIR)
         
-        model_selector = ft.Dropdown(
+        self.model_selector = ft.Dropdown(
             options=[ft.dropdown.Option(file, text=file) for file in model_files] or [ft.dropdown.Option("No models available")],
             label="Select Model",
             value=os.path.basename(self.selected_model_path) if self.selected_model_path else None,
@@ -225,13 +429,14 @@ class Countdown(ft.UserControl):
             controls=[
                 ft.ElevatedButton(text="Start", on_click=self.start_video_feed),
                 ft.ElevatedButton(text="Stop", on_click=self.stop_video_feed),
+                ft.Switch(label="Preview", value=self.preview_enabled, on_change=self.on_preview_toggle),
             ],
             alignment=ft.MainAxisAlignment.START
         )
 
         return ft.Column([
-            camera_selector,
-            model_selector,
+            camera_row,
+            self.model_selector,
             self.loading_indicator,
             self.status_text,
             self.detection_info,